@@ -1,16 +1,32 @@
-import os
-import openai
-from dotenv import load_dotenv
+import importlib
+
 from flask import Flask
 from routes import api_routes
+from llm_gateway import gateway
+from metrics import TimedJSONProvider
 
-load_dotenv()
+# Dependências pesadas que o código só importa no primeiro uso (ver llm_gateway e pdf_extraction)
+LAZY_MODULES = ("openai", "httpx", "fitz")
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 
 app.register_blueprint(api_routes)
+app.extensions["llm_gateway"] = gateway
+
+
+def warm_up():
+    """
+    Carrega no processo principal do gunicorn (preload_app, ver gunicorn.conf.py) o que as rotas
+    só carregariam na primeira requisição, para que os workers compartilhem essa memória após o fork.
+    Não abre conexões nem threads: SQLite, pool de processos e cliente HTTP continuam por worker.
+    """
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+    gateway.preload()
+    # Matcher das rotas, montado pelo werkzeug no primeiro request
+    app.url_map.update()
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 # Inicia o servidor local (localhost:5000 por padrão)
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+"""
+Corpus sintético de editais em tamanhos diferentes, gerado de forma determinística
+(mesma semente, mesmo texto) em texto puro e em PDF.
+"""
+import json
+import os
+import random
+
+import fitz
+
+# Nome -> nº de páginas
+SIZES = {"small": 8, "medium": 60, "large": 300}
+
+ROLES = [
+    "ANALISTA DE TECNOLOGIA DA INFORMAÇÃO",
+    "TÉCNICO EM INFORMÁTICA",
+    "ASSISTENTE ADMINISTRATIVO",
+    "AUDITOR FISCAL",
+    "ENFERMEIRO",
+    "PROFESSOR DE MATEMÁTICA"
+]
+
+TOPICS = [
+    "Redes de computadores: modelo OSI, TCP/IP, roteamento e comutação.",
+    "Banco de dados: modelagem relacional, normalização, SQL e transações.",
+    "Engenharia de software: requisitos, testes, padrões de projeto e métodos ágeis.",
+    "Segurança da informação: criptografia, controle de acesso e gestão de incidentes.",
+    "Língua Portuguesa: interpretação de texto, concordância, regência e crase.",
+    "Raciocínio lógico: proposições, tabelas-verdade, conjuntos e porcentagem.",
+    "Legislação: Lei nº 8.112/1990, Lei nº 14.133/2021 e Constituição Federal.",
+    "Administração pública: princípios, atos administrativos e licitações."
+]
+
+FILLER = [
+    "O candidato deverá observar rigorosamente os prazos e as condições estabelecidas neste edital.",
+    "As informações prestadas no requerimento de inscrição serão de inteira responsabilidade do candidato.",
+    "A comissão organizadora poderá convocar o candidato para apresentar documentos complementares.",
+    "Os resultados serão divulgados no endereço eletrônico da banca organizadora na data prevista.",
+    "Não serão aceitos recursos interpostos por meio diverso do previsto no cronograma.",
+    "A aprovação no concurso assegura apenas a expectativa de direito à nomeação."
+]
+
+
+def notice_pages(pages, seed=42):
+    """
+    Texto de cada página de um edital sintético, com cabeçalho e rodapé repetidos em todas as páginas.
+    """
+    rng = random.Random(seed + pages)
+    roles = ROLES[:max(2, min(len(ROLES), pages // 10))]
+    syllabus_start = max(1, pages - max(2, pages // 4))
+
+    result = []
+    for page in range(pages):
+        lines = ["PREFEITURA MUNICIPAL DE EXEMPLO", "Secretaria Municipal de Administração"]
+
+        if page == 0:
+            lines += [
+                "EDITAL DE CONCURSO PÚBLICO Nº 01/2025",
+                "O Prefeito Municipal de Exemplo torna público a abertura de inscrições para o concurso público "
+                "destinado ao provimento de cargos efetivos do quadro de pessoal, nos termos deste edital.",
+                "1. DOS CARGOS",
+                "CARGO VAGAS ESCOLARIDADE"
+            ]
+            lines += [f"{role.title()} {rng.randint(1, 20)} Nível superior" for role in roles]
+            lines.append("2. DAS INSCRIÇÕES")
+        elif page == syllabus_start:
+            lines.append("ANEXO II - CONTEÚDOS PROGRAMÁTICOS")
+
+        if page >= syllabus_start:
+            role = roles[(page - syllabus_start) % len(roles)]
+            lines.append(f"CARGO: {role}")
+            lines.append("CONHECIMENTOS ESPECÍFICOS")
+            lines += rng.sample(TOPICS, 4)
+        else:
+            lines += [rng.choice(FILLER) for _ in range(rng.randint(10, 18))]
+
+        lines.append(f"Página {page + 1} de {pages}")
+        result.append("\n".join(lines) + "\n")
+
+    return result
+
+
+def notice_text(size):
+    return "".join(notice_pages(SIZES[size]))
+
+
+def notice_pdf(size, corpus_dir=None):
+    """
+    Caminho do PDF do edital sintético, gerado na primeira chamada (em DATA_DIR, por padrão).
+    """
+    if corpus_dir is None:
+        # Importado aqui para que o teste de carga possa definir DATA_DIR antes de config ser lido
+        import config
+        corpus_dir = os.path.join(config.DATA_DIR, "benchmarks", "corpus")
+
+    path = os.path.join(corpus_dir, f"edital_{size}.pdf")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    with fitz.open() as doc:
+        for page_text in notice_pages(SIZES[size]):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(40, 40, page.rect.width - 40, page.rect.height - 40), page_text, fontsize=9)
+        doc.save(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def roadmap_response(pages, seed=42):
+    """
+    Resposta do modelo (JSON, roadmap_data_schema) para um edital de `pages` páginas:
+    um módulo a cada 4 páginas (mínimo 3), com 7 lições cada e alguns campos vazios.
+    """
+    rng = random.Random(seed)
+    modules = []
+    for module_order in range(1, max(3, pages // 4) + 1):
+        lessons = [
+            {
+                "Title": f"Lição {lesson_order} do módulo {module_order}",
+                "Description": rng.choice(TOPICS) if lesson_order % 5 else "",
+                "Order": lesson_order
+            }
+            for lesson_order in range(1, 8)
+        ]
+        modules.append({
+            "Title": f"Módulo {module_order}: {rng.choice(TOPICS).split(':')[0]}",
+            "Description": rng.choice(TOPICS),
+            "Order": module_order,
+            "Lessons": lessons
+        })
+    return json.dumps({"Title": "Roadmap de estudos", "Description": rng.choice(FILLER), "Modules": modules},
+                      ensure_ascii=False)
+
+
+def questions_response(count, seed=42):
+    """
+    Resposta do modelo (JSON, questions_schema) com `count` questões de múltipla escolha.
+    """
+    rng = random.Random(seed)
+    questions = [
+        {
+            "Question": f"{rng.choice(FILLER)} Sobre {rng.choice(TOPICS).split(':')[0]}, é correto afirmar que?",
+            "OptionA": rng.choice(TOPICS),
+            "OptionB": rng.choice(TOPICS),
+            "OptionC": rng.choice(TOPICS),
+            "OptionD": rng.choice(TOPICS),
+            "CorrectOption": rng.choice("ABCD"),
+            "Order": order,
+            "Origin": "Lesson" if order % 2 else None
+        }
+        for order in range(1, count + 1)
+    ]
+    return json.dumps({"Questions": questions}, ensure_ascii=False)
@@ -0,0 +1,251 @@
+"""
+Servidor local que imita o endpoint /v1/chat/completions da OpenAI, com latência
+configurável e respostas fixas válidas para cada schema de models.py.
+
+Uso isolado:  python -m benchmarks.fake_openai --port 8089 --latency 0.3
+e depois      OPENAI_BASE_URL=http://127.0.0.1:8089/v1 gunicorn app:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from models import schemas_dict
+
+
+# Enunciados distintos entre si (o banco de questões descarta as quase iguais)
+QUESTION_STEMS = [
+    "Qual camada do modelo OSI é responsável pelo roteamento de pacotes entre redes distintas?",
+    "Em um banco de dados relacional, qual forma normal elimina dependências transitivas?",
+    "Segundo a Lei nº 14.133/2021, qual modalidade de licitação se aplica a serviços comuns?",
+    "Qual princípio da administração pública exige a divulgação oficial dos atos administrativos?",
+    "Na criptografia assimétrica, qual chave é utilizada para verificar uma assinatura digital?",
+    "Qual prática de métodos ágeis promove entregas incrementais em ciclos curtos e fixos?",
+    "Assinale a frase em que o uso do acento indicativo de crase está correto.",
+    "Se todo analista é técnico e nenhum técnico é gestor, qual conclusão é necessariamente válida?"
+]
+
+
+def _questions(count=5):
+    return [
+        {
+            "Question": QUESTION_STEMS[(order - 1) % len(QUESTION_STEMS)],
+            "OptionA": "Primeira alternativa",
+            "OptionB": "Segunda alternativa",
+            "OptionC": "Terceira alternativa",
+            "OptionD": "Quarta alternativa",
+            "CorrectOption": "ABCD"[order % 4],
+            "Order": order,
+            "Origin": "Lesson"
+        }
+        for order in range(1, count + 1)
+    ]
+
+
+def _job_roles():
+    return [
+        {"Name": "Analista de Tecnologia da Informação", "Description": "Atua no desenvolvimento e suporte de sistemas."},
+        {"Name": "Técnico em Informática", "Description": "Presta suporte técnico aos usuários."}
+    ]
+
+
+PAYLOADS = {
+    "exam_data_schema": {
+        "Notice": "EDITAL",
+        "NoticeTitle": "PREFEITURA MUNICIPAL DE EXEMPLO - EDITAL Nº 01/2025",
+        "NoticeDescription": "Concurso público para provimento de cargos efetivos.",
+        "JobRoles": _job_roles()
+    },
+    "roadmap_data_schema": {
+        "Title": "Roadmap de Estudos para Analista de TI",
+        "Description": "Roteiro de estudos baseado no conteúdo programático do edital.",
+        "Modules": [
+            {
+                "Title": f"Módulo {module}",
+                "Description": "Conteúdos do módulo organizados do básico ao avançado.",
+                "Order": module,
+                "Lessons": [
+                    {"Title": f"Lição {module}.{lesson}", "Description": "Tópicos da lição.", "Order": lesson}
+                    for lesson in range(1, 5)
+                ]
+            }
+            for module in range(1, 4)
+        ]
+    },
+    "roadmap_skeleton_schema": {
+        "Title": "Roadmap de Estudos para Analista de TI",
+        "Description": "Roteiro de estudos baseado no conteúdo programático do edital.",
+        "Modules": [
+            {"Title": f"Módulo {module}", "Description": "Conteúdos do módulo organizados do básico ao avançado.",
+             "Order": module}
+            for module in range(1, 4)
+        ]
+    },
+    "roadmap_module_lessons_schema": {
+        "Lessons": [
+            {"Title": f"Lição {lesson}", "Description": "Tópicos da lição.", "Order": lesson}
+            for lesson in range(1, 5)
+        ]
+    },
+    "questions_schema": {"Questions": _questions()},
+    "search_notice_schema": {
+        "Notices": [
+            {
+                "Notice": "EDITAL",
+                "NoticeTitle": "PREFEITURA MUNICIPAL DE EXEMPLO - EDITAL Nº 01/2025",
+                "NoticeDescription": "Concurso público para provimento de cargos efetivos.",
+                "Link": "https://example.com/edital.pdf",
+                "JobRoles": _job_roles()
+            }
+        ]
+    }
+}
+
+
+def payload_for(request_body):
+    """
+    Resposta fixa para o schema pedido em response_format (ou um JSON genérico).
+    """
+    schema = (request_body.get("response_format") or {}).get("json_schema", {}).get("schema")
+    for key, known_schema in schemas_dict.items():
+        if schema == known_schema:
+            if ":" not in key:
+                return PAYLOADS[key]
+            # Schemas parciais ("exam_data_schema:JobRoles") recebem só os campos pedidos
+            return {field: value for field, value in PAYLOADS[key.split(":")[0]].items()
+                    if field in known_schema["properties"]}
+    return {"result": "ok"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.count_request()
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        content = json.dumps(payload_for(body), ensure_ascii=False)
+        usage = {"prompt_tokens": server.prompt_tokens(body), "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        latency = server.sample_latency()
+
+        if not body.get("stream"):
+            time.sleep(latency)
+            self._send_json(200, {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "bench"),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content}
+                }],
+                "usage": usage
+            })
+            return
+
+        # Stream: a latência é distribuída entre os chunks
+        chunks = [content[start:start + server.chunk_chars] for start in range(0, len(content), server.chunk_chars)]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for text in chunks:
+            time.sleep(latency / len(chunks))
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "bench"),
+                "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "bench"),
+                "choices": [],
+                "usage": usage
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, jitter=0.0, chunk_chars=40):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_chars = chunk_chars
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def sample_latency(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    @staticmethod
+    def prompt_tokens(body):
+        return sum(len(message.get("content") or "") for message in body.get("messages", [])) // 4
+
+    def start(self):
+        """
+        Atende em uma thread daemon e devolve a base_url para OPENAI_BASE_URL.
+        """
+        threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True).start()
+        return self.base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso da API de chat completions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="latência por resposta, em segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="variação aleatória (±) da latência")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.jitter)
+    print(f"Servidor falso em {server.base_url} (latência {args.latency}s ± {args.jitter}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Teste de carga concorrente contra as rotas de routes.py.
+
+Por padrão sobe o servidor falso da OpenAI e a aplicação no próprio processo, com um
+DATA_DIR temporário. Com --url o alvo é um servidor já em execução (ex.: gunicorn com
+OPENAI_BASE_URL apontando para `python -m benchmarks.fake_openai`).
+
+    python -m benchmarks.load --requests 100 --concurrency 16
+    python -m benchmarks.load --routes generate_questions extract_roadmap_stream --save-baseline benchmarks/baseline_load.json
+    python -m benchmarks.load --baseline benchmarks/baseline_load.json
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmarks import corpus, results
+from benchmarks.fake_openai import FakeOpenAIServer
+
+ROLE = "ANALISTA DE TECNOLOGIA DA INFORMAÇÃO"
+BYPASS = {"X-Cache-Bypass": "1"}
+
+# Rotas que hoje sempre respondem 500 (funções auxiliares inexistentes / schema_key vazio):
+# só rodam quando pedidas em --routes
+OPT_IN_SCENARIOS = {"generate_roadmap_or_questions", "test"}
+
+
+def _subject(i):
+    return {"Title": f"Tema {i}", "Description": "Conteúdo do tema para o benchmark.", "AssessmentType": "Lesson"}
+
+
+def build_scenarios(state, use_cache):
+    """
+    Nome -> função(client, i) que faz uma requisição e devolve o status HTTP.
+    """
+    headers = {} if use_cache else BYPASS
+    notice = state["notice"]
+
+    def post(path, payload, extra_headers=None):
+        def run(client, i):
+            response = client.post(path, json=payload(i), headers=dict(headers, **(extra_headers or {})))
+            return response.status_code
+        return run
+
+    def get(path):
+        def run(client, i):
+            return client.get(path(i)).status_code
+        return run
+
+    def stream(path, payload):
+        def run(client, i):
+            with client.stream("POST", path, json=payload(i), headers=headers) as response:
+                for _ in response.iter_bytes():
+                    pass
+                return response.status_code
+        return run
+
+    def async_job(path, payload):
+        def run(client, i):
+            response = client.post(path, json=payload(i), headers=headers)
+            if response.status_code != 202:
+                return response.status_code
+            status_url = response.json()["status_url"]
+            while True:
+                job = client.get(status_url).json()
+                if job["status"] in ("done", "failed"):
+                    return job.get("status_code") or 500
+                time.sleep(0.05)
+        return run
+
+    def upload(client, i):
+        with open(state["pdf_path"], "rb") as file:
+            response = client.post("/upload_notice_pdf", files={"file": ("edital.pdf", file, "application/pdf")},
+                                   data={"echo_notice": "false"})
+        return response.status_code
+
+    def job_events(client, i):
+        with client.stream("GET", f"/jobs/{state['job_id']}/events") as response:
+            for _ in response.iter_bytes():
+                pass
+            return response.status_code
+
+    return {
+        "extract_notice_data": post("/extract_notice_data", lambda i: {"notice": notice, "echo_notice": False}),
+        "extract_notice_data_async": async_job("/extract_notice_data?async=1",
+                                               lambda i: {"notice_id": state["notice_id"], "echo_notice": False}),
+        "search_notice_index": post("/search_notice", lambda i: {"prompt": "prefeitura exemplo", "echo_notice": False}),
+        "search_notice_llm": post("/search_notice", lambda i: {"prompt": f"concurso inexistente {i}"}),
+        "extract_roadmap": post("/extract_roadmap", lambda i: {"notice_id": state["notice_id"], "selectedJobRole": ROLE}),
+        "extract_roadmap_stream": stream("/extract_roadmap?stream=1",
+                                         lambda i: {"notice_id": state["notice_id"], "selectedJobRole": ROLE}),
+        "extract_roadmap_two_phase": post("/extract_roadmap", lambda i: {"notice_id": state["notice_id"],
+                                                                        "selectedJobRole": ROLE, "mode": "two_phase"}),
+        "generate_questions": post("/generate_questions", lambda i: {"subject": _subject(i), "quantity": 5}),
+        "generate_questions_stream": stream("/generate_questions?stream=1",
+                                            lambda i: {"subject": _subject(i), "quantity": 5}),
+        "generate_questions_batch": post("/generate_questions_batch",
+                                         lambda i: {"subjects": [_subject(f"{i}.{n}") for n in range(8)]}),
+        "generate_roadmap_or_questions": post("/generate_roadmap_or_questions",
+                                              lambda i: {"notice_id": state["notice_id"], "selectedJobRole": ROLE}),
+        "upload_notice_pdf": upload,
+        "test": post("/test", lambda i: {"prompt": f"ping {i}"}),
+        "cache_stats": get(lambda i: "/cache_stats"),
+        "metrics": get(lambda i: "/metrics"),
+        "job_status": get(lambda i: f"/jobs/{state['job_id']}"),
+        "job_events": job_events,
+    }
+
+
+def prepare(client, corpus_size):
+    """
+    Cria os dados usados pelos cenários: um edital salvo (notice_id), o PDF e um job concluído.
+    """
+    notice = corpus.notice_text(corpus_size)
+    response = client.post("/extract_notice_data", json={"notice": notice, "echo_notice": False})
+    response.raise_for_status()
+    notice_id = response.json()["ExamDataView"]["NoticeId"]
+
+    response = client.post("/extract_notice_data?async=1", json={"notice_id": notice_id, "echo_notice": False})
+    job_id = response.json()["job_id"]
+    while client.get(f"/jobs/{job_id}").json()["status"] not in ("done", "failed"):
+        time.sleep(0.05)
+
+    return {"notice": notice, "notice_id": notice_id, "pdf_path": corpus.notice_pdf(corpus_size), "job_id": job_id}
+
+
+def run_scenario(client, scenario, requests_count, concurrency):
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            status = scenario(client, i)
+        except httpx.HTTPError:
+            status = 599
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if status >= 400:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests_count)))
+    wall = time.perf_counter() - started
+
+    summary = results.summarize(latencies)
+    summary["errors"] = sum(errors.values())
+    summary["error_statuses"] = errors
+    summary["rps"] = requests_count / wall if wall else 0.0
+    return summary
+
+
+def start_local_app(latency, jitter):
+    """
+    Sobe o servidor falso e a aplicação (werkzeug, multi-thread) neste processo e devolve a URL da aplicação.
+    """
+    fake = FakeOpenAIServer(latency=latency, jitter=jitter)
+    # As configurações são lidas no import: o ambiente precisa estar pronto antes de importar o app
+    os.environ["OPENAI_BASE_URL"] = fake.start()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    # Caches, stores e filas novos a cada execução, sem tocar nos dados do ambiente
+    os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="bench-")
+    os.environ.setdefault("RATE_LIMIT_RPM", "0")
+
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga das rotas da API")
+    parser.add_argument("--url", help="servidor já em execução; sem isso o app e o servidor falso sobem localmente")
+    parser.add_argument("--routes", nargs="+", help="cenários a executar (padrão: todos os que funcionam hoje)")
+    parser.add_argument("--requests", type=int, default=50, help="requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="latência do servidor falso, em segundos")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--corpus-size", choices=list(corpus.SIZES), default="medium")
+    parser.add_argument("--use-cache", action="store_true", help="não envia X-Cache-Bypass (mede acertos de cache)")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compara com uma baseline gravada antes")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora aceita antes de falhar (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    base_url = args.url or start_local_app(args.latency, args.jitter)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    with httpx.Client(base_url=base_url, timeout=120, limits=limits) as client:
+        state = prepare(client, args.corpus_size)
+        scenarios = build_scenarios(state, args.use_cache)
+
+        unknown = set(args.routes or []) - set(scenarios)
+        if unknown:
+            parser.error(f"cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+        measured = {}
+        for name, scenario in scenarios.items():
+            if args.routes and name not in args.routes:
+                continue
+            if not args.routes and name in OPT_IN_SCENARIOS:
+                continue
+            measured[name] = run_scenario(client, scenario, args.requests, args.concurrency)
+            summary = measured[name]
+            print(f"{name}: {summary['rps']:.1f} req/s, p95 {summary['p95_ms']:.1f} ms"
+                  + (f", erros {summary['error_statuses']}" if summary["errors"] else ""), file=sys.stderr)
+
+    print()
+    results.print_table(measured, ["count", "errors", "rps", "p50_ms", "p95_ms", "p99_ms"])
+
+    if args.save_baseline:
+        results.save(args.save_baseline, "load", measured, vars(args))
+        print(f"\nBaseline gravada em {args.save_baseline}")
+
+    if args.baseline:
+        regressions = results.compare(measured, results.load(args.baseline), args.tolerance,
+                                      metrics=("p50_ms", "p95_ms", "p99_ms", "rps"))
+        results.print_comparison(regressions, args.baseline)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Microbenchmarks das etapas locais do processamento de editais.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --sizes small medium --repeat 10 --save-baseline benchmarks/baseline_micro.json
+    python -m benchmarks.micro --baseline benchmarks/baseline_micro.json
+"""
+import argparse
+import json
+import re
+import sys
+import time
+
+import notice_index
+from json_pipeline import decode_response, encode
+from pdf_extraction import extract_pdf_text, extract_pdf_text_parallel, extract_role_syllabus
+from services import (
+    clean_pdf_text,
+    extract_data_from_pdf,
+    extract_programmatic_contents,
+    extract_text_from_pdf,
+    preprocess_notice,
+)
+from text_normalizer import normalize_pages
+from benchmarks import corpus, results
+
+ROLE = "ANALISTA DE TECNOLOGIA DA INFORMAÇÃO"
+
+
+def _cold(fn):
+    # O índice de seções é cacheado por hash do texto: limpa antes para medir a montagem
+    def run():
+        notice_index._index_cache.clear()
+        return fn()
+    return run
+
+
+def _legacy_programmatic_contents(text):
+    # extract_programmatic_contents antes do índice de seções, para comparação
+    for pattern in (r"CONTEÚDOS PROGRAMÁTICOS(.*)", r"PROGRAMA DA PROVA(.*)",
+                    r"CONHECIMENTOS ESPECÍFICOS(.*)", r"CONHECIMENTOS BÁSICOS(.*)"):
+        m = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        if m:
+            return m.group(1).strip()
+    return None
+
+
+def _legacy_clean(data):
+    # Limpeza recursiva usada antes de json_pipeline, para comparação
+    if isinstance(data, dict):
+        return {key: _legacy_clean(value) for key, value in data.items() if value not in [None, "", {}, []]}
+    if isinstance(data, list):
+        return [_legacy_clean(item) for item in data if item not in [None, "", {}, []]]
+    return data
+
+
+def _legacy_decode(raw_content):
+    return _legacy_clean(json.loads(raw_content.replace("'", "\"")))
+
+
+def _legacy_encode(obj):
+    # Equivalente ao jsonify padrão do Flask
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def cases(size):
+    raw_pages = corpus.notice_pages(corpus.SIZES[size])
+    raw_text = "".join(raw_pages)
+    cleaned = clean_pdf_text(raw_text)
+    pdf_path = corpus.notice_pdf(size)
+    # Respostas do modelo proporcionais ao edital: roadmap com um módulo a cada 4 páginas, uma questão por página
+    roadmap_raw = corpus.roadmap_response(corpus.SIZES[size])
+    questions_raw = corpus.questions_response(corpus.SIZES[size])
+    roadmap = decode_response(roadmap_raw, "roadmap_data_schema")
+
+    return {
+        "clean_pdf_text": lambda: clean_pdf_text(raw_text),
+        "normalize_pages": lambda: normalize_pages(raw_pages),
+        "preprocess_notice": _cold(lambda: preprocess_notice(cleaned, ROLE)),
+        "preprocess_notice_warm": lambda: preprocess_notice(cleaned, ROLE),
+        "extract_programmatic_contents_legacy": lambda: _legacy_programmatic_contents(cleaned),
+        "extract_programmatic_contents": _cold(lambda: extract_programmatic_contents(cleaned)),
+        "extract_programmatic_contents_warm": lambda: extract_programmatic_contents(cleaned),
+        "extract_text_from_pdf": lambda: extract_text_from_pdf(pdf_path),
+        "extract_data_from_pdf": lambda: extract_data_from_pdf(pdf_path),
+        "extract_pdf_text": lambda: extract_pdf_text(pdf_path),
+        "extract_pdf_text_parallel": lambda: extract_pdf_text_parallel(pdf_path),
+        "extract_role_syllabus": lambda: extract_role_syllabus(pdf_path, ROLE),
+        "decode_roadmap_legacy": lambda: _legacy_decode(roadmap_raw),
+        "decode_roadmap": lambda: decode_response(roadmap_raw, "roadmap_data_schema"),
+        "decode_questions_legacy": lambda: _legacy_decode(questions_raw),
+        "decode_questions": lambda: decode_response(questions_raw, "questions_schema"),
+        "encode_roadmap_legacy": lambda: _legacy_encode(roadmap),
+        "encode_roadmap": lambda: encode(roadmap),
+    }
+
+
+def measure(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks do processamento de editais")
+    parser.add_argument("--sizes", nargs="+", choices=list(corpus.SIZES), default=list(corpus.SIZES))
+    parser.add_argument("--only", nargs="+", help="executa apenas os casos com estes nomes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compara com uma baseline gravada antes")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora aceita antes de falhar (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    measured = {}
+    for size in args.sizes:
+        for name, fn in cases(size).items():
+            if args.only and name not in args.only:
+                continue
+            measured[f"{name}[{size}]"] = results.summarize(measure(fn, args.repeat))
+
+    results.print_table(measured, ["mean_ms", "p50_ms", "p95_ms"])
+
+    if args.save_baseline:
+        results.save(args.save_baseline, "micro", measured, vars(args))
+        print(f"\nBaseline gravada em {args.save_baseline}")
+
+    if args.baseline:
+        regressions = results.compare(measured, results.load(args.baseline), args.tolerance)
+        results.print_comparison(regressions, args.baseline)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
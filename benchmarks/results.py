@@ -0,0 +1,95 @@
+"""
+Percentis, gravação de baseline e comparação de resultados dos benchmarks.
+"""
+import json
+import os
+import platform
+import time
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    # Interpolação linear entre as amostras vizinhas
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """
+    Resumo, em milissegundos, de uma lista de durações em segundos.
+    """
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000
+    }
+
+
+def save(path, kind, results, settings):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "kind": kind,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "settings": settings,
+            "results": results
+        }, file, ensure_ascii=False, indent=2)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(results, baseline, tolerance, metrics=("p50_ms", "p95_ms")):
+    """
+    Lista (nome, métrica, baseline, atual, variação) das piores que a baseline além da tolerância.
+    Para "rps" (vazão) maior é melhor; para as demais, menor é melhor.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for metric in metrics:
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change < -tolerance if metric == "rps" else change > tolerance
+            if worse:
+                regressions.append((name, metric, before, after, change))
+    return regressions
+
+
+def print_table(results, columns):
+    width = max((len(name) for name in results), default=10) + 2
+    print("".ljust(width) + "".join(column.rjust(12) for column in columns))
+    for name, row in results.items():
+        print(name.ljust(width) + "".join(_format(row.get(column)).rjust(12) for column in columns))
+
+
+def print_comparison(regressions, baseline_path):
+    if not regressions:
+        print(f"\nSem regressões em relação a {baseline_path}.")
+        return
+
+    print(f"\nRegressões em relação a {baseline_path}:")
+    for name, metric, before, after, change in regressions:
+        print(f"  {name} {metric}: {before:.2f} -> {after:.2f} ({change:+.0%})")
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
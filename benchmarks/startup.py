@@ -0,0 +1,189 @@
+"""
+Tempo de inicialização da aplicação: import de cada módulo (`python -X importtime`) e tempo até
+a primeira resposta de um servidor recém-iniciado, como em um restart ou scale-up de dyno.
+
+Cada medição sobe um processo novo, com DATA_DIR temporário e OPENAI_BASE_URL apontando para o
+servidor falso. "first_response" vai do início do processo à primeira resposta de /cache_stats;
+"first_model_response" é a primeira chamada a /generate_questions logo depois.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --server gunicorn --repeat 5 --top 40
+    python -m benchmarks.startup --save-baseline benchmarks/baseline_startup.json
+    python -m benchmarks.startup --baseline benchmarks/baseline_startup.json
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks import results
+from benchmarks.fake_openai import FakeOpenAIServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_APP = "import time; started = time.perf_counter(); import app; print(time.perf_counter() - started)"
+# Mesmo app do gunicorn, no servidor do werkzeug (sem debug/reloader)
+FLASK_SERVER = "import sys; from app import app; app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"
+
+
+def _environment(base_url):
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": env.get("OPENAI_API_KEY", "benchmark"),
+        "RATE_LIMIT_RPM": "0",
+        "DATA_DIR": tempfile.mkdtemp(prefix="bench-startup-"),
+        "PYTHONPATH": ROOT
+    })
+    return env
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_profile(env):
+    """
+    [(módulo, profundidade, próprio_ms, acumulado_ms)] do import de app, na ordem do -X importtime.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    profile = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            # Linha de cabeçalho
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        profile.append((name.strip(), depth, int(own) / 1000, int(cumulative) / 1000))
+    return profile
+
+
+def print_profile(profile, top):
+    print(f"Import de app: {next((row[3] for row in profile if row[0] == 'app'), 0.0):.1f} ms\n")
+
+    print(f"Módulos mais lentos (acumulado, top {top}):")
+    for name, depth, own, cumulative in sorted(profile, key=lambda row: row[3], reverse=True)[:top]:
+        print(f"  {cumulative:9.1f} ms  {own:8.1f} ms  {'  ' * (depth - 1)}{name}")
+
+    # Tempo próprio somado por pacote de primeiro nível
+    packages = defaultdict(float)
+    for name, _, own, _ in profile:
+        packages[name.split(".")[0]] += own
+    print("\nPor pacote (tempo próprio somado):")
+    for package, own in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top // 2]:
+        print(f"  {own:9.1f} ms  {package}")
+
+
+def measure_import(env):
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def _server_command(server, port):
+    if server == "gunicorn":
+        return ["gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "app:app"]
+    return [sys.executable, "-c", FLASK_SERVER, str(port)]
+
+
+def measure_first_response(server, env, timeout):
+    """
+    (segundos até a primeira resposta, segundos da primeira chamada que usa o modelo) de um servidor novo.
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        _server_command(server, port), cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"o servidor ({server}) terminou com código {process.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"o servidor ({server}) não respondeu em {timeout} s")
+                try:
+                    if client.get(f"{url}/cache_stats").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            first_response = time.perf_counter() - started
+
+            model_started = time.perf_counter()
+            response = client.post(f"{url}/generate_questions", json={
+                "subject": {"Title": "Redes", "Description": "Modelo OSI e TCP/IP", "AssessmentType": "Lesson"},
+                "quantity": 5
+            })
+            response.raise_for_status()
+            first_model_response = time.perf_counter() - model_started
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    return first_response, first_model_response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import e de primeira resposta da aplicação")
+    parser.add_argument("--server", choices=["flask", "gunicorn"],
+                        default="gunicorn" if shutil.which("gunicorn") else "flask")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=25, help="módulos listados no perfil de import")
+    parser.add_argument("--no-profile", action="store_true", help="não lista o import de cada módulo")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compara com uma baseline gravada antes")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora aceita antes de falhar (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # Respostas imediatas: mede a inicialização, não a latência do modelo
+    base_url = FakeOpenAIServer(latency=0.0).start()
+
+    if not args.no_profile:
+        print_profile(import_profile(_environment(base_url)), args.top)
+        print()
+
+    samples = defaultdict(list)
+    for _ in range(args.repeat):
+        samples["import_app"].append(measure_import(_environment(base_url)))
+        first_response, first_model_response = measure_first_response(
+            args.server, _environment(base_url), args.timeout
+        )
+        samples[f"first_response[{args.server}]"].append(first_response)
+        samples[f"first_model_response[{args.server}]"].append(first_model_response)
+
+    summary = {name: results.summarize(values) for name, values in samples.items()}
+    results.print_table(summary, ["mean_ms", "p50_ms", "p95_ms"])
+
+    settings = {"server": args.server, "repeat": args.repeat}
+    if args.save_baseline:
+        results.save(args.save_baseline, "startup", summary, settings)
+        print(f"\nBaseline gravada em {args.save_baseline}")
+
+    if args.baseline:
+        regressions = results.compare(summary, results.load(args.baseline), args.tolerance)
+        results.print_comparison(regressions, args.baseline)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
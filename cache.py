@@ -0,0 +1,211 @@
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+import zstandard
+
+import config
+
+
+class LRUCache:
+    """
+    Camada em memória (por worker) com limite de tamanho e expiração por TTL.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    Camada em disco (SQLite + zstandard) compartilhada por todos os workers da máquina.
+    Com ttl=None as entradas nunca expiram (uso como store persistente).
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._compress_lock = threading.Lock()
+
+    def _connection(self):
+        # Uma conexão por thread e por processo (o gunicorn faz fork dos workers)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            with conn:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+
+        return self._decompressor.decompress(value).decode("utf-8")
+
+    def contains(self, key):
+        row = self._connection().execute("SELECT expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and (row[0] is None or row[0] >= time.time())
+
+    def set(self, key, value):
+        with self._compress_lock:
+            compressed = self._compressor.compress(value.encode("utf-8"))
+
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, compressed, expires_at)
+            )
+
+        self._writes += 1
+        if self.ttl is not None and self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+
+
+class CompletionCache:
+    """
+    Cache endereçado por conteúdo para os resultados de generate_completion.
+
+    Os valores são guardados como texto JSON, então cada leitura devolve uma cópia
+    nova que pode ser alterada pelas rotas sem afetar o cache.
+    """
+
+    def __init__(self, path, max_size, ttl):
+        self.memory = LRUCache(max_size, ttl)
+        self.disk = DiskCache(path, ttl)
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "writes": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model, instructions, prompt, schema_key):
+        # Espaços em branco são normalizados: prompts que diferem só na indentação compartilham a entrada
+        payload = json.dumps(
+            [model, " ".join(instructions.split()), " ".join(prompt.split()), schema_key],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get(self, key, record=True):
+        value = self.memory.get(key)
+        if value is not None:
+            if record:
+                self._count("memory_hits")
+            return orjson.loads(value)
+
+        value = self.disk.get(key)
+        if value is not None:
+            if record:
+                self._count("disk_hits")
+            self.memory.set(key, value)
+            return orjson.loads(value)
+
+        if record:
+            self._count("misses")
+        return None
+
+    def set(self, key, result):
+        value = orjson.dumps(result).decode()
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+        self._count("writes")
+
+    def record_bypass(self):
+        self._count("bypassed")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["pid"] = os.getpid()
+        return stats
+
+
+completion_cache = CompletionCache(
+    config.COMPLETION_CACHE_PATH,
+    config.COMPLETION_CACHE_SIZE,
+    config.COMPLETION_CACHE_TTL
+)
+
+# Definido por requisição (header X-Cache-Bypass) nas rotas
+_bypass = contextvars.ContextVar("cache_bypass", default=False)
+
+
+def set_bypass(enabled):
+    _bypass.set(bool(enabled))
+
+
+def is_bypassed():
+    return _bypass.get()
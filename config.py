@@ -0,0 +1,143 @@
+import os
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+# === Gateway do modelo (llm_gateway.py) ===
+# Aponte OPENAI_BASE_URL para um servidor local para testes de carga sem a API real
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", "120"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "0.5"))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "20"))
+OPENAI_MAX_IN_FLIGHT = int(os.getenv("OPENAI_MAX_IN_FLIGHT", "8"))
+# Novas tentativas quando a resposta não valida contra o schema de models.py
+SCHEMA_VALIDATION_RETRIES = int(os.getenv("SCHEMA_VALIDATION_RETRIES", "1"))
+
+# Diretório compartilhado entre os workers do gunicorn (caches, stores, filas)
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(tempfile.gettempdir(), "projeto-integrador-ia"))
+
+# Timeout dos workers sync do gunicorn (gunicorn.conf.py): o worker parado por mais tempo numa
+# requisição é encerrado (SIGKILL) e o cliente perde a conexão
+WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", "30"))
+
+# === Limites de uso do provedor (rate_limiter.py), compartilhados entre os workers ===
+# RATE_LIMIT_RPM=0 ou RATE_LIMIT_TPM=0 desliga o agendador
+RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", "500"))
+RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", "200000"))
+RATE_LIMIT_BULK_RESERVE = float(os.getenv("RATE_LIMIT_BULK_RESERVE", "0.25"))
+# As esperas ficam 10 s abaixo de WORKER_TIMEOUT: sem capacidade, a rota responde 503 + Retry-After
+# antes de o worker ser encerrado no meio da espera
+RATE_LIMIT_MAX_WAIT_INTERACTIVE = min(float(os.getenv("RATE_LIMIT_MAX_WAIT_INTERACTIVE", "15")), WORKER_TIMEOUT - 10)
+RATE_LIMIT_MAX_WAIT_BULK = min(float(os.getenv("RATE_LIMIT_MAX_WAIT_BULK", "20")), WORKER_TIMEOUT - 10)
+RATE_LIMIT_COMPLETION_TOKENS = int(os.getenv("RATE_LIMIT_COMPLETION_TOKENS", "2000"))
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", os.path.join(DATA_DIR, "rate_limits.sqlite3"))
+
+# === Cache de respostas do modelo ===
+COMPLETION_CACHE_PATH = os.getenv("COMPLETION_CACHE_PATH", os.path.join(DATA_DIR, "completion_cache.sqlite3"))
+COMPLETION_CACHE_SIZE = int(os.getenv("COMPLETION_CACHE_SIZE", "256"))
+COMPLETION_CACHE_TTL = int(os.getenv("COMPLETION_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_BYPASS_HEADER = "X-Cache-Bypass"
+
+# === Cache por similaridade (near_cache.py) ===
+# Prompts quase iguais (espaços, ruído de OCR, variações de redação) reaproveitam a resposta já gerada
+NEAR_CACHE_ENABLED = os.getenv("NEAR_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+NEAR_CACHE_THRESHOLD = float(os.getenv("NEAR_CACHE_THRESHOLD", "0.99"))
+# Jaccard mínimo das n-grams (e razão mínima de comprimento) na confirmação do candidato
+NEAR_CACHE_JACCARD = float(os.getenv("NEAR_CACHE_JACCARD", "0.9"))
+NEAR_CACHE_SIZE = int(os.getenv("NEAR_CACHE_SIZE", "1024"))
+NEAR_CACHE_DIM = int(os.getenv("NEAR_CACHE_DIM", "4096"))
+NEAR_CACHE_NGRAM = int(os.getenv("NEAR_CACHE_NGRAM", "3"))
+
+# === Coalescência de chamadas idênticas (singleflight.py) ===
+SINGLEFLIGHT_LOCK_DIR = os.getenv("SINGLEFLIGHT_LOCK_DIR", os.path.join(DATA_DIR, "locks"))
+SINGLEFLIGHT_LOCK_TIMEOUT = float(os.getenv("SINGLEFLIGHT_LOCK_TIMEOUT", str(OPENAI_READ_TIMEOUT + 10)))
+
+# === Extração de PDFs (pdf_extraction.py) ===
+PDF_PARALLEL_THRESHOLD = int(os.getenv("PDF_PARALLEL_THRESHOLD", "80"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Páginas por faixa na leitura incremental do PDF (extração do conteúdo de uma vaga)
+PDF_SCAN_CHUNK_PAGES = int(os.getenv("PDF_SCAN_CHUNK_PAGES", "16"))
+PDF_MAX_UPLOAD_BYTES = int(os.getenv("PDF_MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "1500"))
+# Uploads acima deste tamanho são lidos via mmap do arquivo temporário do Werkzeug
+PDF_MMAP_THRESHOLD = int(os.getenv("PDF_MMAP_THRESHOLD", str(4 * 1024 * 1024)))
+PDF_TEXT_STORE_PATH = os.getenv("PDF_TEXT_STORE_PATH", os.path.join(DATA_DIR, "pdf_texts.sqlite3"))
+
+# === Normalização do texto dos editais (text_normalizer.py) ===
+# Linhas do topo/rodapé presentes em pelo menos essa fração das páginas são descartadas
+NORMALIZER_REPEAT_RATIO = float(os.getenv("NORMALIZER_REPEAT_RATIO", "0.6"))
+NORMALIZER_WARMUP_PAGES = int(os.getenv("NORMALIZER_WARMUP_PAGES", "8"))
+
+# === Store de editais (notice_store.py) ===
+NOTICE_STORE_PATH = os.getenv("NOTICE_STORE_PATH", os.path.join(DATA_DIR, "notices.sqlite3"))
+
+# Extração de título/descrição/vagas por regras antes de chamar o modelo (notice_rules.py)
+NOTICE_RULES_ENABLED = os.getenv("NOTICE_RULES_ENABLED", "true").lower() in ("1", "true", "yes")
+# Confiança mínima (0 a 1) para um campo extraído por regras dispensar o modelo
+NOTICE_RULES_MIN_CONFIDENCE = float(os.getenv("NOTICE_RULES_MIN_CONFIDENCE", "0.9"))
+
+# === Índice de seções do edital (notice_index.py) ===
+NOTICE_INDEX_CACHE_SIZE = int(os.getenv("NOTICE_INDEX_CACHE_SIZE", "64"))
+NOTICE_INDEX_CACHE_TTL = int(os.getenv("NOTICE_INDEX_CACHE_TTL", "3600"))
+
+# === Fila de jobs assíncronos (jobs.py) ===
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "600"))
+JOB_TTL = int(os.getenv("JOB_TTL", str(24 * 3600)))
+# Duração máxima de uma conexão de /jobs/<id>/events; o EventSource reconecta sozinho depois disso.
+# Mantém cada stream abaixo do timeout dos workers sync do gunicorn (WORKER_TIMEOUT)
+JOB_EVENTS_TIMEOUT = min(float(os.getenv("JOB_EVENTS_TIMEOUT", "25")), WORKER_TIMEOUT - 5)
+
+# === Geração de questões em lote ===
+QUESTIONS_BATCH_CONCURRENCY = int(os.getenv("QUESTIONS_BATCH_CONCURRENCY", "4"))
+QUESTIONS_BATCH_MAX_SUBJECTS = int(os.getenv("QUESTIONS_BATCH_MAX_SUBJECTS", "50"))
+
+# === Questões pré-geradas após o roadmap (question_prefetch.py) ===
+# Desligado por padrão; também pode ser pedido por requisição com "prefetchQuestions": true
+QUESTIONS_PREFETCH_ENABLED = os.getenv("QUESTIONS_PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+QUESTIONS_PREFETCH_MAX_PER_ROADMAP = int(os.getenv("QUESTIONS_PREFETCH_MAX_PER_ROADMAP", "20"))
+QUESTIONS_PREFETCH_QUANTITY = int(os.getenv("QUESTIONS_PREFETCH_QUANTITY", "5"))
+QUESTIONS_PREFETCH_PATH = os.getenv("QUESTIONS_PREFETCH_PATH", os.path.join(DATA_DIR, "questions_prefetch.sqlite3"))
+
+# === Banco de questões (question_bank.py) ===
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() in ("1", "true", "yes")
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", os.path.join(DATA_DIR, "question_bank.sqlite3"))
+# Jaccard estimado (MinHash) a partir do qual duas questões do mesmo tema são consideradas a mesma
+QUESTION_BANK_DUP_THRESHOLD = float(os.getenv("QUESTION_BANK_DUP_THRESHOLD", "0.6"))
+QUESTION_BANK_NUM_PERM = int(os.getenv("QUESTION_BANK_NUM_PERM", "64"))
+QUESTION_BANK_BANDS = int(os.getenv("QUESTION_BANK_BANDS", "16"))
+QUESTION_BANK_SHINGLE = int(os.getenv("QUESTION_BANK_SHINGLE", "5"))
+# Enunciados já guardados enviados no prompt para o modelo não repeti-los
+QUESTION_BANK_AVOID_IN_PROMPT = int(os.getenv("QUESTION_BANK_AVOID_IN_PROMPT", "20"))
+
+# === Carga em lote de PDFs (ingest.py) ===
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(PDF_WORKERS)))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+
+# === Geração do roadmap ===
+# "single": uma chamada com o roadmap inteiro; "two_phase": módulos primeiro e depois as lições de cada módulo em paralelo
+ROADMAP_MODE = os.getenv("ROADMAP_MODE", "single")
+ROADMAP_MODULE_CONCURRENCY = int(os.getenv("ROADMAP_MODULE_CONCURRENCY", "3"))
+ROADMAP_MODULE_TOKEN_BUDGET = int(os.getenv("ROADMAP_MODULE_TOKEN_BUDGET", "3000"))
+
+# === Seleção de trechos relevantes do edital (relevance.py) ===
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+PROMPT_CHUNK_CHARS = int(os.getenv("PROMPT_CHUNK_CHARS", "1500"))
+
+# === Índice de busca de editais (search_index.py) ===
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(DATA_DIR, "search_index.sqlite3"))
+SEARCH_RESULTS_LIMIT = int(os.getenv("SEARCH_RESULTS_LIMIT", "3"))
+
+# === Métricas e Server-Timing (metrics.py) ===
+METRICS_PATH = os.getenv("METRICS_PATH", os.path.join(DATA_DIR, "metrics.sqlite3"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
@@ -0,0 +1,32 @@
+"""
+Configuração do gunicorn (Procfile: `gunicorn -c gunicorn.conf.py app:app`).
+
+O app é importado uma vez no processo principal, antes do fork: os workers herdam os módulos
+já carregados e as regex e validadores já compilados (copy-on-write), em vez de cada worker
+repetir o import na primeira requisição. No Heroku, PORT e WEB_CONCURRENCY definem bind e workers.
+"""
+import os
+
+from config import WORKER_TIMEOUT
+
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Explícito porque as esperas do limitador e do SSE são derivadas dele (ver config.py)
+timeout = WORKER_TIMEOUT
+
+
+def when_ready(server):
+    # Processo principal, com o app já importado (preload_app) e antes de criar os workers
+    from app import warm_up
+    warm_up()
+
+
+def post_fork(server, worker):
+    # Cliente HTTP com pool de conexões de cada worker, criado antes da primeira chamada ao modelo
+    from llm_gateway import gateway
+    gateway.client.chat.completions
+
+    # Threads da fila de jobs: jobs enfileirados por outro worker ou antes de um restart são executados
+    # sem esperar o primeiro submit deste worker
+    from jobs import job_queue
+    job_queue.ensure_workers()
@@ -0,0 +1,224 @@
+"""
+Carga em lote de editais em PDF, sem passar pela API.
+
+Percorre um diretório, extrai e normaliza o texto dos PDFs em um pool de processos
+(gravando no mesmo store usado por /upload_notice_pdf), extrai os dados de cada edital
+com concorrência limitada e grava um resultado por linha em JSONL. O próprio arquivo de
+saída é o checkpoint: ao rodar de novo, os PDFs já concluídos com sucesso são pulados.
+
+    python ingest.py editais/ --output editais.jsonl
+    python ingest.py editais/ --output editais.jsonl --concurrency 8 --text-only
+"""
+import argparse
+import contextvars
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import config
+from notice_store import load_notice
+from pdf_extraction import PdfUploadError, extract_upload_text, open_pdf
+from rate_limiter import BULK, RateLimitExceeded, set_priority
+from search_index import notice_search_index
+from services import extract_notice_data
+
+
+def find_pdfs(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths += [os.path.join(root, name) for name in files if name.lower().endswith(".pdf")]
+    return sorted(paths)
+
+
+def load_checkpoint(output_path, text_only):
+    """
+    Caminhos (relativos ao diretório de entrada) já concluídos com sucesso em execuções anteriores.
+    Arquivos gravados só com --text-only ainda passam pela extração de dados numa execução completa.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Última linha incompleta de uma execução interrompida
+                continue
+            if record.get("status") == "ok" and (text_only or record.get("stage") == "data"):
+                done.add(record["path"])
+    return done
+
+
+def _init_worker():
+    # Cada arquivo já ocupa um processo: sem pool aninhado para as páginas
+    config.PDF_WORKERS = 1
+
+
+def extract_file(path):
+    """
+    Executado no pool de processos: texto normalizado de um PDF, gravado no store de editais
+    e no índice de busca (como em /upload_notice_pdf).
+    Devolve só metadados; o texto é lido do store pelo processo principal.
+    """
+    started = time.perf_counter()
+    with open(path, "rb") as file:
+        data = file.read()
+
+    with open_pdf(data) as doc:
+        page_count = doc.page_count
+    digest, notice_id, text, from_store, normalization = extract_upload_text(data)
+    notice_search_index.index_notice_text(notice_id, text)
+
+    return {
+        "sha256": digest,
+        "notice_id": notice_id,
+        "pages": page_count,
+        "bytes": len(data),
+        "cached": from_store,
+        "normalization": normalization,
+        "extract_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def extract_data(notice_id):
+    # Chamadas ao modelo da carga em lote não competem com as rotas interativas
+    set_priority(BULK)
+    notice = load_notice(notice_id)
+
+    started = time.perf_counter()
+    result = extract_notice_data(notice)
+    if "error" not in result["ExamDataView"]:
+        notice_search_index.index_notice(notice_id, result["ExamDataView"], source="ingest")
+
+    result["ExamDataView"]["NoticeId"] = notice_id
+    result["extract_data_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+class Ingestion:
+    def __init__(self, directory, output_path, workers, concurrency, text_only):
+        self.directory = directory
+        self.output_path = output_path
+        self.workers = workers
+        self.concurrency = concurrency
+        self.text_only = text_only
+        self.totals = {"files": 0, "ok": 0, "failed": 0, "skipped": 0, "pages": 0, "bytes": 0, "cached": 0}
+
+    def _write(self, output, record):
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Cada linha vai para o disco ao ficar pronta: é o checkpoint da próxima execução
+        output.flush()
+
+        self.totals["files"] += 1
+        self.totals["ok" if record["status"] == "ok" else "failed"] += 1
+        self.totals["pages"] += record.get("pages", 0)
+        self.totals["bytes"] += record.get("bytes", 0)
+        self.totals["cached"] += bool(record.get("cached"))
+
+    def _finish(self, output, future, record):
+        try:
+            result = future.result()
+        except RateLimitExceeded as e:
+            record.update(status="error", error=f"{e} (retry_after={e.retry_after}s)")
+        except Exception as e:
+            record.update(status="error", error=str(e))
+        else:
+            failed = "error" in result["ExamDataView"]
+            record.update(result, status="error" if failed else "ok", stage="data")
+        self._write(output, record)
+
+    def run(self):
+        paths = find_pdfs(self.directory)
+        done = load_checkpoint(self.output_path, self.text_only)
+        pending = [path for path in paths if os.path.relpath(path, self.directory) not in done]
+        self.totals["skipped"] = len(paths) - len(pending)
+
+        print(f"{len(paths)} PDFs encontrados, {self.totals['skipped']} já concluídos, {len(pending)} a processar",
+              file=sys.stderr)
+
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        started = time.perf_counter()
+
+        with open(self.output_path, "a", encoding="utf-8") as output, \
+                ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as processes, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as threads:
+            try:
+                self._process(output, processes, threads, pending)
+            except KeyboardInterrupt:
+                # O que já foi gravado fica no checkpoint; o restante é retomado na próxima execução
+                processes.shutdown(wait=False, cancel_futures=True)
+                threads.shutdown(wait=False, cancel_futures=True)
+                self.print_summary(time.perf_counter() - started)
+                sys.exit(130)
+
+        self.print_summary(time.perf_counter() - started)
+
+    def _process(self, output, processes, threads, pending):
+        extracting = {processes.submit(extract_file, path): path for path in pending}
+        extracting_data = {}
+
+        while extracting or extracting_data:
+            finished, _ = wait(list(extracting) + list(extracting_data), return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                if future in extracting_data:
+                    self._finish(output, future, extracting_data.pop(future))
+                    continue
+
+                record = {"path": os.path.relpath(extracting.pop(future), self.directory)}
+                try:
+                    record.update(future.result())
+                except PdfUploadError as e:
+                    self._write(output, dict(record, status="error", error=str(e)))
+                    continue
+                except Exception as e:
+                    self._write(output, dict(record, status="error", error=f"PDF inválido: {e}"))
+                    continue
+
+                if self.text_only:
+                    self._write(output, dict(record, status="ok", stage="text"))
+                    continue
+
+                # O texto de um PDF segue para a extração de dados assim que fica pronto
+                data_future = threads.submit(contextvars.copy_context().run, extract_data, record["notice_id"])
+                extracting_data[data_future] = record
+
+    def print_summary(self, elapsed):
+        totals = self.totals
+
+        def rate(value):
+            return value / elapsed if elapsed else 0.0
+
+        print(
+            f"\n{totals['ok']} ok, {totals['failed']} com erro, {totals['skipped']} pulados (checkpoint), "
+            f"{totals['cached']} já estavam no store\n"
+            f"{elapsed:.1f} s: {rate(totals['files']):.2f} PDFs/s, {rate(totals['pages']):.1f} páginas/s, "
+            f"{rate(totals['bytes']) / 1024 / 1024:.2f} MB/s\n"
+            f"Resultados em {self.output_path}",
+            file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga em lote de editais em PDF")
+    parser.add_argument("directory", help="diretório com os PDFs (percorrido recursivamente)")
+    parser.add_argument("--output", default="ingest.jsonl", help="arquivo JSONL de resultados e checkpoint")
+    parser.add_argument("--workers", type=int, default=config.INGEST_WORKERS,
+                        help="processos para extrair o texto dos PDFs")
+    parser.add_argument("--concurrency", type=int, default=config.INGEST_CONCURRENCY,
+                        help="extrações de dados do edital em paralelo")
+    parser.add_argument("--text-only", action="store_true", help="só extrai e grava o texto, sem chamar o modelo")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"diretório não encontrado: {args.directory}")
+
+    Ingestion(args.directory, args.output, args.workers, args.concurrency, args.text_only).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+import config
+from cache import set_bypass
+from metrics import start_request
+
+
+class JobQueue:
+    """
+    Fila de jobs em SQLite compartilhada pelos workers do gunicorn.
+
+    Cada worker mantém algumas threads que retiram jobs da fila, executam o handler
+    registrado para o tipo do job e gravam o resultado para consulta posterior.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path, workers, poll_interval, stale_after, ttl):
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.ttl = ttl
+        self._handlers = {}
+        self._local = threading.local()
+        self._workers_pid = None
+        self._workers_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+                "bypass_cache INTEGER NOT NULL DEFAULT 0, priority INTEGER NOT NULL DEFAULT 0, "
+                "status TEXT NOT NULL, status_code INTEGER, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created_at)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def register(self, kind, handler):
+        """
+        Registra o handler de um tipo de job. O handler recebe o payload e devolve (corpo, status HTTP).
+        """
+        self._handlers[kind] = handler
+
+    def submit(self, kind, payload, bypass_cache=False, priority=0):
+        if kind not in self._handlers:
+            raise ValueError(f"Tipo de job desconhecido: {kind}")
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (id, kind, payload, bypass_cache, priority, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload, ensure_ascii=False), int(bypass_cache), priority,
+             self.QUEUED, now, now)
+        )
+
+        self.ensure_workers()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+        if row["status"] in (self.DONE, self.FAILED):
+            job["status_code"] = row["status_code"]
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+            job["error"] = row["error"]
+        return job
+
+    def ensure_workers(self):
+        # As threads são criadas por processo, depois do fork dos workers do gunicorn (post_fork em
+        # gunicorn.conf.py); submit também chama, para scripts e o servidor de desenvolvimento
+        if self._workers_pid == os.getpid():
+            return
+
+        with self._workers_lock:
+            if self._workers_pid == os.getpid():
+                return
+            for number in range(self.workers):
+                threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True).start()
+            self._workers_pid = os.getpid()
+
+    def _claim(self):
+        conn = self._connection()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs presos em "running" (worker reiniciado no meio da execução) voltam para a fila
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                (self.QUEUED, now, self.RUNNING, now - self.stale_after)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1",
+                (self.QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                    (self.RUNNING, now, row["id"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return row
+
+    def _finish(self, job_id, status, status_code, result=None, error=None):
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, status_code = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, status_code, json.dumps(result, ensure_ascii=False) if result is not None else None,
+             error, time.time(), job_id)
+        )
+
+    def prune(self):
+        self._connection().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (self.DONE, self.FAILED, time.time() - self.ttl)
+        )
+
+    def _work(self):
+        last_prune = 0
+        while True:
+            try:
+                row = self._claim()
+                if row is None and time.time() - last_prune > 60:
+                    last_prune = time.time()
+                    self.prune()
+            except sqlite3.OperationalError:
+                # Banco ocupado por outro worker: a thread continua e tenta de novo no próximo ciclo
+                row = None
+
+            if row is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            # Cada job roda num contexto próprio: bypass, prioridade e métricas definidos pelo handler
+            # (ex.: set_priority(BULK) do prefetch) não passam para o próximo job da thread
+            contextvars.copy_context().run(self._run, row)
+
+    def _run(self, row):
+        handler = self._handlers.get(row["kind"])
+        try:
+            set_bypass(row["bypass_cache"])
+            start_request(f"job:{row['kind']}")
+            body, status_code = handler(json.loads(row["payload"]))
+            status = self.DONE if status_code < 400 else self.FAILED
+            self._finish(row["id"], status, status_code, result=body)
+        except Exception as e:
+            print(traceback.format_exc())
+            try:
+                self._finish(row["id"], self.FAILED, getattr(e, "status_code", 500), error=str(e))
+            except sqlite3.OperationalError:
+                # Banco ocupado: a thread continua; o job volta para a fila depois de stale_after
+                print(traceback.format_exc())
+
+
+job_queue = JobQueue(
+    config.JOB_QUEUE_PATH,
+    config.JOB_WORKERS,
+    config.JOB_POLL_INTERVAL,
+    config.JOB_STALE_AFTER,
+    config.JOB_TTL
+)
@@ -0,0 +1,202 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+from models import schemas_dict
+
+# Valores descartados da resposta do modelo (mesmo critério do antigo clean_empty_keys)
+EMPTY = object()
+
+# Mesma ordem de chaves do jsonify padrão do Flask (sort_keys=True)
+ENCODE_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+class SchemaValidationError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class _Invalid(Exception):
+    pass
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == {} or value == []
+
+
+def prune_empty(value):
+    """
+    Remove, em uma passada, None, "", {} e [] de dicts e listas (inclusive os que ficam vazios após a limpeza).
+    """
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, item in value.items():
+            item = prune_empty(item)
+            if not _is_empty(item):
+                cleaned[key] = item
+        return cleaned
+    if isinstance(value, list):
+        return [item for item in map(prune_empty, value) if not _is_empty(item)]
+    return value
+
+
+def _compile_node(schema):
+    """
+    Função que valida e limpa um valor do schema na mesma passada: devolve o valor limpo,
+    EMPTY quando ele deve ser descartado, ou lança _Invalid.
+    """
+    kind = schema.get("type")
+
+    if kind == "object":
+        properties = {key: _compile_node(child) for key, child in schema.get("properties", {}).items()}
+        required = frozenset(schema.get("required", ()))
+
+        def process_object(value):
+            if value is None:
+                return EMPTY
+            if type(value) is not dict or not required.issubset(value):
+                raise _Invalid
+            cleaned = {}
+            for key, item in value.items():
+                process = properties.get(key)
+                if process is not None:
+                    item = process(item)
+                else:
+                    # Campos fora do schema (ex.: "Link" pedido no prompt de search_notice) são mantidos
+                    item = prune_empty(item)
+                    if _is_empty(item):
+                        continue
+                if item is not EMPTY:
+                    cleaned[key] = item
+            return cleaned or EMPTY
+        return process_object
+
+    if kind == "array":
+        process_item = _compile_node(schema.get("items", {}))
+
+        def process_array(value):
+            if value is None:
+                return EMPTY
+            if type(value) is not list:
+                raise _Invalid
+            cleaned = [item for item in map(process_item, value) if item is not EMPTY]
+            return cleaned or EMPTY
+        return process_array
+
+    if kind == "string":
+        enum = frozenset(schema["enum"]) if "enum" in schema else None
+
+        def process_string(value):
+            if value is None or value == "":
+                return EMPTY
+            if type(value) is not str or (enum is not None and value not in enum):
+                raise _Invalid
+            return value
+        return process_string
+
+    if kind in ("integer", "number"):
+        def process_number(value):
+            if value is None:
+                return EMPTY
+            if type(value) is int:
+                return value
+            if type(value) is float:
+                if kind == "number":
+                    return value
+                if value.is_integer():
+                    return int(value)
+            raise _Invalid
+        return process_number
+
+    if kind == "boolean":
+        def process_boolean(value):
+            if value is None:
+                return EMPTY
+            if type(value) is not bool:
+                raise _Invalid
+            return value
+        return process_boolean
+
+    def process_any(value):
+        value = prune_empty(value)
+        return EMPTY if _is_empty(value) else value
+    return process_any
+
+
+def _explain(schema, value, path, errors):
+    # Caminho lento, só depois de uma falha: lista todos os erros para a nova tentativa do modelo
+    kind = schema.get("type")
+    if value is None:
+        return
+
+    if kind == "object":
+        if not isinstance(value, dict):
+            errors.append(f"{path or '$'}: esperado objeto")
+            return
+        for key in schema.get("required", ()):
+            if key not in value:
+                errors.append(f"{path or '$'}: campo obrigatório '{key}' ausente")
+        for key, child in schema.get("properties", {}).items():
+            if key in value:
+                _explain(child, value[key], f"{path}.{key}" if path else key, errors)
+    elif kind == "array":
+        if not isinstance(value, list):
+            errors.append(f"{path or '$'}: esperado lista")
+            return
+        for index, item in enumerate(value):
+            _explain(schema.get("items", {}), item, f"{path}[{index}]", errors)
+    elif kind == "string":
+        if not isinstance(value, str):
+            errors.append(f"{path}: esperado texto")
+        elif value and "enum" in schema and value not in schema["enum"]:
+            errors.append(f"{path}: '{value}' não está em {schema['enum']}")
+    elif kind == "integer":
+        if isinstance(value, bool) or not (isinstance(value, int) or (isinstance(value, float) and value.is_integer())):
+            errors.append(f"{path}: esperado inteiro")
+    elif kind == "number":
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            errors.append(f"{path}: esperado número")
+    elif kind == "boolean" and not isinstance(value, bool):
+        errors.append(f"{path}: esperado booleano")
+
+
+# Compilados uma vez, no import
+VALIDATORS = {schema_key: _compile_node(schema) for schema_key, schema in schemas_dict.items()}
+
+
+def decode_response(raw_content, schema_key):
+    """
+    Decodifica a resposta do modelo, valida contra o schema e descarta valores vazios em uma única passada.
+    Lança SchemaValidationError com a lista de erros.
+    """
+    try:
+        parsed = orjson.loads(raw_content)
+    except orjson.JSONDecodeError as e:
+        raise SchemaValidationError([f"JSON inválido: {e}"])
+
+    return validate(parsed, schema_key)
+
+
+def validate(parsed, schema_key):
+    """
+    Valida e limpa um valor já decodificado (ex.: montado a partir do stream) como decode_response.
+    """
+    process = VALIDATORS.get(schema_key)
+    if process is None:
+        return prune_empty(parsed)
+
+    try:
+        cleaned = process(parsed)
+    except _Invalid:
+        errors = []
+        _explain(schemas_dict[schema_key], parsed, "", errors)
+        raise SchemaValidationError(errors or ["resposta fora do schema"])
+
+    return {} if cleaned is EMPTY else cleaned
+
+
+def encode(obj):
+    """
+    JSON (bytes, UTF-8) das respostas da API com orjson; tipos que ele não conhece passam pelo default do Flask.
+    """
+    return orjson.dumps(obj, default=DefaultJSONProvider.default, option=ENCODE_OPTIONS)
@@ -0,0 +1,102 @@
+import json
+
+
+class IncrementalItemParser:
+    """
+    Parser incremental para respostas JSON do modelo no formato {"...": ..., "<array_key>": [{...}, {...}]}.
+
+    Recebe o texto em pedaços (tokens do stream) e devolve cada objeto de `array_key` assim que
+    ele é fechado. Os itens emitidos não ficam no buffer: sobra apenas o "esqueleto" do objeto raiz
+    (ex.: Title e Description do roadmap), usado para montar o resultado final.
+    """
+
+    def __init__(self, array_key):
+        self.array_key = array_key
+        # Cada nível é [tipo, última chave, esperando chave?]
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._key_chars = None
+        self._item_chars = None
+        self._skeleton_chars = []
+        self.items_count = 0
+
+    def _in_target_array(self):
+        return (
+            len(self._stack) == 2
+            and self._stack[0][0] == "object"
+            and self._stack[0][1] == self.array_key
+            and self._stack[1][0] == "array"
+        )
+
+    def feed(self, chunk):
+        items = []
+
+        for char in chunk:
+            capturing = self._item_chars is not None
+
+            if self._in_string:
+                if capturing:
+                    self._item_chars.append(char)
+                else:
+                    self._skeleton_chars.append(char)
+
+                if self._escape:
+                    self._escape = False
+                    if self._key_chars is not None:
+                        self._key_chars.append(char)
+                elif char == "\\":
+                    self._escape = True
+                    if self._key_chars is not None:
+                        self._key_chars.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._stack[-1][1] = json.loads('"' + "".join(self._key_chars) + '"')
+                        self._key_chars = None
+                elif self._key_chars is not None:
+                    self._key_chars.append(char)
+                continue
+
+            if not capturing and self._in_target_array():
+                # Entre itens do array alvo só interessa o início do próximo objeto ou o fechamento
+                if char == "{":
+                    self._item_chars = [char]
+                    self._stack.append(["object", None, True])
+                elif char == "]":
+                    self._skeleton_chars.append(char)
+                    self._stack.pop()
+                continue
+
+            if capturing:
+                self._item_chars.append(char)
+            else:
+                self._skeleton_chars.append(char)
+
+            if char == '"':
+                self._in_string = True
+                top = self._stack[-1] if self._stack else None
+                if top is not None and top[0] == "object" and top[2]:
+                    self._key_chars = []
+            elif char == "{":
+                self._stack.append(["object", None, True])
+            elif char == "[":
+                self._stack.append(["array", None, False])
+            elif char in "}]":
+                self._stack.pop()
+                if capturing and self._in_target_array():
+                    items.append(json.loads("".join(self._item_chars)))
+                    self._item_chars = None
+                    self.items_count += 1
+            elif char == ":":
+                self._stack[-1][2] = False
+            elif char == "," and self._stack and self._stack[-1][0] == "object":
+                self._stack[-1][2] = True
+
+        return items
+
+    def skeleton(self):
+        """
+        Objeto raiz sem os itens já emitidos (o array alvo fica vazio).
+        """
+        return json.loads("".join(self._skeleton_chars))
@@ -0,0 +1,201 @@
+import os
+import random
+import threading
+import time
+
+import config
+from rate_limiter import RateLimitExceeded, scheduler
+from relevance import estimate_tokens
+
+
+class LLMGateway:
+    """
+    Ponto único de acesso ao modelo: um cliente OpenAI com pool de conexões por worker,
+    timeouts configuráveis, retry com backoff exponencial e limite de chamadas simultâneas.
+    """
+
+    RETRYABLE_STATUS = {408, 409, 429}
+
+    def __init__(self, api_key, base_url=None, connect_timeout=5.0, read_timeout=120.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=20.0, max_in_flight=8):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_in_flight = max_in_flight
+        self._client = None
+        self._client_pid = None
+        self._client_lock = threading.Lock()
+        self._ssl_context = None
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            api_key=config.OPENAI_API_KEY,
+            base_url=config.OPENAI_BASE_URL,
+            connect_timeout=config.OPENAI_CONNECT_TIMEOUT,
+            read_timeout=config.OPENAI_READ_TIMEOUT,
+            max_retries=config.OPENAI_MAX_RETRIES,
+            backoff_base=config.OPENAI_BACKOFF_BASE,
+            backoff_max=config.OPENAI_BACKOFF_MAX,
+            max_in_flight=config.OPENAI_MAX_IN_FLIGHT
+        )
+
+    @property
+    def client(self):
+        # Criado sob demanda e recriado após o fork dos workers do gunicorn
+        if self._client is None or self._client_pid != os.getpid():
+            with self._client_lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    self._client = self._build_client()
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def _build_client(self):
+        # O SDK da OpenAI (e o httpx) levam ~0,6 s para importar: carregados na primeira chamada ao modelo
+        # ou, no gunicorn, antes do fork (app.warm_up)
+        import httpx
+        from openai import OpenAI
+
+        if self._ssl_context is None:
+            # Leitura dos certificados (~50 ms): feita uma vez por processo e herdada pelos workers após o fork
+            self._ssl_context = httpx.create_ssl_context()
+
+        timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        http_client = httpx.Client(
+            verify=self._ssl_context,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight
+            )
+        )
+        # Um servidor local de testes não exige chave real
+        api_key = self.api_key or ("local" if self.base_url else None)
+
+        return OpenAI(
+            api_key=api_key,
+            base_url=self.base_url or None,
+            timeout=timeout,
+            max_retries=0,
+            http_client=http_client
+        )
+
+    def preload(self):
+        """
+        Importa o SDK e o transporte HTTP e prepara o contexto TLS sem abrir conexões. Chamado antes
+        do fork (app.warm_up); os clientes, com os seus pools de conexões, continuam por worker.
+        """
+        client = self._build_client()
+        # O SDK só importa os recursos de chat (~0,5 s) no primeiro acesso a client.chat
+        client.chat.completions
+        client.close()
+
+    def _is_retryable(self, error):
+        import openai
+
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in self.RETRYABLE_STATUS or error.status_code >= 500
+        return False
+
+    @staticmethod
+    def _estimate_tokens(kwargs):
+        prompt_tokens = sum(estimate_tokens(message.get("content") or "") for message in kwargs.get("messages", []))
+        return prompt_tokens + config.RATE_LIMIT_COMPLETION_TOKENS
+
+    def _on_error(self, attempt, error):
+        """
+        Decide entre nova tentativa (devolve o tempo de espera) ou falha definitiva (levanta a exceção).
+        """
+        import openai
+
+        if isinstance(error, openai.RateLimitError):
+            # O provedor recusou: esvazia os buckets para que todos os workers recuem
+            scheduler.drain()
+
+        if attempt >= self.max_retries or not self._is_retryable(error):
+            if isinstance(error, openai.RateLimitError):
+                raise RateLimitExceeded(retry_after=max(1, round(self._backoff(attempt, error)))) from error
+            raise error
+
+        return self._backoff(attempt, error)
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+
+        return delay
+
+    def chat_completion(self, **kwargs):
+        estimated_tokens = self._estimate_tokens(kwargs)
+        scheduler.acquire(estimated_tokens)
+
+        with self._in_flight:
+            attempt = 0
+            while True:
+                try:
+                    response = self.client.chat.completions.create(**kwargs)
+                    break
+                except Exception as e:
+                    time.sleep(self._on_error(attempt, e))
+                    attempt += 1
+
+        if response.usage is not None:
+            scheduler.adjust(response.usage.total_tokens - estimated_tokens)
+        return response
+
+    def stream_chat_completion(self, on_usage=None, **kwargs):
+        """
+        Gera os trechos de texto do stream do modelo. O retry cobre apenas a abertura do stream
+        e a vaga de chamada simultânea fica ocupada até o stream terminar.
+
+        O uso de tokens chega no último chunk e é repassado a `on_usage`, quando informado.
+        """
+        estimated_tokens = self._estimate_tokens(kwargs)
+        scheduler.acquire(estimated_tokens)
+        usage = None
+
+        with self._in_flight:
+            attempt = 0
+            while True:
+                try:
+                    stream = self.client.chat.completions.create(
+                        stream=True, stream_options={"include_usage": True}, **kwargs
+                    )
+                    break
+                except Exception as e:
+                    time.sleep(self._on_error(attempt, e))
+                    attempt += 1
+
+            with stream:
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+        if usage is not None:
+            scheduler.adjust(usage.total_tokens - estimated_tokens)
+            if on_usage is not None:
+                on_usage(usage)
+
+    def close(self):
+        if self._client is not None and self._client_pid == os.getpid():
+            self._client.close()
+        self._client = None
+
+
+gateway = LLMGateway.from_config()
@@ -0,0 +1,204 @@
+import atexit
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+import config
+from json_pipeline import encode
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Nome -> (tipo, descrição) das métricas expostas em /metrics
+METRICS = {
+    "http_request_duration_seconds": ("histogram", "Duração das requisições até o envio dos headers"),
+    "stage_duration_seconds": ("histogram", "Duração de cada etapa instrumentada com span()"),
+    "llm_request_duration_seconds": ("histogram", "Duração das chamadas ao modelo"),
+    "llm_tokens_total": ("counter", "Tokens consumidos nas chamadas ao modelo"),
+    "completion_requests_total": ("counter", "Pedidos de completion por origem da resposta (cache, model, error)"),
+    "questions_prefetch_total": ("counter", "Temas de questões pré-geradas por resultado (scheduled, generated, failed)"),
+    "questions_prefetch_lookups_total": ("counter", "Consultas de /generate_questions às questões pré-geradas (hit, miss)"),
+}
+
+_route = contextvars.ContextVar("metrics_route", default="-")
+_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas acumulados em memória em cada worker e somados
+    periodicamente em um SQLite compartilhado, de onde /metrics lê o total de todos os workers.
+    """
+
+    def __init__(self, path, flush_interval):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._last_flush = time.time()
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                "name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (name, labels))"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _add(self, name, labels, amount):
+        key = (name, json.dumps(sorted(labels.items()), ensure_ascii=False))
+        with self._lock:
+            # O que ficou pendente no processo mestre antes do fork não pertence a este worker
+            if self._pid != os.getpid():
+                self._pending = {}
+                self._pid = os.getpid()
+            self._pending[key] = self._pending.get(key, 0) + amount
+
+    def inc(self, name, amount=1, **labels):
+        self._add(name, labels, amount)
+        self._maybe_flush()
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        # Todos os buckets são gravados (mesmo com 0) para a série sair completa em /metrics
+        for bound in buckets:
+            self._add(f"{name}_bucket", dict(labels, le=str(bound)), 1 if value <= bound else 0)
+        self._add(f"{name}_bucket", dict(labels, le="+Inf"), 1)
+        self._add(f"{name}_sum", labels, value)
+        self._add(f"{name}_count", labels, 1)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending if self._pid == os.getpid() else {}
+            self._pending = {}
+            self._pid = os.getpid()
+            self._last_flush = time.time()
+
+        if not pending:
+            return
+
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO samples (name, labels, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                [(name, labels, value) for (name, labels), value in pending.items()]
+            )
+
+    def render(self):
+        """
+        Texto no formato de exposição do Prometheus com os valores somados de todos os workers.
+        """
+        self.flush()
+        rows = self._connection().execute("SELECT name, labels, value FROM samples").fetchall()
+
+        families = {}
+        for name, labels, value in rows:
+            family = name
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                    family = name[:-len(suffix)]
+            families.setdefault(family, []).append((name, dict(json.loads(labels)), value))
+
+        def sort_key(sample):
+            name, labels, _ = sample
+            le = labels.get("le")
+            series = sorted((key, value) for key, value in labels.items() if key != "le")
+            return series, name, float("inf") if le == "+Inf" else float(le or 0)
+
+        lines = []
+        for family in sorted(families):
+            kind, description = METRICS.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {description}")
+            lines.append(f"# TYPE {family} {kind}")
+            for name, labels, value in sorted(families[family], key=sort_key):
+                label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+registry = MetricsRegistry(config.METRICS_PATH, config.METRICS_FLUSH_INTERVAL)
+atexit.register(registry.flush)
+
+
+def start_request(route):
+    """
+    Inicia a coleta de spans da requisição (ou job) atual, rotulada com `route`.
+    """
+    _route.set(route or "-")
+    _timings.set([])
+
+
+@contextmanager
+def span(stage):
+    """
+    Mede uma etapa: entra no header Server-Timing da requisição e no histograma stage_duration_seconds.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+        registry.observe("stage_duration_seconds", elapsed, route=_route.get(), stage=stage)
+
+
+def server_timing():
+    """
+    Valor do header Server-Timing com a soma, em ms, de cada etapa medida até agora.
+    """
+    totals = {}
+    for stage, elapsed in _timings.get() or []:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
+
+
+def record_completion(schema_key, source, elapsed=None, usage=None):
+    labels = {"route": _route.get(), "schema_key": schema_key or "-"}
+    registry.inc("completion_requests_total", source=source, **labels)
+
+    if elapsed is not None:
+        registry.observe("llm_request_duration_seconds", elapsed, **labels)
+    if usage is not None:
+        registry.inc("llm_tokens_total", usage.prompt_tokens, type="prompt", **labels)
+        registry.inc("llm_tokens_total", usage.completion_tokens, type="completion", **labels)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON do Flask com orjson: mede a serialização feita por jsonify como a etapa "serialize"
+    e decodifica os corpos das requisições (editais inteiros no campo "notice") sem o módulo json.
+    """
+
+    def response(self, *args, **kwargs):
+        with span("serialize"):
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(encode(obj) + b"\n", mimetype=self.mimetype)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
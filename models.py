@@ -1,3 +1,5 @@
+from itertools import combinations
+
 exam_data_schema = {
     "type": "object",
     "properties": {
@@ -69,6 +71,48 @@ roadmap_data_schema = {
 }
 
 
+# Geração em duas fases: primeiro só os módulos, depois as lições de cada módulo
+roadmap_skeleton_schema = {
+    "type": "object",
+    "properties": {
+        "Title": {"type": "string"},
+        "Description": {"type": "string"},
+        "Modules": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "Title": {"type": "string"},
+                    "Description": {"type": "string"},
+                    "Order": {"type": "integer"}
+                },
+                "required": ["Title", "Description", "Order"]
+            }
+        }
+    },
+    "required": ["Title", "Description", "Modules"]
+}
+
+roadmap_module_lessons_schema = {
+    "type": "object",
+    "properties": {
+        "Lessons": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "Title": {"type": "string"},
+                    "Description": {"type": "string"},
+                    "Order": {"type": "integer"}
+                },
+                "required": ["Title", "Description", "Order"]
+            }
+        }
+    },
+    "required": ["Lessons"]
+}
+
+
 questions_schema = {
     "type": "object",
     "properties": {
@@ -171,6 +215,27 @@ search_notice_schema = {
 schemas_dict = {
     "exam_data_schema": exam_data_schema,
     "roadmap_data_schema": roadmap_data_schema,
+    "roadmap_skeleton_schema": roadmap_skeleton_schema,
+    "roadmap_module_lessons_schema": roadmap_module_lessons_schema,
     "questions_schema": questions_schema,
     "search_notice_schema": search_notice_schema
-}
\ No newline at end of file
+}
+
+
+# Extração híbrida de editais: o modelo recebe um schema só com os campos que as regras não resolveram
+EXAM_DATA_FIELDS = ("NoticeTitle", "NoticeDescription", "JobRoles")
+
+
+def exam_data_schema_key(fields):
+    fields = [field for field in EXAM_DATA_FIELDS if field in fields]
+    return "exam_data_schema" if len(fields) == len(EXAM_DATA_FIELDS) else "exam_data_schema:" + "+".join(fields)
+
+
+for _size in range(1, len(EXAM_DATA_FIELDS)):
+    for _fields in combinations(EXAM_DATA_FIELDS, _size):
+        schemas_dict[exam_data_schema_key(_fields)] = {
+            **exam_data_schema,
+            "properties": {key: value for key, value in exam_data_schema["properties"].items()
+                           if key == "Notice" or key in _fields},
+            "required": ["Notice", *_fields]
+        }
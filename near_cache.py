@@ -0,0 +1,247 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+from relevance import fold_accents
+
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+# Palavras que mudam o tema mesmo quando o resto do texto é igual ("Direito Constitucional I" x "II", "Lei 8.112")
+NUMERAL_PATTERN = re.compile(r"\d|^[ivxlcdm]+$")
+
+# Só respostas que dependem apenas de um texto curto e do scope; extração de editais (exam_data_schema)
+# nunca passa pelo índice: editais do mesmo modelo de texto são quase iguais e têm dados diferentes
+NEAR_CACHE_SCHEMAS = frozenset({"questions_schema"})
+
+# Constantes do hash polinomial das n-grams e da mistura final (multiplicativa de Fibonacci)
+HASH_BASE = np.uint64(1000003)
+HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_for_similarity(text):
+    # Caixa, acentos, pontuação e espaços não contam: "Redes de Computadores –" == "redes de computadores"
+    return " ".join(NON_WORD_PATTERN.sub(" ", fold_accents(text.lower())).split())
+
+
+def ngram_hashes(text, n):
+    """
+    Hash de 64 bits de cada n-gram de caracteres do texto normalizado, calculado com numpy
+    sobre o texto inteiro, sem laço em Python por n-gram.
+    """
+    normalized = normalize_for_similarity(text)
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < n:
+        codes = np.pad(codes, (0, n - len(codes)))
+
+    # hash(c0..cn-1) = c0*B^(n-1) + ... + cn-1, com overflow em 64 bits
+    windows = len(codes) - n + 1
+    hashes = np.zeros(windows, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(n):
+            hashes = hashes * HASH_BASE + codes[offset:offset + windows]
+        return hashes * HASH_MIX
+
+
+def ngram_vector(text, dim, n):
+    """
+    Vetor (float32, norma 1) com a contagem das n-grams de caracteres do texto, cada uma
+    somada na posição dada pelo seu hash (hashing trick).
+    """
+    buckets = (ngram_hashes(text, n) >> np.uint64(32)) % np.uint64(dim)
+
+    vector = np.bincount(buckets.astype(np.int64), minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def is_near_duplicate(text, candidate, min_jaccard, n):
+    """
+    Confirmação feita sobre os textos normalizados depois do cosseno: comprimentos parecidos,
+    Jaccard das n-grams de caracteres >= min_jaccard e nenhuma palavra com número ou algarismo
+    romano presente em só um dos textos.
+    """
+    if text == candidate:
+        return True
+    if min(len(text), len(candidate)) < min_jaccard * max(len(text), len(candidate)):
+        return False
+
+    grams, candidate_grams = set(ngram_hashes(text, n).tolist()), set(ngram_hashes(candidate, n).tolist())
+    if len(grams & candidate_grams) < min_jaccard * len(grams | candidate_grams):
+        return False
+
+    return not any(NUMERAL_PATTERN.search(word) for word in set(text.split()) ^ set(candidate.split()))
+
+
+def _scope_id(scope):
+    return int.from_bytes(hashlib.blake2b(scope.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+class _SchemaIndex:
+    """
+    Vetores de um schema_key em uma matriz float32 contígua; as linhas são reaproveitadas na ordem LRU.
+    """
+
+    def __init__(self, max_size, dim):
+        self.max_size = max_size
+        self.vectors = np.zeros((min(64, max_size), dim), dtype=np.float32)
+        self.scopes = np.zeros(len(self.vectors), dtype=np.int64)
+        self.keys = [None] * len(self.vectors)
+        self.texts = [None] * len(self.vectors)
+        self.rows = OrderedDict()  # cache_key -> linha, do menos para o mais recente
+
+    def _free_row(self):
+        size = len(self.rows)
+        if size < len(self.vectors):
+            return size
+
+        if size < self.max_size:
+            # Cresce em dobro até max_size
+            capacity = min(self.max_size, size * 2)
+            self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+            self.scopes = np.resize(self.scopes, capacity)
+            self.keys += [None] * (capacity - size)
+            self.texts += [None] * (capacity - size)
+            return size
+
+        _, row = self.rows.popitem(last=False)
+        self.keys[row] = self.texts[row] = None
+        return row
+
+    def add(self, cache_key, scope_id, vector, text):
+        row = self.rows.get(cache_key)
+        if row is None:
+            row = self._free_row()
+        self.vectors[row] = vector
+        self.scopes[row] = scope_id
+        self.keys[row] = cache_key
+        self.texts[row] = text
+        self.rows[cache_key] = row
+        self.rows.move_to_end(cache_key)
+
+    def best(self, scope_id, vector):
+        """
+        (cache_key, texto normalizado, similaridade) da linha mais parecida do mesmo scope.
+        """
+        size = len(self.rows)
+        if not size:
+            return None, None, 0.0
+
+        # As linhas ocupadas são sempre as primeiras `size` (discard mantém a matriz contígua)
+        similarities = self.vectors[:size] @ vector
+        similarities[self.scopes[:size] != scope_id] = -1.0
+
+        row = int(np.argmax(similarities))
+        return self.keys[row], self.texts[row], float(similarities[row])
+
+    def touch(self, cache_key):
+        self.rows.move_to_end(cache_key)
+
+    def discard(self, cache_key):
+        row = self.rows.pop(cache_key, None)
+        if row is None:
+            return
+
+        # Move a última linha ocupada para o buraco, mantendo as linhas ocupadas contíguas
+        last = len(self.rows)
+        if row != last:
+            last_key = self.keys[last]
+            self.vectors[row] = self.vectors[last]
+            self.scopes[row] = self.scopes[last]
+            self.keys[row] = last_key
+            self.texts[row] = self.texts[last]
+            self.rows[last_key] = row
+        self.keys[last] = self.texts[last] = None
+
+
+class NearDuplicateCache:
+    """
+    Índice de similaridade em memória (por worker) sobre as entradas do cache de respostas.
+
+    Cada resposta gerada é indexada pelo vetor de n-grams do trecho variável do prompt
+    (título e descrição do tema) dentro de um `scope` que precisa ser idêntico (ex.: quantidade
+    de questões). Um prompt novo reaproveita a resposta da entrada mais parecida do mesmo
+    schema_key e scope quando a similaridade de cosseno passa de `threshold` e os textos
+    normalizados passam por is_near_duplicate. O índice guarda a chave e o texto normalizado;
+    o resultado continua no completion_cache. Só schema_keys de NEAR_CACHE_SCHEMAS são indexados.
+    """
+
+    def __init__(self, threshold, max_size, dim, ngram, min_jaccard):
+        self.threshold = threshold
+        self.min_jaccard = min_jaccard
+        self.max_size = max_size
+        self.dim = dim
+        self.ngram = ngram
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._counters = {"near_hits": 0, "near_misses": 0, "rejected": 0, "stale": 0, "indexed": 0}
+
+    @staticmethod
+    def supports(schema_key):
+        return schema_key in NEAR_CACHE_SCHEMAS
+
+    def vector(self, text):
+        return ngram_vector(text, self.dim, self.ngram)
+
+    def _index(self, schema_key):
+        index = self._indexes.get(schema_key)
+        if index is None:
+            index = self._indexes[schema_key] = _SchemaIndex(self.max_size, self.dim)
+        return index
+
+    def add(self, schema_key, scope, text, vector, cache_key):
+        with self._lock:
+            self._index(schema_key).add(cache_key, _scope_id(scope), vector, normalize_for_similarity(text))
+            self._counters["indexed"] += 1
+
+    def contains(self, schema_key, cache_key):
+        with self._lock:
+            index = self._indexes.get(schema_key)
+            return index is not None and cache_key in index.rows
+
+    def lookup(self, schema_key, scope, text, vector):
+        """
+        Devolve (cache_key, similaridade) da entrada mais parecida acima do limiar e confirmada
+        por is_near_duplicate, ou (None, similaridade).
+        """
+        with self._lock:
+            index = self._indexes.get(schema_key)
+            cache_key, candidate, similarity = index.best(_scope_id(scope), vector) if index else (None, None, 0.0)
+
+            if cache_key is not None and similarity >= self.threshold:
+                if is_near_duplicate(normalize_for_similarity(text), candidate, self.min_jaccard, self.ngram):
+                    index.touch(cache_key)
+                    self._counters["near_hits"] += 1
+                    return cache_key, similarity
+                self._counters["rejected"] += 1
+
+            self._counters["near_misses"] += 1
+            return None, similarity
+
+    def discard(self, schema_key, cache_key):
+        # Entrada que expirou ou saiu do completion_cache
+        with self._lock:
+            index = self._indexes.get(schema_key)
+            if index is not None:
+                index.discard(cache_key)
+            self._counters["stale"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = {schema_key: len(index.rows) for schema_key, index in self._indexes.items()}
+        lookups = stats["near_hits"] + stats["near_misses"]
+        stats["near_hit_rate"] = stats["near_hits"] / lookups if lookups else 0.0
+        stats["threshold"] = self.threshold
+        return stats
+
+
+near_cache = NearDuplicateCache(
+    config.NEAR_CACHE_THRESHOLD,
+    config.NEAR_CACHE_SIZE,
+    config.NEAR_CACHE_DIM,
+    config.NEAR_CACHE_NGRAM,
+    config.NEAR_CACHE_JACCARD
+)
@@ -0,0 +1,245 @@
+import hashlib
+import re
+from bisect import bisect_right
+from functools import cached_property, lru_cache
+
+import config
+from cache import LRUCache
+from relevance import fold_accents
+
+# Títulos de seção e linhas "CARGO:" em uma única passada (leitura página a página)
+HEADING_PATTERN = re.compile(
+    r"\b(CONTEÚDOS PROGRAMÁTICOS|PROGRAMA DA PROVA|CONHECIMENTOS ESPECÍFICOS|CONHECIMENTOS BÁSICOS)\b"
+    r"|^[ \t]*CARGOS?[ \t]*[:\-–][ \t]*([^\n]+)",
+    re.IGNORECASE | re.MULTILINE
+)
+# No edital inteiro, títulos e linhas "CARGO:" são procurados em separado e só quando pedidos
+CARGO_PATTERN = re.compile(r"^[ \t]*CARGOS?[ \t]*[:\-–][ \t]*([^\n]+)", re.IGNORECASE | re.MULTILINE)
+
+PROGRAMMATIC_CONTENTS = "CONTEÚDOS PROGRAMÁTICOS"
+EXAM_PROGRAM = "PROGRAMA DA PROVA"
+SPECIFIC_KNOWLEDGE = "CONHECIMENTOS ESPECÍFICOS"
+BASIC_KNOWLEDGE = "CONHECIMENTOS BÁSICOS"
+CARGO = "CARGO"
+
+# Ordem de prioridade usada por extract_programmatic_contents
+CONTENT_HEADINGS = (PROGRAMMATIC_CONTENTS, EXAM_PROGRAM, SPECIFIC_KNOWLEDGE, BASIC_KNOWLEDGE)
+# Títulos que abrem a seção de conteúdos na leitura página a página (os de conhecimentos aparecem
+# também no quadro de provas, antes da seção)
+SYLLABUS_START_HEADINGS = (PROGRAMMATIC_CONTENTS, EXAM_PROGRAM)
+
+
+def _heading_pattern(kinds, word_boundary):
+    """
+    Regex dos títulos `kinds` sem distinção de maiúsculas. A primeira letra fica num conjunto fora do
+    grupo (?i:...): assim o regex pula direto para os candidatos em vez de testar a alternância
+    inteira em cada posição do edital (cerca de 3x mais rápido que o mesmo padrão com IGNORECASE).
+    """
+    letters = "".join(sorted({char for kind in kinds for char in (kind[0], kind[0].lower())}))
+    rests = "|".join(rf"(?<=[{kind[0]}{kind[0].lower()}]){re.escape(kind[1:])}" for kind in kinds)
+    if word_boundary:
+        return re.compile(rf"[{letters}](?<=\b[{letters}])(?i:{rests})\b")
+    return re.compile(rf"[{letters}](?i:{rests})")
+
+
+CONTENT_HEADING_PATTERN = _heading_pattern(CONTENT_HEADINGS, word_boundary=True)
+# Primeira ocorrência de um título, sem montar a lista completa; mesmo critério do antigo
+# extract_programmatic_contents (sem \b)
+FIRST_HEADING_PATTERNS = {kind: _heading_pattern((kind,), word_boundary=False) for kind in CONTENT_HEADINGS}
+
+
+def notice_hash(notice_text):
+    return hashlib.sha256(notice_text.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=256)
+def _role_pattern(selected_job_role):
+    return re.compile(rf"\b{re.escape(selected_job_role)}\b")
+
+
+def _fold(text):
+    return " ".join(fold_accents(text.lower()).split())
+
+
+class NoticeIndex:
+    """
+    Tabela de offsets dos títulos do edital, montada sob demanda.
+
+    Cada parte (títulos de conteúdo, linhas "CARGO:", primeira ocorrência de um título) é
+    calculada na primeira consulta: extract_programmatic_contents só procura o primeiro título,
+    sem pagar a varredura completa usada por preprocess_notice e pelas regras do edital.
+    As seções são representadas por spans (início, fim) e só viram string quando
+    o chamador pede o texto, evitando cópias intermediárias do edital.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._first = {}
+        self._role_spans = {}
+
+    @cached_property
+    def headings(self):
+        return [(m.start(), m.end(), m.group().upper()) for m in CONTENT_HEADING_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def cargos(self):
+        return [(m.start(), m.end(), m.group(1).strip()) for m in CARGO_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def _heading_starts(self):
+        return [start for start, _, _ in self.headings]
+
+    def first(self, kind):
+        if kind not in self._first:
+            if "headings" in self.__dict__:
+                heading = next((heading for heading in self.headings if heading[2] == kind), None)
+            else:
+                m = FIRST_HEADING_PATTERNS[kind].search(self.text)
+                heading = (m.start(), m.end(), kind) if m else None
+            self._first[kind] = heading
+        return self._first[kind]
+
+    def next_heading(self, offset, kinds=None):
+        """
+        Primeiro título que começa depois de `offset` (opcionalmente filtrado por tipo).
+        """
+        for heading in self.headings[bisect_right(self._heading_starts, offset):]:
+            if kinds is None or heading[2] in kinds:
+                return heading
+        return None
+
+    def programmatic_span(self):
+        """
+        Span do restante do edital a partir do primeiro título de conteúdo encontrado, por prioridade.
+        """
+        for kind in CONTENT_HEADINGS:
+            heading = self.first(kind)
+            if heading:
+                return heading[1], len(self.text)
+        return None
+
+    def syllabus_spans(self):
+        """
+        Spans entre cada "CONTEÚDOS PROGRAMÁTICOS" e o título de prova seguinte.
+        """
+        spans = []
+        stop_kinds = (EXAM_PROGRAM, BASIC_KNOWLEDGE, SPECIFIC_KNOWLEDGE)
+
+        for start, end, kind in self.headings:
+            if kind != PROGRAMMATIC_CONTENTS:
+                continue
+            following = self.next_heading(end - 1, stop_kinds)
+            if following:
+                spans.append((end, following[0]))
+
+        return spans
+
+    def role_line_spans(self, selected_job_role):
+        """
+        Spans do restante da linha após cada menção à vaga (memoizado por vaga).
+        """
+        spans = self._role_spans.get(selected_job_role)
+        if spans is None:
+            spans = []
+            for m in _role_pattern(selected_job_role).finditer(self.text):
+                line_end = self.text.find("\n", m.end())
+                spans.append((m.end(), line_end if line_end != -1 else len(self.text)))
+            self._role_spans[selected_job_role] = spans
+        return spans
+
+    def section(self, span):
+        return self.text[span[0]:span[1]]
+
+
+def scan_role_syllabus(numbered_pages, selected_job_role):
+    """
+    Lê as páginas (índice, texto) em ordem e para assim que o conteúdo programático da vaga termina.
+
+    O trecho vai do "CARGO: <vaga>" posterior ao título da seção de conteúdos até o próximo cargo
+    ou a próxima seção de conteúdos; sem cargos na seção, vai do título até o fim do edital.
+    As linhas que mencionam a vaga antes da seção (ex.: quadro de vagas) vêm antes do trecho.
+    Devolve (texto, estatísticas), com texto vazio quando a seção da vaga não é encontrada.
+    """
+    role = _fold(selected_job_role)
+    role_pattern = _role_pattern(selected_job_role)
+    role_lines = []
+    pieces = []
+    syllabus_page = first_page = last_page = None
+    capturing = seen_cargo = early_exit = False
+    pages_scanned = 0
+
+    for page_num, page_text in numbered_pages:
+        pages_scanned = page_num + 1
+        # Início do trecho ainda não copiado nesta página (None: a página não entra)
+        start = 0 if capturing or (syllabus_page is not None and not seen_cargo) else None
+
+        for m in HEADING_PATTERN.finditer(page_text):
+            kind = m.group(1).upper() if m.group(1) else CARGO
+
+            if syllabus_page is None:
+                if kind in SYLLABUS_START_HEADINGS:
+                    role_lines += [
+                        line for line in page_text[:m.start()].splitlines() if role_pattern.search(line)
+                    ]
+                    syllabus_page = page_num
+                    start = m.end()
+                continue
+
+            if kind == CARGO:
+                matches_role = role in _fold(m.group(2))
+                if capturing and not matches_role:
+                    early_exit = True
+                    break
+                if not capturing:
+                    seen_cargo = True
+                    if matches_role:
+                        # Texto entre o título e o primeiro cargo é de outros cargos ou comum a todos
+                        capturing = True
+                        first_page = page_num
+                        pieces = []
+                        start = m.start()
+                    else:
+                        pieces = []
+                        start = None
+            elif kind == PROGRAMMATIC_CONTENTS and capturing:
+                early_exit = True
+                break
+
+        if syllabus_page is None:
+            role_lines += [line for line in page_text.splitlines() if role_pattern.search(line)]
+        elif start is not None:
+            pieces.append(page_text[start:m.start()] if early_exit else page_text[start:])
+            last_page = page_num
+
+        if early_exit:
+            break
+
+    found = capturing or (syllabus_page is not None and not seen_cargo)
+    if found and first_page is None:
+        first_page = syllabus_page
+
+    text = "\n".join(role_lines + ["\n".join(pieces).strip()]).strip() if found else ""
+    stats = {
+        "Found": found,
+        "FirstPage": first_page + 1 if found else None,
+        "LastPage": last_page + 1 if found else None,
+        "PagesScanned": pages_scanned,
+        "EarlyExit": early_exit
+    }
+    return text, stats
+
+
+_index_cache = LRUCache(config.NOTICE_INDEX_CACHE_SIZE, config.NOTICE_INDEX_CACHE_TTL)
+
+
+def get_notice_index(notice_text):
+    """
+    Devolve o índice do edital, reaproveitando o já montado para o mesmo texto.
+    """
+    # O próprio texto é a chave: o hash da str é calculado uma vez (bem mais barato que o sha256 do
+    # edital inteiro) e a igualdade é conferida no acerto; o índice já guarda o texto, sem cópia extra
+    index = _index_cache.get(notice_text)
+    if index is None:
+        index = NoticeIndex(notice_text)
+        _index_cache.set(notice_text, index)
+    return index
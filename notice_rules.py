@@ -0,0 +1,162 @@
+import re
+
+from models import EXAM_DATA_FIELDS as FIELDS
+from notice_index import get_notice_index
+
+# Só o cabeçalho do edital é usado para título e descrição
+HEADER_CHARS = 8000
+
+EDITAL_LINE_PATTERN = re.compile(r"^[ \t]*(EDITAL\b[^\n]{0,80}?\bN[ \t]*[.º°o]+[^\n]{1,80})$", re.MULTILINE)
+ORGANIZATION_PATTERN = re.compile(
+    r"\b(PREFEITURA|MUNIC[IÍ]PIO|INSTITUTO|UNIVERSIDADE|TRIBUNAL|SECRETARIA|MINIST[EÉ]RIO|GOVERNO|C[AÂ]MARA|"
+    r"ASSEMBLEIA|CONSELHO|AG[EÊ]NCIA|BANCO|EMPRESA|FUNDA[CÇ][AÃ]O|POL[IÍ]CIA|DEFENSORIA|PROCURADORIA|SERVI[CÇ]O)\b"
+)
+DESCRIPTION_PATTERN = re.compile(r"\btorna(?:m)?\s+p[úu]blic[oa]\b[^.]{10,600}\.", re.IGNORECASE)
+VACANCIES_HEADING_PATTERN = re.compile(r"^[ \t]*(?:\d+[.\s]*)?(?:DOS CARGOS|DAS VAGAS|DO QUADRO DE VAGAS)\b", re.MULTILINE)
+NEXT_SECTION_PATTERN = re.compile(r"^[ \t]*\d+[.\s]+D[AEO]S?\s+[A-ZÀ-Ú]", re.MULTILINE)
+VACANCY_ROW_PATTERN = re.compile(
+    r"^[ \t]*([A-ZÀ-Ú][A-Za-zÀ-ú /\-–()]{3,80}?)[ \t]+(?:\d{1,4}|CR)\b([^\n]*)$", re.MULTILINE
+)
+NOTICE_NUMBER_PATTERN = re.compile(r"\d+[ \t]*/[ \t]*\d{2,4}")
+# Atribuições descritas no próprio edital, logo depois da linha "CARGO: ..."
+ROLE_DUTIES_PATTERN = re.compile(
+    r"^[ \t]*(?:ATRIBUI[CÇ][OÕ]ES|DESCRI[CÇ][AÃ]O SUM[AÁ]RIA)[^:\n]{0,40}:[ \t]*([^\n]{20,400})",
+    re.IGNORECASE | re.MULTILINE
+)
+
+TABLE_HEADER_WORDS = {"CARGO", "CARGOS", "VAGAS", "TOTAL", "NÍVEL", "ESCOLARIDADE", "REQUISITOS", "CÓDIGO"}
+# Nomes de cargo não terminam em preposição ou artigo ("Reserva de 20 por cento das vagas")
+DANGLING_WORDS = {"DE", "DA", "DO", "DAS", "DOS", "E", "EM", "PARA", "POR", "COM", "A", "O", "AS", "OS", "AO", "NA", "NO"}
+# Palavras de frase corrida no resto da linha indicam texto, não uma linha da tabela
+PROSE_WORDS = {"de", "da", "do", "das", "dos", "por", "para", "que", "cento", "serão", "será", "conforme", "nos", "nas"}
+
+# Confiança de cada campo (0 a 1); NOTICE_RULES_MIN_CONFIDENCE decide o que dispensa o modelo
+CONFIDENCE_CARGO_LINE = 0.9
+CONFIDENCE_TABLE_ROW = 0.8
+CONFIDENCE_BOTH = 1.0
+
+
+def _collapse(text):
+    return " ".join(text.split())
+
+
+def extract_title(header):
+    """
+    Título "ÓRGÃO - EDITAL Nº ..." e a confiança: alta só com número do edital e órgão encontrados.
+    """
+    match = EDITAL_LINE_PATTERN.search(header)
+    if not match:
+        return None, 0.0
+
+    title = _collapse(match.group(1))
+
+    # Nome do órgão nas linhas anteriores ao "EDITAL Nº ..."
+    previous_lines = [line.strip() for line in header[:match.start()].split("\n") if line.strip()][-4:]
+    organization = next((line for line in previous_lines if ORGANIZATION_PATTERN.search(line.upper())), None)
+
+    confidence = (0.6 if NOTICE_NUMBER_PATTERN.search(title) else 0.3) + (0.4 if organization else 0.0)
+    return (f"{_collapse(organization)} - {title}" if organization else title), confidence
+
+
+def extract_description(header):
+    """
+    Frase "... torna público ..." do preâmbulo e a confiança (frases curtas demais são duvidosas).
+    """
+    match = DESCRIPTION_PATTERN.search(header)
+    if not match:
+        return None, 0.0
+
+    # Início da frase: depois do último ponto ou da linha "EDITAL Nº ..." que a antecede
+    start = header.rfind(".", 0, match.start()) + 1
+    edital_line = EDITAL_LINE_PATTERN.search(header, 0, match.start())
+    if edital_line:
+        start = max(start, edital_line.end())
+
+    description = _collapse(header[start:match.end()])
+    return description, 0.9 if len(description) >= 60 else 0.5
+
+
+def is_role_name(name):
+    words = name.upper().split()
+    return len(name) > 3 and name.upper() not in TABLE_HEADER_WORDS and words[-1] not in DANGLING_WORDS
+
+
+def is_table_row(rest):
+    """
+    O que vem depois do nº de vagas numa linha de tabela: outras colunas, não o resto de uma frase.
+    """
+    words = rest.split()
+    return not words or (words[0][0].isupper() or words[0][0].isdigit()) and not PROSE_WORDS & set(words[:4])
+
+
+def extract_job_roles(notice_text):
+    """
+    Vagas do edital: (lista de {"Name", "Description"}, confiança de cada nome).
+
+    A descrição só vem das atribuições escritas no edital; sem elas a vaga fica sem "Description"
+    e o campo JobRoles não é dado como resolvido.
+    """
+    roles = {}
+    confidence = {}
+
+    # Linhas "CARGO: ..." já localizadas pelo índice de seções
+    cargos = get_notice_index(notice_text).cargos
+    for index, (_, end, name) in enumerate(cargos):
+        name = _collapse(name).rstrip(" .;")
+        if not name or not is_role_name(name):
+            continue
+        key = name.casefold()
+        role = roles.setdefault(key, {"Name": name})
+        confidence[key] = CONFIDENCE_CARGO_LINE
+
+        block_end = cargos[index + 1][0] if index + 1 < len(cargos) else end + 1500
+        duties = ROLE_DUTIES_PATTERN.search(notice_text, end, min(block_end, end + 1500))
+        if duties and "Description" not in role:
+            role["Description"] = _collapse(duties.group(1))
+
+    # Linhas de tabela (nome + nº de vagas) dentro da seção "DAS VAGAS" / "DOS CARGOS"
+    heading = VACANCIES_HEADING_PATTERN.search(notice_text)
+    if heading:
+        next_section = NEXT_SECTION_PATTERN.search(notice_text, heading.end())
+        section = notice_text[heading.end():next_section.start() if next_section else heading.end() + 6000]
+
+        for match in VACANCY_ROW_PATTERN.finditer(section):
+            name = _collapse(match.group(1)).rstrip(" -–")
+            if not is_role_name(name) or not is_table_row(match.group(2)):
+                continue
+            key = name.casefold()
+            roles.setdefault(key, {"Name": name})
+            # Vaga presente na tabela e numa linha "CARGO:" é a mais confiável
+            confidence[key] = CONFIDENCE_BOTH if key in confidence else CONFIDENCE_TABLE_ROW
+
+    return list(roles.values()), list(confidence.values())
+
+
+def extract_notice_metadata(notice_text):
+    """
+    Extrai título, descrição e vagas por regras fixas. Devolve (ExamDataView com o que foi encontrado,
+    confiança de cada campo em FIELDS).
+
+    JobRoles só tem confiança se todas as vagas tiverem descrição tirada do edital; a confiança dos
+    nomes (menor entre as vagas) vem em "JobRoleNames" para que o modelo possa recebê-los como pista.
+    """
+    header = notice_text[:HEADER_CHARS]
+    title, title_confidence = extract_title(header)
+    description, description_confidence = extract_description(header)
+    job_roles, role_confidences = extract_job_roles(notice_text)
+
+    names_confidence = min(role_confidences, default=0.0)
+    described = bool(job_roles) and all("Description" in role for role in job_roles)
+
+    view = {"NoticeTitle": title, "NoticeDescription": description, "JobRoles": job_roles}
+    confidence = {
+        "NoticeTitle": title_confidence,
+        "NoticeDescription": description_confidence,
+        "JobRoles": names_confidence if described else 0.0,
+        "JobRoleNames": names_confidence
+    }
+    return {field: value for field, value in view.items() if value}, confidence
+
+
+def resolved_fields(confidence, min_confidence):
+    return [field for field in FIELDS if confidence.get(field, 0.0) >= min_confidence]
@@ -0,0 +1,38 @@
+import config
+from cache import DiskCache
+from notice_index import notice_hash
+
+# Editais limpos endereçados pelo próprio conteúdo (notice_id = SHA-256 do texto)
+notice_store = DiskCache(config.NOTICE_STORE_PATH, ttl=None)
+
+# Prefixo dos notice_id que apontam só para o conteúdo programático de uma vaga (upload com selectedJobRole)
+SYLLABUS_PREFIX = "syllabus:"
+
+
+def save_notice(notice_text):
+    """
+    Guarda o texto do edital (comprimido com zstandard) e devolve o seu notice_id.
+    """
+    notice_id = notice_hash(notice_text)
+    if not notice_store.contains(notice_id):
+        notice_store.set(notice_id, notice_text)
+    return notice_id
+
+
+def save_syllabus(syllabus_text):
+    """
+    Como save_notice, para o trecho de uma vaga: o notice_id leva SYLLABUS_PREFIX e nunca coincide
+    com o de um edital completo.
+    """
+    notice_id = SYLLABUS_PREFIX + notice_hash(syllabus_text)
+    if not notice_store.contains(notice_id):
+        notice_store.set(notice_id, syllabus_text)
+    return notice_id
+
+
+def is_partial_notice(notice_id):
+    return notice_id.startswith(SYLLABUS_PREFIX)
+
+
+def load_notice(notice_id):
+    return notice_store.get(notice_id)
@@ -0,0 +1,314 @@
+import hashlib
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+import config
+from cache import DiskCache
+from notice_index import scan_role_syllabus
+from notice_store import is_partial_notice, load_notice, save_notice, save_syllabus
+from text_normalizer import NORMALIZER_VERSION, TextNormalizer, normalize_pages
+
+
+class PdfUploadError(ValueError):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# notice_id do texto já extraído, indexado pelo SHA-256 dos bytes do PDF
+pdf_text_store = DiskCache(config.PDF_TEXT_STORE_PATH, ttl=None)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def open_pdf(source):
+    """
+    Abre um PDF a partir de um caminho ou dos bytes do arquivo.
+    """
+    # PyMuPDF leva ~150 ms para importar: só é carregado no primeiro PDF (ou antes do fork, em app.warm_up)
+    import fitz
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=pdf_bytes(source), filetype="pdf")
+    return fitz.open(source)
+
+
+def pdf_bytes(buffer):
+    # O PyMuPDF fixado em requirements.txt só aceita bytes, bytearray ou BytesIO como stream
+    return buffer.tobytes() if isinstance(buffer, memoryview) else buffer
+
+
+def _extract_page_range(source, start, stop):
+    # Executado nos processos do pool: cada processo abre o seu próprio documento
+    with open_pdf(source) as doc:
+        return [doc.load_page(page_num).get_text("text") for page_num in range(start, stop)]
+
+
+@contextmanager
+def pool_source(source):
+    """
+    Caminho do PDF para as tarefas do pool: PDFs em memória são gravados uma vez em um arquivo
+    temporário (apagado na saída), em vez de cada tarefa receber uma cópia serializada dos bytes.
+    """
+    if isinstance(source, str):
+        yield source
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+        file.write(source)
+    try:
+        yield file.name
+    finally:
+        os.unlink(file.name)
+
+
+def _pool_context():
+    # Os workers do gunicorn têm threads (jobs, gthread): um fork copiaria locks presos por elas.
+    # O forkserver (spawn onde não existe) cria os processos a partir de um processo sem threads,
+    # que importa este módulo e o PyMuPDF uma vez só
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__, "fitz"])
+    return context
+
+
+def _get_pool():
+    global _pool, _pool_pid
+
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ProcessPoolExecutor(max_workers=config.PDF_WORKERS, mp_context=_pool_context())
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def iter_pdf_pages(source):
+    """
+    Gera o texto bruto de cada página, uma por vez.
+    """
+    with open_pdf(source) as doc:
+        for page_num in range(doc.page_count):
+            yield doc.load_page(page_num).get_text("text")
+
+
+def iter_clean_pages(source):
+    """
+    Gera o texto normalizado de cada página (sem cabeçalhos e rodapés repetidos), permitindo
+    que as etapas seguintes comecem antes da última página ser lida.
+    """
+    yield from TextNormalizer().pages(iter_pdf_pages(source))
+
+
+def iter_pdf_pages_parallel(source, page_count=None):
+    """
+    Divide as páginas em faixas entre os processos do pool e gera o texto de cada página, em ordem.
+    """
+    if page_count is None:
+        with open_pdf(source) as doc:
+            page_count = doc.page_count
+
+    chunk_size = max(1, math.ceil(page_count / config.PDF_WORKERS))
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    pool = _get_pool()
+    with pool_source(source) as path:
+        futures = [pool.submit(_extract_page_range, path, start, stop) for start, stop in ranges]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def iter_pdf_pages_lazy(source, page_count):
+    """
+    Gera o texto de cada página, em ordem, sem ler o PDF além do necessário: acima de
+    PDF_PARALLEL_THRESHOLD páginas, faixas de PDF_SCAN_CHUNK_PAGES páginas são extraídas no pool,
+    com no máximo PDF_WORKERS faixas adiantadas. Faixas ainda não iniciadas são canceladas
+    quando o consumidor para de ler (close do gerador).
+    """
+    if page_count < config.PDF_PARALLEL_THRESHOLD or config.PDF_WORKERS < 2:
+        yield from iter_pdf_pages(source)
+        return
+
+    ranges = iter(
+        (start, min(start + config.PDF_SCAN_CHUNK_PAGES, page_count))
+        for start in range(0, page_count, config.PDF_SCAN_CHUNK_PAGES)
+    )
+    pool = _get_pool()
+    with pool_source(source) as path:
+        pending = deque(
+            pool.submit(_extract_page_range, path, start, stop) for start, stop in islice(ranges, config.PDF_WORKERS)
+        )
+        try:
+            while pending:
+                pages = pending.popleft().result()
+                for start, stop in islice(ranges, 1):
+                    pending.append(pool.submit(_extract_page_range, path, start, stop))
+                yield from pages
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def extract_pdf_text_parallel(source, page_count=None):
+    return "".join(iter_pdf_pages_parallel(source, page_count))
+
+
+def extract_pdf_text(source):
+    """
+    Extrai o texto bruto do PDF, usando o pool de processos acima de PDF_PARALLEL_THRESHOLD páginas.
+    """
+    with open_pdf(source) as doc:
+        page_count = doc.page_count
+        if page_count < config.PDF_PARALLEL_THRESHOLD or config.PDF_WORKERS < 2:
+            return "".join(doc.load_page(page_num).get_text("text") for page_num in range(page_count))
+
+    return extract_pdf_text_parallel(source, page_count)
+
+
+@contextmanager
+def upload_buffer(stream):
+    """
+    Expõe os bytes do upload sem gravar arquivos próprios: uploads pequenos são lidos em memória
+    e os grandes são mapeados (mmap) a partir do arquivo temporário do Werkzeug. O hash e a consulta
+    ao store usam o mmap direto; os bytes só são copiados quando o PDF precisa ser aberto.
+    """
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+
+    if size == 0:
+        raise PdfUploadError("Arquivo vazio.")
+    if size > config.PDF_MAX_UPLOAD_BYTES:
+        raise PdfUploadError(f"Arquivo excede o limite de {config.PDF_MAX_UPLOAD_BYTES} bytes.", 413)
+
+    fileno = None
+    if size > config.PDF_MMAP_THRESHOLD:
+        try:
+            fileno = stream.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            pass
+
+    if fileno is None:
+        yield stream.read()
+        return
+
+    mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        yield view
+    finally:
+        view.release()
+        mapped.close()
+
+
+def extract_upload_text(buffer):
+    """
+    Devolve (sha256, notice_id, texto normalizado, veio_do_store, estatísticas da normalização)
+    para os bytes de um PDF enviado. PDFs já processados são servidos do store sem abrir o fitz.
+    """
+    digest = hashlib.sha256(buffer).hexdigest()
+    # Textos gerados por outra versão do normalizador não são reaproveitados
+    store_key = f"{digest}:{NORMALIZER_VERSION}"
+
+    notice_id = pdf_text_store.get(store_key)
+    if notice_id is not None:
+        stored_text = load_notice(notice_id)
+        if stored_text is not None:
+            return digest, notice_id, stored_text, True, None
+
+    # Uma única cópia do mmap, reaproveitada pelo fitz e gravada uma vez para o pool de processos
+    buffer = pdf_bytes(buffer)
+    try:
+        doc = open_pdf(buffer)
+    except Exception as e:
+        raise PdfUploadError(f"PDF inválido: {e}")
+
+    with doc:
+        page_count = doc.page_count
+        if page_count > config.PDF_MAX_PAGES:
+            raise PdfUploadError(f"PDF excede o limite de {config.PDF_MAX_PAGES} páginas.", 413)
+
+        parallel = page_count >= config.PDF_PARALLEL_THRESHOLD and config.PDF_WORKERS >= 2
+        if not parallel:
+            # Cada página é normalizada assim que lida, sem montar o texto bruto inteiro
+            text, normalization = normalize_pages(
+                doc.load_page(page_num).get_text("text") for page_num in range(page_count)
+            )
+
+    if parallel:
+        text, normalization = normalize_pages(iter_pdf_pages_parallel(buffer, page_count))
+
+    notice_id = save_notice(text)
+    pdf_text_store.set(store_key, notice_id)
+    return digest, notice_id, text, False, normalization
+
+
+def extract_role_syllabus(source, selected_job_role):
+    """
+    Conteúdo programático de uma vaga lido página a página: a leitura do PDF para quando o trecho
+    da vaga termina (mais as páginas lidas à frente pelo normalizador e pelas faixas do pool),
+    sem extrair os anexos seguintes. Devolve (texto normalizado, estatísticas com as páginas usadas).
+    """
+    with open_pdf(source) as doc:
+        page_count = doc.page_count
+    if page_count > config.PDF_MAX_PAGES:
+        raise PdfUploadError(f"PDF excede o limite de {config.PDF_MAX_PAGES} páginas.", 413)
+
+    raw_pages = iter_pdf_pages_lazy(source, page_count)
+    pages = TextNormalizer().numbered_pages(raw_pages)
+    try:
+        text, stats = scan_role_syllabus(pages, selected_job_role)
+    finally:
+        pages.close()
+        raw_pages.close()
+
+    stats["PageCount"] = page_count
+    return text, stats
+
+
+def extract_upload_syllabus(buffer, selected_job_role):
+    """
+    Como extract_upload_text, mas só com o conteúdo programático da vaga (ver extract_role_syllabus).
+    Devolve (sha256, notice_id, texto, veio_do_store, estatísticas); o notice_id é o de um trecho (ver
+    notice_store.save_syllabus) e é None quando a vaga não é encontrada.
+    """
+    digest = hashlib.sha256(buffer).hexdigest()
+    store_key = f"{digest}:{NORMALIZER_VERSION}:syllabus:{' '.join(selected_job_role.lower().split())}"
+
+    stored = pdf_text_store.get(store_key)
+    if stored is not None:
+        stored = json.loads(stored)
+        notice_id = stored["notice_id"]
+        # Entradas antigas apontam para um notice_id de edital completo: são extraídas de novo
+        if notice_id is None or is_partial_notice(notice_id):
+            stored_text = load_notice(notice_id) if notice_id else ""
+            if stored_text is not None:
+                return digest, notice_id, stored_text, True, stored["stats"]
+
+    try:
+        text, stats = extract_role_syllabus(pdf_bytes(buffer), selected_job_role)
+    except PdfUploadError:
+        raise
+    except Exception as e:
+        raise PdfUploadError(f"PDF inválido: {e}")
+
+    notice_id = save_syllabus(text) if text else None
+    pdf_text_store.set(store_key, json.dumps({"notice_id": notice_id, "stats": stats}))
+    return digest, notice_id, text, False, stats
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import config
+from near_cache import ngram_hashes, normalize_for_similarity
+
+OPTION_KEYS = ("OptionA", "OptionB", "OptionC", "OptionD")
+CORRECT_OPTIONS = ("A", "B", "C", "D")
+
+# Semente fixa: as assinaturas gravadas continuam comparáveis entre execuções e workers
+MINHASH_SEED = 20240613
+
+
+def subject_key(subject):
+    # Mesma normalização do cache por similaridade: caixa, acentos e pontuação não mudam o tema
+    payload = json.dumps([
+        normalize_for_similarity(subject.get("Title") or ""),
+        normalize_for_similarity(subject.get("Description") or ""),
+        subject.get("AssessmentType") or ""
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_valid_question(item):
+    """
+    Item completo do questions_schema: enunciado, as quatro alternativas e a alternativa correta.
+    """
+    return (
+        isinstance(item, dict)
+        and all(isinstance(item.get(key), str) and item[key].strip() for key in ("Question",) + OPTION_KEYS)
+        and item.get("CorrectOption") in CORRECT_OPTIONS
+    )
+
+
+class MinHasher:
+    """
+    Assinaturas MinHash (num_perm valores de 32 bits) sobre as n-grams de caracteres do texto,
+    agrupadas em `bands` faixas para o LSH: textos com Jaccard alto caem no mesmo bucket em alguma faixa.
+    """
+
+    def __init__(self, num_perm, bands, shingle):
+        if num_perm % bands:
+            raise ValueError("QUESTION_BANK_NUM_PERM deve ser múltiplo de QUESTION_BANK_BANDS")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle = shingle
+        rng = np.random.default_rng(MINHASH_SEED)
+        # Hash multiplicativo (a ímpar) por permutação, com overflow em 64 bits
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2 ** 63, size=num_perm // bands, dtype=np.uint64) | np.uint64(1)
+
+    def signature(self, text):
+        hashes = np.unique(ngram_hashes(text, self.shingle))
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def band_buckets(self, signature):
+        rows = signature.reshape(self.bands, -1).astype(np.uint64)
+        with np.errstate(over="ignore"):
+            buckets = (rows * self._band_mix).sum(axis=1, dtype=np.uint64)
+        return [(band, int(bucket)) for band, bucket in enumerate(buckets.view(np.int64))]
+
+    @staticmethod
+    def similarity(signature, others):
+        # Estimativa do Jaccard: fração das permutações com o mesmo mínimo
+        return (others == signature).mean(axis=-1)
+
+
+class QuestionBank:
+    """
+    Banco local (SQLite, compartilhado pelos workers) das questões geradas, por tema.
+
+    Antes de gravar, cada questão é comparada com as do mesmo tema por MinHash/LSH e as
+    quase iguais são descartadas. O banco também guarda quais questões cada usuário já recebeu.
+    """
+
+    def __init__(self, path, num_perm, bands, shingle, duplicate_threshold):
+        self.path = path
+        self.duplicate_threshold = duplicate_threshold
+        self.hasher = MinHasher(num_perm, bands, shingle)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, subject_key TEXT NOT NULL, "
+                "question TEXT NOT NULL, signature BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS questions_subject ON questions (subject_key, id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS question_bands ("
+                "subject_key TEXT NOT NULL, band INTEGER NOT NULL, bucket INTEGER NOT NULL, question_id INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS question_bands_lookup ON question_bands (subject_key, band, bucket)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_questions ("
+                "user_id TEXT NOT NULL, question_id INTEGER NOT NULL, seen_at REAL NOT NULL, "
+                "PRIMARY KEY (user_id, question_id))"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, subject_id, count, user_id=None):
+        """
+        Até `count` questões do tema, na ordem em que foram guardadas, sem as já vistas pelo usuário.
+        """
+        conn = self._connection()
+        if user_id:
+            rows = conn.execute(
+                "SELECT id, question FROM questions WHERE subject_key = ? AND id NOT IN "
+                "(SELECT question_id FROM seen_questions WHERE user_id = ?) ORDER BY id LIMIT ?",
+                (subject_id, user_id, count)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT id, question FROM questions WHERE subject_key = ? ORDER BY id LIMIT ?",
+                (subject_id, count)
+            ).fetchall()
+        return [dict(json.loads(question), QuestionId=question_id) for question_id, question in rows]
+
+    def recent_texts(self, subject_id, limit):
+        rows = self._connection().execute(
+            "SELECT question FROM questions WHERE subject_key = ? ORDER BY id DESC LIMIT ?",
+            (subject_id, limit)
+        ).fetchall()
+        return [json.loads(question)["Question"] for question, in rows]
+
+    def _candidates(self, conn, subject_id, buckets):
+        placeholders = ", ".join("(?, ?)" for _ in buckets)
+        rows = conn.execute(
+            f"SELECT DISTINCT q.id, q.signature FROM question_bands b JOIN questions q ON q.id = b.question_id "
+            f"WHERE b.subject_key = ? AND (b.band, b.bucket) IN (VALUES {placeholders})",
+            [subject_id] + [value for bucket in buckets for value in bucket]
+        ).fetchall()
+        return [np.frombuffer(signature, dtype=np.uint32) for _, signature in rows]
+
+    def add(self, subject_id, items):
+        """
+        Grava as questões válidas que não são quase iguais a uma do banco (ou a outra do próprio lote).
+        Devolve (questões gravadas, com QuestionId; nº de quase duplicadas; nº de inválidas).
+        """
+        prepared = []
+        for item in items:
+            if is_valid_question(item):
+                signature = self.hasher.signature(item["Question"])
+                prepared.append((item, signature, self.hasher.band_buckets(signature)))
+
+        stored = []
+        duplicates = 0
+        conn = self._connection()
+        # A verificação e a gravação ficam na mesma transação: workers gravando o mesmo tema não duplicam
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            accepted = []
+            for item, signature, buckets in prepared:
+                others = self._candidates(conn, subject_id, buckets) + accepted
+                if others and self.hasher.similarity(signature, np.stack(others)).max() >= self.duplicate_threshold:
+                    duplicates += 1
+                    continue
+
+                question = {key: value for key, value in item.items() if key not in ("Order", "QuestionId")}
+                cursor = conn.execute(
+                    "INSERT INTO questions (subject_key, question, signature, created_at) VALUES (?, ?, ?, ?)",
+                    (subject_id, json.dumps(question, ensure_ascii=False), signature.tobytes(), time.time())
+                )
+                conn.executemany(
+                    "INSERT INTO question_bands (subject_key, band, bucket, question_id) VALUES (?, ?, ?, ?)",
+                    [(subject_id, band, bucket, cursor.lastrowid) for band, bucket in buckets]
+                )
+                accepted.append(signature)
+                stored.append(dict(question, QuestionId=cursor.lastrowid))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return stored, duplicates, len(items) - len(prepared)
+
+    def mark_seen(self, user_id, question_ids):
+        if not user_id or not question_ids:
+            return
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO seen_questions (user_id, question_id, seen_at) VALUES (?, ?, ?)",
+                [(user_id, question_id, now) for question_id in question_ids]
+            )
+
+    def stats(self):
+        conn = self._connection()
+        questions, subjects = conn.execute("SELECT COUNT(*), COUNT(DISTINCT subject_key) FROM questions").fetchone()
+        return {"questions": questions, "subjects": subjects}
+
+
+question_bank = QuestionBank(
+    config.QUESTION_BANK_PATH,
+    config.QUESTION_BANK_NUM_PERM,
+    config.QUESTION_BANK_BANDS,
+    config.QUESTION_BANK_SHINGLE,
+    config.QUESTION_BANK_DUP_THRESHOLD
+)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import threading
+
+import config
+from cache import DiskCache
+from jobs import job_queue
+from metrics import registry
+from question_bank import question_bank, subject_key as bank_subject_key
+from rate_limiter import BULK, RateLimitExceeded, set_priority
+from services import generate_questions
+
+PREFETCH_JOB = "prefetch_questions"
+# Abaixo dos jobs pedidos pelos usuários (prioridade 0) na fila compartilhada
+PREFETCH_JOB_PRIORITY = -10
+
+# Respostas de generate_questions já prontas, por tema (Title, Description, AssessmentType) e quantidade
+prefetch_store = DiskCache(config.QUESTIONS_PREFETCH_PATH, ttl=config.COMPLETION_CACHE_TTL)
+
+_counters = {"scheduled": 0, "generated": 0, "failed": 0, "hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(counter, amount=1):
+    with _counters_lock:
+        _counters[counter] += amount
+
+
+def subject_key(subject, quantity):
+    payload = json.dumps(
+        [config.OPENAI_MODEL, subject.get("Title"), subject.get("Description"), subject.get("AssessmentType"), quantity],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def prefetch_subjects(roadmap):
+    """
+    Temas que o frontend pede depois do roadmap, na ordem do roadmap: cada módulo seguido das suas lições.
+    """
+    roadmap = roadmap.get("RoadmapDataView", roadmap)
+    subjects = []
+
+    for module in sorted(roadmap.get("Modules", []), key=lambda m: m.get("Order", 0)):
+        subjects.append({
+            "Title": module.get("Title"),
+            "Description": module.get("Description"),
+            "AssessmentType": "Module"
+        })
+        for lesson in sorted(module.get("Lessons", []), key=lambda l: l.get("Order", 0)):
+            subjects.append({
+                "Title": lesson.get("Title"),
+                "Description": lesson.get("Description"),
+                "AssessmentType": "Lesson"
+            })
+
+    return subjects
+
+
+def schedule_prefetch(roadmap, quantity=None):
+    """
+    Enfileira, com prioridade baixa, a geração das questões dos temas do roadmap que ainda não
+    estão prontas, até QUESTIONS_PREFETCH_MAX_PER_ROADMAP temas. Devolve o resumo do agendamento.
+    """
+    quantity = quantity or config.QUESTIONS_PREFETCH_QUANTITY
+    subjects = [
+        subject for subject in prefetch_subjects(roadmap)
+        if not prefetch_store.contains(subject_key(subject, quantity))
+    ]
+    # Limite do gasto especulativo: os primeiros temas do roadmap são os mais prováveis de serem pedidos
+    subjects = subjects[:config.QUESTIONS_PREFETCH_MAX_PER_ROADMAP]
+
+    if not subjects:
+        return {"JobId": None, "Subjects": 0}
+
+    job_id = job_queue.submit(PREFETCH_JOB, {"subjects": subjects, "quantity": quantity}, priority=PREFETCH_JOB_PRIORITY)
+    _count("scheduled", len(subjects))
+    registry.inc("questions_prefetch_total", len(subjects), result="scheduled")
+    return {"JobId": job_id, "Subjects": len(subjects)}
+
+
+def run_prefetch(content):
+    """
+    Handler do job: gera as questões de cada tema, um por vez, com prioridade de lote no limitador.
+    """
+    set_priority(BULK)
+    quantity = content["quantity"]
+    generated = failed = 0
+
+    for subject in content["subjects"]:
+        key = subject_key(subject, quantity)
+        if prefetch_store.contains(key):
+            continue
+
+        try:
+            result = generate_questions(subject, quantity)
+        except RateLimitExceeded:
+            # Trabalho especulativo não espera por capacidade: o restante fica para o pedido real
+            break
+        if "error" in result["Questions"]:
+            failed += 1
+            continue
+
+        prefetch_store.set(key, json.dumps(result, ensure_ascii=False))
+        if config.QUESTION_BANK_ENABLED:
+            # Com o banco ativo, /generate_questions serve as questões pré-geradas a partir dele
+            question_bank.add(bank_subject_key(subject), result["Questions"].get("Questions", []))
+        generated += 1
+
+    _count("generated", generated)
+    _count("failed", failed)
+    registry.inc("questions_prefetch_total", generated, result="generated")
+    registry.inc("questions_prefetch_total", failed, result="failed")
+    return {"Generated": generated, "Failed": failed}, 200
+
+
+def _record_lookup(hit):
+    _count("hits" if hit else "misses")
+    registry.inc("questions_prefetch_lookups_total", result="hit" if hit else "miss")
+
+
+def lookup_prefetched(subject, quantity):
+    """
+    Resposta de generate_questions pré-gerada para o tema, ou None.
+    """
+    value = prefetch_store.get(subject_key(subject, quantity))
+    _record_lookup(value is not None)
+    return json.loads(value) if value is not None else None
+
+
+def has_prefetched(subject, quantity):
+    """
+    Se o tema foi pré-gerado; com o banco ativo as questões já estão nele (ver run_prefetch).
+    """
+    hit = prefetch_store.contains(subject_key(subject, quantity))
+    _record_lookup(hit)
+    return hit
+
+
+def prefetch_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["warm_hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
@@ -0,0 +1,195 @@
+import contextvars
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+_priority = contextvars.ContextVar("model_call_priority", default=INTERACTIVE)
+
+
+def set_priority(priority):
+    _priority.set(priority)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class RateLimitExceeded(Exception):
+    status_code = 503
+
+    def __init__(self, retry_after):
+        super().__init__("Limite de uso do modelo atingido. Tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+class TokenBucketScheduler:
+    """
+    Token buckets de requisições e de tokens por minuto, compartilhados em SQLite
+    por todos os workers da máquina.
+
+    Chamadas "bulk" só consomem enquanto os buckets ficam acima de uma reserva, que
+    sobra para as chamadas "interactive". Quando a espera passaria do limite da classe,
+    a chamada falha com RateLimitExceeded (a rota responde 503 com Retry-After).
+    """
+
+    def __init__(self, path, requests_per_minute, tokens_per_minute, bulk_reserve, max_wait):
+        self.path = path
+        self.capacity = {"requests": float(requests_per_minute), "tokens": float(tokens_per_minute)}
+        self.rate = {name: capacity / 60.0 for name, capacity in self.capacity.items()}
+        self.bulk_reserve = bulk_reserve
+        self.max_wait = max_wait
+        self._local = threading.local()
+        self._counters = {"acquired": 0, "waited": 0, "rejected": 0, "wait_seconds": 0.0}
+        self._counters_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.capacity["requests"] > 0 and self.capacity["tokens"] > 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL, updated_at REAL)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter, amount=1):
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def _levels(self, conn, now):
+        levels = {}
+        for name, capacity in self.capacity.items():
+            row = conn.execute("SELECT level, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                levels[name] = capacity
+            else:
+                levels[name] = min(capacity, row[0] + (now - row[1]) * self.rate[name])
+        return levels
+
+    def _store(self, conn, levels, now):
+        for name, level in levels.items():
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                (name, level, now)
+            )
+
+    def _try_take(self, cost, priority):
+        """
+        Tenta consumir `cost` atomicamente. Devolve 0 em caso de sucesso ou os segundos a esperar.
+        """
+        conn = self._connection()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = self._levels(conn, now)
+            wait = 0.0
+            for name, amount in cost.items():
+                reserve = self.capacity[name] * self.bulk_reserve if priority == BULK else 0.0
+                missing = amount + reserve - levels[name]
+                if missing > 0:
+                    wait = max(wait, missing / self.rate[name])
+
+            if wait == 0:
+                for name, amount in cost.items():
+                    levels[name] -= amount
+                self._store(conn, levels, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return wait
+
+    def acquire(self, estimated_tokens, priority=None):
+        """
+        Reserva 1 requisição e `estimated_tokens` tokens, esperando a recarga dos buckets quando necessário.
+        """
+        if not self.enabled:
+            return
+
+        priority = priority or current_priority()
+        # Uma chamada nunca pode custar mais que a capacidade do bucket
+        cost = {
+            "requests": 1.0,
+            "tokens": float(min(estimated_tokens, self.capacity["tokens"] * (1 - self.bulk_reserve)))
+        }
+        started = time.time()
+        deadline = started + self.max_wait[priority]
+        waited = False
+
+        while True:
+            wait = self._try_take(cost, priority)
+            if wait == 0:
+                self._count("acquired")
+                if waited:
+                    self._count("waited")
+                    self._count("wait_seconds", time.time() - started)
+                return
+
+            if time.time() + wait > deadline:
+                self._count("rejected")
+                raise RateLimitExceeded(retry_after=math.ceil(wait))
+
+            waited = True
+            time.sleep(min(wait, 1.0))
+
+    def adjust(self, token_delta):
+        """
+        Corrige o bucket de tokens com o uso real informado pela API (positivo = consumiu mais que o estimado).
+        """
+        if not self.enabled or not token_delta:
+            return
+
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = self._levels(conn, now)
+            levels["tokens"] = min(self.capacity["tokens"], levels["tokens"] - token_delta)
+            self._store(conn, levels, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def drain(self):
+        """
+        Esvazia os buckets após um 429 do provedor, fazendo todos os workers recuarem juntos.
+        """
+        if not self.enabled:
+            return
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._store(conn, {name: 0.0 for name in self.capacity}, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        with self._counters_lock:
+            return dict(self._counters)
+
+
+scheduler = TokenBucketScheduler(
+    config.RATE_LIMIT_PATH,
+    config.RATE_LIMIT_RPM,
+    config.RATE_LIMIT_TPM,
+    config.RATE_LIMIT_BULK_RESERVE,
+    {INTERACTIVE: config.RATE_LIMIT_MAX_WAIT_INTERACTIVE, BULK: config.RATE_LIMIT_MAX_WAIT_BULK}
+)
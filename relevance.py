@@ -0,0 +1,150 @@
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+import config
+
+WORD_PATTERN = re.compile(r"\w+")
+
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas", "um", "uma",
+    "para", "por", "com", "que", "se", "ao", "aos", "ou", "sua", "seu", "suas", "seus", "pela", "pelo",
+    "the", "and", "vaga", "deve", "voce", "abaixo", "acima", "sobre", "mais", "como"
+}
+
+# Termos usados para ranquear o edital quando o objetivo é extrair título, descrição e vagas
+NOTICE_DATA_QUERY = (
+    "edital concurso publico abertura inscricoes cargo cargos vagas vaga quadro nivel superior medio "
+    "requisitos escolaridade atribuicoes remuneracao vencimento jornada orgao prefeitura instituto"
+)
+
+# Termos usados para ranquear o edital quando o objetivo é o conteúdo programático de uma vaga
+SYLLABUS_QUERY = "conteudos programaticos conhecimentos especificos basicos programa prova"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_totals = {"selections": 0, "original_tokens": 0, "selected_tokens": 0}
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    # Aproximação de ~4 caracteres por token, suficiente para orçamento de prompt
+    return (len(text) + 3) // 4
+
+
+def fold_accents(text):
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in normalized if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [
+        token for token in WORD_PATTERN.findall(fold_accents(text.lower()))
+        if len(token) > 2 and token not in STOPWORDS
+    ]
+
+
+def split_chunks(text, chunk_chars):
+    """
+    Divide o texto em blocos de até ~chunk_chars caracteres, respeitando quebras de linha.
+    """
+    chunks = []
+    current = []
+    size = 0
+
+    for line in text.split("\n"):
+        if size and size + len(line) > chunk_chars:
+            chunks.append("\n".join(current))
+            current = []
+            size = 0
+        current.append(line)
+        size += len(line) + 1
+
+    if current:
+        chunks.append("\n".join(current))
+
+    return chunks
+
+
+def bm25_scores(chunk_tokens, query_tokens):
+    """
+    Pontuação BM25 de cada bloco para a consulta, calculada com numpy sobre a matriz (blocos x termos).
+    """
+    terms = {term: index for index, term in enumerate(dict.fromkeys(query_tokens))}
+    if not terms or not chunk_tokens:
+        return np.zeros(len(chunk_tokens), dtype=np.float32)
+
+    chunk_indexes = []
+    term_indexes = []
+    for chunk_index, tokens in enumerate(chunk_tokens):
+        for token in tokens:
+            term_index = terms.get(token)
+            if term_index is not None:
+                chunk_indexes.append(chunk_index)
+                term_indexes.append(term_index)
+
+    tf = np.zeros((len(chunk_tokens), len(terms)), dtype=np.float32)
+    np.add.at(tf, (np.array(chunk_indexes, dtype=np.intp), np.array(term_indexes, dtype=np.intp)), 1)
+
+    doc_lengths = np.array([len(tokens) for tokens in chunk_tokens], dtype=np.float32)
+    avg_length = max(float(doc_lengths.mean()), 1.0)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(chunk_tokens) - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / avg_length)
+    weights = tf * (BM25_K1 + 1) / (tf + norm[:, None])
+    return weights @ idf
+
+
+def select_relevant_text(text, query, token_budget=None, pinned_chunks=1):
+    """
+    Mantém apenas os blocos mais relevantes para a consulta dentro do orçamento de tokens.
+    Os primeiros `pinned_chunks` blocos (cabeçalho do edital) entram sempre. Devolve (texto, estatísticas).
+    """
+    token_budget = token_budget or config.PROMPT_TOKEN_BUDGET
+    original_tokens = estimate_tokens(text)
+
+    if original_tokens <= token_budget:
+        selected_text = text
+    else:
+        chunks = split_chunks(text, config.PROMPT_CHUNK_CHARS)
+        scores = bm25_scores([tokenize(chunk) for chunk in chunks], tokenize(query))
+
+        selected = set()
+        used_tokens = 0
+        candidates = list(range(min(pinned_chunks, len(chunks)))) + [
+            int(index) for index in np.argsort(-scores, kind="stable") if index >= pinned_chunks
+        ]
+
+        for index in candidates:
+            chunk_tokens = estimate_tokens(chunks[index])
+            if used_tokens + chunk_tokens > token_budget:
+                continue
+            selected.add(index)
+            used_tokens += chunk_tokens
+
+        # Mantém a ordem original dos blocos para preservar o contexto do edital
+        selected_text = "\n".join(chunks[index] for index in sorted(selected))
+
+    selected_tokens = estimate_tokens(selected_text)
+    with _totals_lock:
+        _totals["selections"] += 1
+        _totals["original_tokens"] += original_tokens
+        _totals["selected_tokens"] += selected_tokens
+
+    return selected_text, {
+        "OriginalTokens": original_tokens,
+        "SelectedTokens": selected_tokens,
+        "SavedTokens": original_tokens - selected_tokens
+    }
+
+
+def selection_totals():
+    with _totals_lock:
+        totals = dict(_totals)
+    totals["saved_tokens"] = totals["original_tokens"] - totals["selected_tokens"]
+    return totals
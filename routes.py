@@ -1,33 +1,183 @@
-import os
-import tempfile
-
-import openai
-from flask import Blueprint, request, jsonify
+import time
+from functools import partial
+
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context, url_for
+from cache import completion_cache, is_bypassed, set_bypass
+from jobs import job_queue
+from singleflight import completion_flight
+from near_cache import near_cache
+from question_bank import question_bank
+from question_prefetch import (
+    PREFETCH_JOB, has_prefetched, lookup_prefetched, prefetch_stats, run_prefetch, schedule_prefetch
+)
+from rate_limiter import BULK, INTERACTIVE, RateLimitExceeded, scheduler, set_priority
+from metrics import registry, server_timing, span, start_request
+from json_pipeline import encode
+import config
 from services import (
     extract_notice_data,
     search_notice,
     extract_roadmap,
+    extract_roadmap_two_phase,
     generate_questions,
-    generate_test_response, extract_data_from_pdf, clean_pdf_text, extract_programmatic_contents,
+    generate_questions_batch,
+    generate_questions_from_bank,
+    roadmap_subjects,
+    stream_roadmap,
+    stream_roadmap_two_phase,
+    stream_questions,
+    generate_test_response, extract_programmatic_contents,
     extract_job_related_content,
 )
+from pdf_extraction import PdfUploadError, upload_buffer, extract_upload_syllabus, extract_upload_text
+from notice_store import is_partial_notice, load_notice, save_notice
+from relevance import SYLLABUS_QUERY, select_relevant_text, selection_totals
+from search_index import notice_search_index
+from text_normalizer import normalization_totals, normalize_text
 
 api_routes = Blueprint('api', __name__)
 
 
-# 1️⃣ Extrair dados do edital
-@api_routes.route('/extract_notice_data', methods=['POST'])
-def extract_notice_data_route():
-    content = request.get_json()
+@api_routes.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    start_request(request.endpoint)
+
+
+@api_routes.after_request
+def record_request_metrics(response):
+    # Em respostas em stream o tempo vai até o envio dos headers
+    registry.observe(
+        "http_request_duration_seconds",
+        time.perf_counter() - g.request_started,
+        route=request.endpoint or "-",
+        method=request.method,
+        status=str(response.status_code)
+    )
+    if config.SERVER_TIMING_ENABLED:
+        timing = server_timing()
+        if timing:
+            response.headers["Server-Timing"] = timing
+    return response
+
+
+@api_routes.before_request
+def read_cache_bypass_header():
+    # Header "X-Cache-Bypass: 1" força uma nova chamada ao modelo (o resultado ainda atualiza o cache)
+    set_bypass(request.headers.get(config.CACHE_BYPASS_HEADER, "").lower() in ("1", "true", "yes"))
+
+
+# Geração de questões é trabalho em massa e cede a vez às rotas interativas
+ROUTE_PRIORITIES = {
+    'api.generate_questions_route': BULK,
+    'api.generate_questions_batch_route': BULK,
+}
+
+
+@api_routes.before_request
+def set_model_call_priority():
+    set_priority(ROUTE_PRIORITIES.get(request.endpoint, INTERACTIVE))
+
+
+@api_routes.app_errorhandler(RateLimitExceeded)
+def rate_limit_exceeded(error):
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+
+def get_request_notice(content):
+    """
+    Texto do edital enviado em 'notice' (normalizado aqui) ou referenciado por 'notice_id' (já normalizado).
+    Devolve (texto, estatísticas da normalização, erro), onde erro é (corpo, status) quando o notice_id não existe.
+    """
     notice = content.get('notice')
-    notice = clean_pdf_text(notice)
+    if notice:
+        with span("clean"):
+            notice, normalization = normalize_text(notice)
+        return notice, normalization, None
+
+    notice_id = content.get('notice_id')
+    if notice_id:
+        notice = load_notice(notice_id)
+        if notice is None:
+            return None, None, ({"error": f"Edital '{notice_id}' não encontrado."}, 404)
+
+    return notice, None, None
+
+
+def run_or_enqueue(kind, handler):
+    """
+    Executa o handler na própria requisição ou, com ?async=1, enfileira um job e responde 202.
+    """
+    content = request.get_json()
+
+    if request.args.get('async', '').lower() in ("1", "true", "yes"):
+        job_id = job_queue.submit(kind, content, bypass_cache=is_bypassed())
+        return jsonify({
+            "job_id": job_id,
+            "status": job_queue.QUEUED,
+            "status_url": url_for('api.job_status_route', job_id=job_id),
+            "events_url": url_for('api.job_events_route', job_id=job_id)
+        }), 202
+
+    body, status_code = handler(content)
+    return jsonify(body), status_code
+
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ("1", "true", "yes")
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {encode(data).decode()}\n\n"
+
+
+def sse_response(events):
+    """
+    Resposta Server-Sent Events a partir de um gerador de (evento, dados).
+    """
+    stream = (sse_event(event, data) for event, data in events)
+    return Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# 1️⃣ Extrair dados do edital
+def run_extract_notice_data(content):
+    notice, normalization, error = get_request_notice(content)
+    if error:
+        return error
 
     if not notice:
-        return jsonify({"error": "Campo 'notice' é obrigatório."}), 400
+        return {"error": "Campo 'notice' ou 'notice_id' é obrigatório."}, 400
+
+    # O trecho de uma vaga não é o edital: os dados extraídos dele iriam para o índice de busca como se fossem
+    if not content.get('notice') and is_partial_notice(content['notice_id']):
+        return {"error": f"O notice_id '{content['notice_id']}' aponta só para o conteúdo de uma vaga; envie o edital completo."}, 400
+
+    with span("store"):
+        notice_id = save_notice(notice)
 
     result = extract_notice_data(notice)
-    result["ExamDataView"]["Notice"] = notice
-    return jsonify(result), 200
+    if "error" not in result["ExamDataView"]:
+        with span("index"):
+            notice_search_index.index_notice(notice_id, result["ExamDataView"])
+
+    result["ExamDataView"]["NoticeId"] = notice_id
+    if normalization:
+        result["NormalizationStats"] = normalization
+    # O eco do texto completo é opcional: clientes que usam notice_id podem enviar "echo_notice": false
+    if content.get('echo_notice', True):
+        result["ExamDataView"]["Notice"] = notice
+    return result, 200
+
+
+@api_routes.route('/extract_notice_data', methods=['POST'])
+def extract_notice_data_route():
+    return run_or_enqueue('extract_notice_data', run_extract_notice_data)
 
 
 # 2️⃣ Procurar edital
@@ -39,20 +189,29 @@ def search_notice_route():
     if not prompt:
         return jsonify({"error": "Campo 'prompt' é obrigatório."}), 400
 
+    # Editais já processados respondem direto do índice local; o modelo fica só para os casos sem resultado
+    with span("search"):
+        notices = notice_search_index.search(prompt, config.SEARCH_RESULTS_LIMIT)
+    if notices:
+        if content.get('echo_notice', True):
+            for found in notices:
+                found["Notice"] = load_notice(found["NoticeId"])
+        return jsonify({"ExamDataView": {"Notices": notices}, "Source": "index"}), 200
+
     result = search_notice(prompt)
+    result["Source"] = "llm"
     return jsonify(result), 200
 
 
 # 3️⃣ Gerar roadmap (dados do edital + vaga)
-@api_routes.route('/extract_roadmap', methods=['POST'])
-def extract_roadmap_route():
-    content = request.get_json()
-    selected_job_role = content.get('selectedJobRole')
-    notice = content.get('notice')
-    contents = extract_programmatic_contents(notice)
+def build_auxiliar_prompt(notice, selected_job_role):
+    with span("programmatic"):
+        contents = extract_programmatic_contents(notice)
 
     if contents:
-        roadmap_source = contents
+        # O conteúdo programático vai até o fim do edital: mantém só os blocos relevantes para a vaga
+        with span("select"):
+            roadmap_source, _ = select_relevant_text(contents, f"{selected_job_role} {SYLLABUS_QUERY}")
         auxiliar_prompt = f"""
         Você deve gerar um ROADMAP COMPLETO, PROFUNDO e ESTRUTURADO DE ESTUDOS
         para a vaga "{selected_job_role}", utilizando EXCLUSIVAMENTE os conteúdos
@@ -71,24 +230,179 @@ def extract_roadmap_route():
         {roadmap_source}
         """
 
+    return auxiliar_prompt
+
+
+def get_roadmap_request(content):
+    """
+    Devolve (edital, vaga, erro) a partir do payload de /extract_roadmap.
+    """
+    selected_job_role = content.get('selectedJobRole')
+    notice, _, error = get_request_notice(content)
+    if error:
+        return None, None, error
+
     if not selected_job_role or not notice:
-        return jsonify({"error": "Campos 'selectedJobRole' e 'notice' são obrigatórios."}), 400
+        return None, None, ({"error": "Campos 'selectedJobRole' e 'notice' (ou 'notice_id') são obrigatórios."}, 400)
+
+    return notice, selected_job_role, None
 
-    result = extract_roadmap(notice, auxiliar_prompt)
-    return jsonify(result), 200
+
+def get_roadmap_mode(content):
+    """
+    Devolve (modo, módulos a regenerar, erro). O modo vem do corpo (e não da query string)
+    para valer também nos jobs assíncronos.
+    """
+    mode = content.get('mode') or config.ROADMAP_MODE
+    if mode not in ("single", "two_phase"):
+        return None, None, ({"error": "Campo 'mode' deve ser 'single' ou 'two_phase'."}, 400)
+
+    regenerate_modules = content.get('regenerateModules') or []
+    if not isinstance(regenerate_modules, list) or not all(isinstance(order, int) for order in regenerate_modules):
+        return None, None, ({"error": "Campo 'regenerateModules' deve ser uma lista de 'Order' dos módulos."}, 400)
+
+    return mode, regenerate_modules, None
+
+
+def get_quantity(content):
+    """
+    Devolve (quantidade, erro): "quantity" inteiro positivo (também como texto, ex.: "5"), padrão 5.
+    """
+    quantity = content.get('quantity', 5)
+    if isinstance(quantity, str) and quantity.strip().isdigit():
+        quantity = int(quantity)
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+        return None, ({"error": "Campo 'quantity' deve ser um inteiro positivo."}, 400)
+    return quantity, None
+
+
+def with_questions_prefetch(result, content):
+    """
+    Com "prefetchQuestions" (padrão QUESTIONS_PREFETCH_ENABLED), enfileira as questões dos temas do roadmap gerado.
+    """
+    roadmap = result.get("RoadmapDataView")
+    if content.get('prefetchQuestions', config.QUESTIONS_PREFETCH_ENABLED) and roadmap and "error" not in roadmap:
+        result["QuestionsPrefetch"] = schedule_prefetch(roadmap, content.get('prefetchQuantity'))
+    return result
+
+
+def stream_with_questions_prefetch(events, content):
+    for event, data in events:
+        if event == "done":
+            data = with_questions_prefetch(data, content)
+        yield event, data
+
+
+def run_extract_roadmap(content):
+    notice, selected_job_role, error = get_roadmap_request(content)
+    if error:
+        return error
+    mode, regenerate_modules, error = get_roadmap_mode(content)
+    if error:
+        return error
+
+    if mode == "two_phase":
+        result = extract_roadmap_two_phase(notice, build_auxiliar_prompt(notice, selected_job_role), regenerate_modules)
+        return with_questions_prefetch(result, content), 500 if "error" in result else 200
+
+    result = extract_roadmap(notice, build_auxiliar_prompt(notice, selected_job_role))
+    return with_questions_prefetch(result, content), 200
+
+
+@api_routes.route('/extract_roadmap', methods=['POST'])
+def extract_roadmap_route():
+    if wants_stream():
+        content = request.get_json()
+        notice, selected_job_role, error = get_roadmap_request(content)
+        if not error:
+            mode, regenerate_modules, error = get_roadmap_mode(content)
+        if error:
+            return jsonify(error[0]), error[1]
+
+        auxiliar_prompt = build_auxiliar_prompt(notice, selected_job_role)
+        if mode == "two_phase":
+            # Evento "skeleton" com os módulos e, depois, um "item" por módulo com as lições
+            events = stream_roadmap_two_phase(notice, auxiliar_prompt, regenerate_modules)
+        else:
+            # Cada módulo é enviado como evento "item" assim que o modelo o conclui
+            events = stream_roadmap(notice, auxiliar_prompt)
+        return sse_response(stream_with_questions_prefetch(events, content))
+
+    return run_or_enqueue('extract_roadmap', run_extract_roadmap)
+
+
+job_queue.register('extract_notice_data', run_extract_notice_data)
+job_queue.register('extract_roadmap', run_extract_roadmap)
+job_queue.register(PREFETCH_JOB, run_prefetch)
 
 
 # 4️⃣ Gerar questões
+def answer_questions(subject, quantity, user_id=None):
+    """
+    Questões de um tema (sem stream), como em /generate_questions: com o banco de questões, a resposta
+    vem do banco e o modelo só completa o que faltar; sem ele, as pré-geradas são devolvidas sem chamar o modelo.
+    """
+    if config.QUESTION_BANK_ENABLED and not is_bypassed():
+        # As questões pré-geradas já foram gravadas no banco: a consulta só registra o acerto
+        prefetched = has_prefetched(subject, quantity)
+        result = generate_questions_from_bank(subject, quantity, user_id)
+        if prefetched and not result["QuestionBank"]["Generated"]:
+            result["Prefetched"] = True
+        return result
+
+    prefetched = None if is_bypassed() else lookup_prefetched(subject, quantity)
+    if prefetched is not None:
+        prefetched["Prefetched"] = True
+        return prefetched
+
+    return generate_questions(subject, quantity)
+
+
 @api_routes.route('/generate_questions', methods=['POST'])
 def generate_questions_route():
     content = request.get_json()
     subject = content.get('subject')
-    quantity = content.get('quantity', 5)
+    quantity, error = get_quantity(content)
+    if error:
+        return jsonify(error[0]), error[1]
 
     if not subject:
         return jsonify({"error": "Campo 'subject' é obrigatório."}), 400
 
-    result = generate_questions(subject, quantity)
+    if not wants_stream():
+        return jsonify(answer_questions(subject, quantity, content.get('userId'))), 200
+
+    # Em stream o banco não é consultado; as questões pré-geradas depois do roadmap são enviadas direto
+    prefetched = None if is_bypassed() else lookup_prefetched(subject, quantity)
+    if prefetched is not None:
+        prefetched["Prefetched"] = True
+        items = prefetched["Questions"].get("Questions", [])
+        return sse_response([("item", question) for question in items] + [("done", prefetched)])
+
+    return sse_response(stream_questions(subject, quantity))
+
+
+@api_routes.route('/generate_questions_batch', methods=['POST'])
+def generate_questions_batch_route():
+    content = request.get_json()
+    subjects = content.get('subjects')
+    roadmap = content.get('roadmap')
+    quantity, error = get_quantity(content)
+    if error:
+        return jsonify(error[0]), error[1]
+
+    # Aceita uma lista de temas ou um RoadmapDataView inteiro (um tema por lição)
+    if not subjects and roadmap:
+        subjects = roadmap_subjects(roadmap)
+
+    if not subjects or not isinstance(subjects, list):
+        return jsonify({"error": "Campo 'subjects' (lista) ou 'roadmap' é obrigatório."}), 400
+
+    if len(subjects) > config.QUESTIONS_BATCH_MAX_SUBJECTS:
+        return jsonify({"error": f"Máximo de {config.QUESTIONS_BATCH_MAX_SUBJECTS} temas por lote."}), 400
+
+    # Cada tema passa pelo mesmo caminho de /generate_questions (banco e questões pré-geradas)
+    result = generate_questions_batch(subjects, quantity, partial(answer_questions, user_id=content.get('userId')))
     return jsonify(result), 200
 
 
@@ -118,11 +432,75 @@ def test_route():
         return jsonify({"error": "Tipo de resultado inválido"}), 400
 
 
+@api_routes.route('/cache_stats', methods=['GET'])
+def cache_stats_route():
+    stats = completion_cache.stats()
+    stats["singleflight"] = completion_flight.stats()
+    stats["rate_limiter"] = scheduler.stats()
+    stats["text_normalizer"] = normalization_totals()
+    stats["relevance"] = selection_totals()
+    stats["near_cache"] = near_cache.stats()
+    stats["questions_prefetch"] = prefetch_stats()
+    stats["question_bank"] = question_bank.stats()
+    return jsonify(stats), 200
+
+
+@api_routes.route('/metrics', methods=['GET'])
+def metrics_route():
+    # Formato de exposição do Prometheus, somando todos os workers
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+# 6️⃣ Jobs assíncronos
+@api_routes.route('/jobs/<job_id>', methods=['GET'])
+def job_status_route(job_id):
+    job = job_queue.get(job_id)
+
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' não encontrado."}), 404
+
+    return jsonify(job), 200
+
+
+@api_routes.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events_route(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": f"Job '{job_id}' não encontrado."}), 404
+
+    def stream():
+        # Cada conexão ocupa um worker sync enquanto espera: a espera é limitada e o cliente reconecta
+        deadline = time.monotonic() + config.JOB_EVENTS_TIMEOUT
+        last_status = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                return
+
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield sse_event("status", {"status": last_status})
+
+            if job["status"] in (job_queue.DONE, job_queue.FAILED):
+                yield sse_event("result", job)
+                return
+
+            if time.monotonic() >= deadline:
+                yield f"retry: {int(config.JOB_POLL_INTERVAL * 1000)}\n\n"
+                yield sse_event("timeout", {"status": last_status})
+                return
+
+            time.sleep(config.JOB_POLL_INTERVAL)
+
+    return Response(stream(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
+
+
 @api_routes.route('/generate_roadmap_or_questions', methods=['POST'])
 def generate_roadmap_or_questions_route():
     content = request.get_json()
     selected_job_role = content.get('selectedJobRole')
-    notice = content.get('notice')
+    notice, _, error = get_request_notice(content)
+    if error:
+        return jsonify(error[0]), error[1]
 
     # Extrair conteúdo técnico do edital
     extracted_content = extract_job_related_content(notice, selected_job_role)
@@ -138,6 +516,10 @@ def generate_roadmap_or_questions_route():
 
 @api_routes.route('/upload_notice_pdf', methods=['POST'])
 def upload_notice_pdf():
+    # Rejeita antes de o Werkzeug ler o corpo inteiro (margem para os campos do multipart)
+    if request.content_length and request.content_length > config.PDF_MAX_UPLOAD_BYTES + 64 * 1024:
+        return jsonify({"error": f"Arquivo excede o limite de {config.PDF_MAX_UPLOAD_BYTES} bytes."}), 413
+
     if 'file' not in request.files:
         return jsonify({"error": "Nenhum arquivo enviado. Use o campo 'file'"}), 400
 
@@ -146,18 +528,38 @@ def upload_notice_pdf():
     if pdf_file.filename == "":
         return jsonify({"error": "Nome de arquivo inválido."}), 400
 
-    # Diretório temporário compatível com Windows, Linux e Heroku
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, pdf_file.filename)
-
-    pdf_file.save(temp_path)
+    # Com 'selectedJobRole', só o conteúdo programático da vaga é extraído (e o PDF para de ser lido ali)
+    selected_job_role = request.form.get('selectedJobRole')
+    syllabus = normalization = None
 
     try:
-        raw_text = extract_data_from_pdf(temp_path)
-        text = clean_pdf_text(raw_text)
-        return jsonify({
+        with span("pdf"), upload_buffer(pdf_file.stream) as buffer:
+            if selected_job_role:
+                digest, notice_id, text, from_store, syllabus = extract_upload_syllabus(buffer, selected_job_role)
+            if not syllabus or not syllabus["Found"]:
+                # Vaga não encontrada: segue com o edital inteiro
+                digest, notice_id, text, from_store, normalization = extract_upload_text(buffer)
+
+        if not syllabus or not syllabus["Found"]:
+            # O índice de busca só recebe editais completos
+            with span("index"):
+                notice_search_index.index_notice_text(notice_id, text)
+
+        response = {
             "message": "PDF processado com sucesso",
-            "text": text
-        }), 200
+            "notice_id": notice_id,
+            "sha256": digest,
+            "cached": from_store
+        }
+        if syllabus:
+            response["syllabus"] = syllabus
+            response["partial"] = syllabus["Found"]
+        if normalization:
+            response["normalization"] = normalization
+        if request.form.get('echo_notice', 'true').lower() not in ("0", "false", "no"):
+            response["text"] = text
+        return jsonify(response), 200
+    except PdfUploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
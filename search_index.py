@@ -0,0 +1,115 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+import config
+from relevance import STOPWORDS, fold_accents
+
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+QUERY_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class NoticeSearchIndex:
+    """
+    Índice de texto completo (SQLite FTS5) dos editais já processados.
+
+    Cobre título, descrição, vagas e ano, com remoção de acentos e busca por prefixo,
+    e é atualizado a cada edital que passa por /extract_notice_data ou /upload_notice_pdf.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS notices USING fts5("
+                "notice_id UNINDEXED, title, description, job_roles, year, "
+                "job_roles_json UNINDEXED, source UNINDEXED, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def has_notice(self, notice_id):
+        row = self._connection().execute(
+            "SELECT 1 FROM notices WHERE notice_id = ? LIMIT 1", (notice_id,)
+        ).fetchone()
+        return row is not None
+
+    def index_notice(self, notice_id, exam_data_view, source="extract_notice_data"):
+        """
+        Insere ou substitui o edital no índice a partir de um ExamDataView.
+        """
+        title = exam_data_view.get("NoticeTitle", "")
+        description = exam_data_view.get("NoticeDescription", "")
+        job_roles = exam_data_view.get("JobRoles", [])
+
+        year_match = YEAR_PATTERN.search(f"{title} {description}")
+        job_roles_text = " ".join(f"{role.get('Name', '')} {role.get('Description', '')}" for role in job_roles)
+
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM notices WHERE notice_id = ?", (notice_id,))
+            conn.execute(
+                "INSERT INTO notices (notice_id, title, description, job_roles, year, job_roles_json, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (notice_id, title, description, job_roles_text, year_match.group(0) if year_match else "",
+                 json.dumps(job_roles, ensure_ascii=False), source)
+            )
+
+    def index_notice_text(self, notice_id, notice_text):
+        """
+        Indexa um edital recém-enviado usando o cabeçalho do texto, sem sobrescrever
+        metadados melhores já extraídos pelo modelo.
+        """
+        if self.has_notice(notice_id):
+            return
+
+        lines = [line.strip() for line in notice_text[:2000].split("\n") if line.strip()]
+        self.index_notice(notice_id, {
+            "NoticeTitle": lines[0] if lines else "",
+            "NoticeDescription": " ".join(lines[1:6])
+        }, source="upload")
+
+    @staticmethod
+    def build_query(text):
+        # Cada termo vira um prefixo obrigatório: "analista ti 2024" -> "analista"* AND "ti"* AND "2024"*
+        tokens = [
+            token for token in QUERY_TOKEN_PATTERN.findall(fold_accents(text.lower()))
+            if token not in STOPWORDS
+        ]
+        return " AND ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, text, limit):
+        query = self.build_query(text)
+        if not query:
+            return []
+
+        rows = self._connection().execute(
+            "SELECT notice_id, title, description, year, job_roles_json FROM notices "
+            "WHERE notices MATCH ? ORDER BY bm25(notices, 0, 10.0, 3.0, 5.0, 2.0) LIMIT ?",
+            (query, limit)
+        ).fetchall()
+
+        return [
+            {
+                "NoticeId": notice_id,
+                "NoticeTitle": title,
+                "NoticeDescription": description,
+                "Year": year,
+                "JobRoles": json.loads(job_roles_json)
+            }
+            for notice_id, title, description, year, job_roles_json in rows
+        ]
+
+
+notice_search_index = NoticeSearchIndex(config.SEARCH_INDEX_PATH)
@@ -1,81 +1,260 @@
-import os
-import re
-import fitz
-import json
+import time
 import traceback
-from openai import OpenAI
-from dotenv import load_dotenv
-from models import schemas_dict
-
-load_dotenv()
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from models import exam_data_schema_key, schemas_dict
+from cache import completion_cache, is_bypassed, set_bypass
+from near_cache import near_cache
+from question_bank import question_bank, subject_key as question_bank_subject_key
+from llm_gateway import gateway
+from rate_limiter import RateLimitExceeded
+from singleflight import completion_flight
+from notice_index import get_notice_index
+from json_stream import IncrementalItemParser
+from json_pipeline import SchemaValidationError, decode_response, prune_empty, validate
+from notice_rules import FIELDS as NOTICE_FIELDS, extract_notice_metadata, resolved_fields
+from relevance import NOTICE_DATA_QUERY, SYLLABUS_QUERY, select_relevant_text
+from text_normalizer import normalize_text
+from metrics import record_completion, span
+from pdf_extraction import open_pdf
+import config
+
+
+def build_completion_request(prompt, instructions, schema_key):
+    return {
+        "model": config.OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": instructions},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "response_schema",
+                "schema": schemas_dict[schema_key]
+            }
+        }
+    }
 
-api_key = os.getenv("OPENAI_API_KEY")
 
+# Campo acrescentado às respostas reaproveitadas de um prompt parecido (cache por similaridade)
+NEAR_HIT_FIELD = "CacheNearHit"
 
-def generate_completion(prompt, instructions, schema_key):
-    client = OpenAI(api_key=api_key)
-    schema = schemas_dict[schema_key]
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "response_schema",
-                    "schema": schema
-                }
-            }
-        )
+def generate_completion(prompt, instructions, schema_key, similar_text=None, similar_scope=""):
+    """
+    Com `similar_text` (o trecho do prompt que varia entre chamadas) e NEAR_CACHE_ENABLED, um prompt
+    sem entrada exata no cache reaproveita a resposta de um prompt quase igual do mesmo `similar_scope`
+    (só para os schemas de near_cache.NEAR_CACHE_SCHEMAS); a resposta vem marcada com NEAR_HIT_FIELD.
+    """
+    cache_key = completion_cache.make_key(config.OPENAI_MODEL, instructions, prompt, schema_key)
+    bypass_cache = is_bypassed()
+    similar_scope = f"{config.OPENAI_MODEL}:{similar_scope}"
+    use_near_cache = bool(similar_text) and config.NEAR_CACHE_ENABLED and near_cache.supports(schema_key)
+    vector = None
+
+    if bypass_cache:
+        completion_cache.record_bypass()
+    else:
+        with span("cache"):
+            cached_json = completion_cache.get(cache_key)
+        if cached_json is not None:
+            record_completion(schema_key, "cache")
+            return cached_json
+
+        if use_near_cache:
+            with span("near_cache"):
+                vector = near_cache.vector(similar_text)
+                near_key, similarity = near_cache.lookup(schema_key, similar_scope, similar_text, vector)
+                cached_json = completion_cache.get(near_key, record=False) if near_key else None
+            if cached_json is not None:
+                record_completion(schema_key, "near_cache")
+                cached_json[NEAR_HIT_FIELD] = {"Similarity": round(similarity, 4)}
+                return cached_json
+            if near_key:
+                near_cache.discard(schema_key, near_key)
+
+    def call_model():
+        completion_request = build_completion_request(prompt, instructions, schema_key)
+        messages = completion_request["messages"]
+
+        try:
+            for attempt in range(config.SCHEMA_VALIDATION_RETRIES + 1):
+                started = time.perf_counter()
+                with span("llm"):
+                    response = gateway.chat_completion(**completion_request)
+                record_completion(schema_key, "model", time.perf_counter() - started, response.usage)
+
+                raw_content = response.choices[0].message.content
+                try:
+                    with span("parse"):
+                        cleaned_json = decode_response(raw_content, schema_key)
+                    break
+                except SchemaValidationError as e:
+                    if attempt == config.SCHEMA_VALIDATION_RETRIES:
+                        raise
+                    record_completion(schema_key, "invalid")
+                    # Nova tentativa com a resposta anterior e os erros encontrados
+                    completion_request = dict(completion_request, messages=messages + [
+                        {"role": "assistant", "content": raw_content},
+                        {"role": "user", "content": f"A resposta não segue o schema ({e}). "
+                                                    "Responda novamente apenas com o JSON corrigido."}
+                    ])
+
+            completion_cache.set(cache_key, cleaned_json)
+            if use_near_cache:
+                near_cache.add(schema_key, similar_scope, similar_text,
+                               near_cache.vector(similar_text) if vector is None else vector, cache_key)
+            return cleaned_json
+        except RateLimitExceeded:
+            # Propaga para a rota responder 503 com Retry-After
+            raise
+        except Exception as e:
+            record_completion(schema_key, "error")
+            import traceback
+            print("Erro ao chamar a API:")
+            print(traceback.format_exc())
+            return {"error": str(e)}
+
+    def recheck_cache():
+        return None if bypass_cache else completion_cache.get(cache_key, record=False)
+
+    # Chamadas idênticas em andamento (neste worker ou em outros da máquina) compartilham o resultado
+    return completion_flight.do(cache_key, call_model, recheck_cache)
+
+
+def stream_completion(prompt, instructions, schema_key, array_key):
+    """
+    Versão em stream de generate_completion: gera ("item", objeto) para cada elemento de
+    `array_key` assim que o modelo o fecha e, ao final, ("done", resultado completo). O resultado
+    é validado contra o schema antes de ir para o cache; fora do schema, termina com ("error", ...).
+    """
+    completion_request = build_completion_request(prompt, instructions, schema_key)
+    cache_key = completion_cache.make_key(config.OPENAI_MODEL, instructions, prompt, schema_key)
 
-        raw_content = response.choices[0].message.content.replace("'", "\"")
-        parsed_json = json.loads(raw_content)
-        cleaned_json = clean_empty_keys(parsed_json)
+    if is_bypassed():
+        completion_cache.record_bypass()
+    else:
+        cached_json = completion_cache.get(cache_key)
+        if cached_json is not None:
+            record_completion(schema_key, "cache")
+            for item in cached_json.get(array_key, []):
+                yield "item", item
+            yield "done", cached_json
+            return
+
+    parser = IncrementalItemParser(array_key)
+    items = []
+    usage = []
+    started = time.perf_counter()
 
-        return cleaned_json
+    try:
+        for text in gateway.stream_chat_completion(on_usage=usage.append, **completion_request):
+            for item in parser.feed(text):
+                item = clean_empty_keys(item)
+                items.append(item)
+                yield "item", item
+
+        result = clean_empty_keys(parser.skeleton())
+        result[array_key] = items
+        record_completion(schema_key, "model", time.perf_counter() - started, usage[0] if usage else None)
+
+        # Mesma validação de generate_completion: resposta fora do schema não entra no cache compartilhado
+        with span("parse"):
+            result = validate(result, schema_key)
+    except SchemaValidationError as e:
+        record_completion(schema_key, "invalid")
+        yield "error", {"error": f"A resposta não segue o schema ({e})."}
+        return
+    except RateLimitExceeded as e:
+        yield "error", {"error": str(e), "retry_after": e.retry_after}
+        return
     except Exception as e:
-        import traceback
+        record_completion(schema_key, "error")
         print("Erro ao chamar a API:")
         print(traceback.format_exc())
-        return {"error": str(e)}
+        yield "error", {"error": str(e)}
+        return
+
+    completion_cache.set(cache_key, result)
+    yield "done", result
 
 
 # === 1️⃣ Extrair dados do edital ===
+# Pedido e modelo de JSON de cada campo; o modelo só recebe os campos que as regras não resolveram
+NOTICE_FIELD_PROMPTS = {
+    "NoticeTitle": ("- Título do edital", '"NoticeTitle": "..."'),
+    "NoticeDescription": ("- Breve descrição", '"NoticeDescription": "..."'),
+    "JobRoles": ("- Lista de vagas (nome e breve descrição)",
+                 '"JobRoles": [\n            {\n                "Name": "...",\n                "Description": "..."\n'
+                 '            }\n        ]')
+}
+
+
 def extract_notice_data(notice_text):
+    # Campos extraídos por regras com confiança alta dispensam o modelo
+    with span("rules"):
+        if config.NOTICE_RULES_ENABLED:
+            rules_view, rule_confidence = extract_notice_metadata(notice_text)
+        else:
+            rules_view, rule_confidence = {}, {}
+    rule_fields = resolved_fields(rule_confidence, config.NOTICE_RULES_MIN_CONFIDENCE)
+    resolved_view = {field: rules_view[field] for field in rule_fields}
+
+    if len(rule_fields) == len(NOTICE_FIELDS):
+        return {"ExamDataView": {"Notice": "EDITAL", **resolved_view}, "ExtractionPath": "rules",
+                "RuleFields": rule_fields, "RuleConfidence": rule_confidence}
+
+    missing_fields = [field for field in NOTICE_FIELDS if field not in rule_fields]
+
+    # Apenas os trechos mais relevantes para título, descrição e vagas vão para o prompt
+    with span("select"):
+        notice_excerpt, prompt_stats = select_relevant_text(notice_text, NOTICE_DATA_QUERY)
+
+    requested = "\n    ".join(NOTICE_FIELD_PROMPTS[field][0] for field in missing_fields)
+    json_fields = ",\n        ".join(NOTICE_FIELD_PROMPTS[field][1] for field in missing_fields)
+
+    # Nomes de vagas encontrados pelas regras (sem descrição no edital) orientam o modelo
+    role_hint = ""
+    if "JobRoles" in missing_fields and rule_confidence.get("JobRoleNames", 0.0) >= config.NOTICE_RULES_MIN_CONFIDENCE:
+        role_names = "; ".join(role["Name"] for role in rules_view["JobRoles"])
+        role_hint = f"\n    - Vagas já identificadas no edital: {role_names}"
+
     prompt = f"""
     Leia o edital abaixo e extraia as informações:
-    - Título do edital
-    - Breve descrição
-    - Lista de vagas (nome e breve descrição)
+    {requested}
     
     Atenção:
-    - Não leve em consideração os vazamentos de linha identificados por '/n'
+    - Não leve em consideração os vazamentos de linha identificados por '/n'{role_hint}
     """
 
     instruction = f"""
     Retorne no formato JSON conforme este modelo estruturado:
     {{
         "Notice": "EDITAL",
-        "NoticeTitle": "...",
-        "NoticeDescription": "...",
-        "JobRoles": [
-            {{
-                "Name": "...",
-                "Description": "..."
-            }}
-        ]
+        {json_fields}
     }}
     
     Edital:
-    {notice_text}
+    {notice_excerpt}
     """
 
-    gpt_response = generate_completion(prompt, instruction, 'exam_data_schema')
-    return {"ExamDataView": gpt_response}
+    gpt_response = generate_completion(prompt, instruction, exam_data_schema_key(missing_fields))
+
+    # O modelo responde só o que faltou; os campos das regras completam a resposta
+    extraction_path = "llm"
+    if rule_fields and "error" not in gpt_response:
+        gpt_response.update(resolved_view)
+        extraction_path = "hybrid"
+
+    result = {
+        "ExamDataView": gpt_response,
+        "PromptStats": prompt_stats,
+        "ExtractionPath": extraction_path,
+        "RuleFields": rule_fields,
+        "RuleConfidence": rule_confidence
+    }
+    return result
 
 
 # === 2️⃣ Procurar edital ===
@@ -130,8 +309,20 @@ def search_notice(prompt):
 
 
 # === 3️⃣ Extrair roadmap de estudos ===
-def extract_roadmap(notice_text, selected_job_role):
-    cleaned_notice = preprocess_notice(notice_text, selected_job_role)
+def build_roadmap_context(notice_text, selected_job_role):
+    """
+    Conteúdo do edital usado nos prompts de roadmap: (trechos da vaga, trechos relevantes, estatísticas).
+    """
+    with span("preprocess"):
+        cleaned_notice = preprocess_notice(notice_text, selected_job_role)
+    with span("select"):
+        notice_excerpt, prompt_stats = select_relevant_text(notice_text, f"{selected_job_role} {SYLLABUS_QUERY}")
+
+    return cleaned_notice, notice_excerpt, prompt_stats
+
+
+def build_roadmap_prompt(notice_text, selected_job_role):
+    cleaned_notice, notice_excerpt, prompt_stats = build_roadmap_context(notice_text, selected_job_role)
 
     prompt = f"""
     O MAIS IMPORTANTE E ANTES DE TUDO, ME DÊ RESPOSTA RÁPIDA E ASSERTIVA, RÁPIDA MESMO.
@@ -168,7 +359,7 @@ def extract_roadmap(notice_text, selected_job_role):
     7. A chave 'Order' de cada módulo e lição deve ser numérica e crescente.
     
     Aqui está o edital para análise:
-    {notice_text}
+    {notice_excerpt}
     """
 
     # Adicionando o formato final esperado com JSON bem estruturado
@@ -195,16 +386,200 @@ def extract_roadmap(notice_text, selected_job_role):
     }
     """
 
+    return prompt, instruction, prompt_stats
+
+
+def extract_roadmap(notice_text, selected_job_role):
+    prompt, instruction, prompt_stats = build_roadmap_prompt(notice_text, selected_job_role)
     gpt_response = generate_completion(prompt, instruction, 'roadmap_data_schema')
 
     if isinstance(gpt_response, dict):
-        return {"RoadmapDataView": gpt_response}
+        return {"RoadmapDataView": gpt_response, "PromptStats": prompt_stats}
     else:
         return {"error": "A resposta da API não está no formato esperado."}
 
 
+def stream_roadmap(notice_text, selected_job_role):
+    """
+    Gera cada módulo do roadmap assim que ele fica pronto e, ao final, o RoadmapDataView completo.
+    """
+    prompt, instruction, prompt_stats = build_roadmap_prompt(notice_text, selected_job_role)
+
+    for event, data in stream_completion(prompt, instruction, 'roadmap_data_schema', 'Modules'):
+        yield event, {"RoadmapDataView": data, "PromptStats": prompt_stats} if event == "done" else data
+
+
+def build_roadmap_skeleton_prompt(notice_text, selected_job_role):
+    cleaned_notice, notice_excerpt, prompt_stats = build_roadmap_context(notice_text, selected_job_role)
+
+    prompt = f"""
+    Abaixo estão as informações extraídas do edital para a vaga de {selected_job_role}:
+
+    {cleaned_notice}
+
+    Monte APENAS a estrutura de MÓDULOS temáticos de um roadmap de estudos (sem lições):
+
+    - A ordem importa (começo → intermediário → avançado)
+    - Deve cobrir o conteúdo técnico listado nas informações extraídas.
+    - Se houver POUCO conteúdo técnico ou NÃO HOUVER, use conteúdos técnicos reais vinculados a vaga.
+    """
+
+    instruction = f"""
+    Retorne APENAS 3 MÓDULOS, os mais conexos à vaga, cada um com título claro, descrição de pelo menos
+    duas frases e 'Order' numérico e crescente. Não deixe campos vazios.
+
+    Aqui está o edital para análise:
+    {notice_excerpt}
+
+    Formato esperado:
+    {{
+      "Title": "Roadmap de Estudos para [Vaga]",
+      "Description": "Descrição geral do roadmap...",
+      "Modules": [
+        {{
+          "Title": "Nome do módulo",
+          "Description": "Descrição detalhada do módulo...",
+          "Order": 1
+        }}
+      ]
+    }}
+    """
+
+    return prompt, instruction, prompt_stats
+
+
+def build_module_lessons_prompt(notice_text, roadmap_title, module):
+    module_excerpt, _ = select_relevant_text(
+        notice_text,
+        f"{module.get('Title', '')} {module.get('Description', '')}",
+        token_budget=config.ROADMAP_MODULE_TOKEN_BUDGET
+    )
+
+    prompt = f"""
+    Gere as lições do módulo "{module.get('Title')}" do "{roadmap_title}".
+
+    Descrição do módulo: {module.get('Description')}
+
+    - Entre 3 e 7 lições objetivas, claras e progressivas (começo → intermediário → avançado)
+    - Cada lição com descrição completa de pelo menos duas frases
+    - Apenas conteúdo do módulo, sem repetir temas de outros módulos
+    """
+
+    instruction = f"""
+    Retorne as lições no formato JSON, com 'Order' numérico e crescente e sem campos vazios:
+    {{
+      "Lessons": [
+        {{
+          "Title": "Nome da lição",
+          "Description": "Descrição da lição...",
+          "Order": 1
+        }}
+      ]
+    }}
+
+    Trechos do edital relacionados ao módulo:
+    {module_excerpt}
+    """
+
+    return prompt, instruction
+
+
+def generate_roadmap_skeleton(notice_text, selected_job_role):
+    prompt, instruction, prompt_stats = build_roadmap_skeleton_prompt(notice_text, selected_job_role)
+    skeleton = generate_completion(prompt, instruction, 'roadmap_skeleton_schema')
+
+    if "error" not in skeleton:
+        modules = sorted(skeleton.get("Modules", []), key=lambda m: m.get("Order", 0))
+        skeleton["Modules"] = [dict(module, Order=order) for order, module in enumerate(modules, start=1)]
+    return skeleton, prompt_stats
+
+
+def generate_module_lessons(notice_text, roadmap_title, module, regenerate=False):
+    """
+    Lições de um módulo, já numeradas. Cada módulo tem a sua própria entrada no cache de respostas;
+    `regenerate` ignora só a entrada deste módulo.
+    """
+    if regenerate:
+        set_bypass(True)
+
+    prompt, instruction = build_module_lessons_prompt(notice_text, roadmap_title, module)
+    gpt_response = generate_completion(prompt, instruction, 'roadmap_module_lessons_schema')
+    if "error" in gpt_response:
+        raise RuntimeError(gpt_response["error"])
+
+    lessons = sorted(gpt_response.get("Lessons", []), key=lambda l: l.get("Order", 0))
+    return dict(module, Lessons=[dict(lesson, Order=order) for order, lesson in enumerate(lessons, start=1)])
+
+
+def iter_roadmap_modules(notice_text, selected_job_role, regenerate_modules=()):
+    """
+    Roadmap em duas fases: uma chamada curta com os módulos e, em seguida, as lições de cada
+    módulo em paralelo (limitado por ROADMAP_MODULE_CONCURRENCY).
+
+    Gera ("skeleton", esqueleto), ("item", módulo completo) na ordem em que ficam prontos,
+    ("failure", falha de um módulo) e, ao final, ("done", resultado no formato de extract_roadmap).
+    """
+    skeleton, prompt_stats = generate_roadmap_skeleton(notice_text, selected_job_role)
+    if "error" in skeleton:
+        yield "error", skeleton
+        return
+
+    yield "skeleton", skeleton
+
+    modules = skeleton["Modules"]
+    completed = {}
+    failures = []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(config.ROADMAP_MODULE_CONCURRENCY, len(modules)))) as executor:
+        # Cada tarefa roda com uma cópia do contexto da requisição (bypass, prioridade, métricas)
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run, generate_module_lessons,
+                notice_text, skeleton.get("Title"), module, module["Order"] in regenerate_modules
+            ): module
+            for module in modules
+        }
+
+        for future in as_completed(futures):
+            module = futures[future]
+            try:
+                completed[module["Order"]] = future.result()
+            except RateLimitExceeded:
+                raise
+            except Exception as e:
+                failure = {"Order": module["Order"], "Title": module.get("Title"), "error": str(e)}
+                failures.append(failure)
+                yield "failure", failure
+                continue
+            yield "item", completed[module["Order"]]
+
+    roadmap = dict(skeleton, Modules=[completed[order] for order in sorted(completed)])
+    result = {"RoadmapDataView": roadmap, "PromptStats": prompt_stats, "GenerationMode": "two_phase"}
+    if failures:
+        result["Failures"] = sorted(failures, key=lambda f: f["Order"])
+    yield "done", result
+
+
+def extract_roadmap_two_phase(notice_text, selected_job_role, regenerate_modules=()):
+    for event, data in iter_roadmap_modules(notice_text, selected_job_role, regenerate_modules):
+        if event == "error":
+            return {"error": data["error"]}
+        if event == "done":
+            return data
+
+
+def stream_roadmap_two_phase(notice_text, selected_job_role, regenerate_modules=()):
+    """
+    Versão em stream do roadmap em duas fases; o limite de requisições vira um evento "error".
+    """
+    try:
+        yield from iter_roadmap_modules(notice_text, selected_job_role, regenerate_modules)
+    except RateLimitExceeded as e:
+        yield "error", {"error": str(e), "retry_after": e.retry_after}
+
+
 # === 4️⃣ Gerar questões ===
-def generate_questions(subject, quantity):
+def build_questions_prompt(subject, quantity, avoid_questions=()):
     title = subject.get("Title")
     description = subject.get("Description")
     assessment_type = subject.get("AssessmentType")
@@ -213,6 +588,12 @@ def generate_questions(subject, quantity):
     Gere {quantity} questões de múltipla escolha com 4 alternativas (A, B, C, D)
     sobre o tema "{title}" ({assessment_type}).
     """
+    if avoid_questions:
+        avoid_list = "\n".join(f"- {question}" for question in avoid_questions)
+        prompt += f"""
+    As questões devem ser DIFERENTES destas, já existentes:
+    {avoid_list}
+    """
 
     instruction = f"""
     Retorne no formato JSON:
@@ -233,49 +614,180 @@ def generate_questions(subject, quantity):
     {description}
     """
 
-    gpt_response = generate_completion(prompt, instruction, 'questions_schema')
-    return {"Questions": gpt_response}
+    return prompt, instruction
 
 
-def preprocess_notice(notice_text, selected_job_role):
+def generate_questions(subject, quantity):
+    prompt, instruction = build_questions_prompt(subject, quantity)
+    # Temas com a mesma quantidade e tipo que diferem só na redação compartilham as questões
+    gpt_response = generate_completion(
+        prompt, instruction, 'questions_schema',
+        similar_text=f"{subject.get('Title')}\n{subject.get('Description')}",
+        similar_scope=f"{quantity}:{subject.get('AssessmentType')}"
+    )
+    near_hit = gpt_response.pop(NEAR_HIT_FIELD, None)
+
+    result = {"Questions": gpt_response}
+    if near_hit:
+        result[NEAR_HIT_FIELD] = near_hit
+    return result
+
+
+def generate_questions_from_bank(subject, quantity, user_id=None):
     """
-    Função para limpar e extrair o conteúdo relevante do edital com base na vaga.
+    Completa `quantity` com questões do banco ainda não vistas pelo usuário e pede ao modelo só
+    o que faltar. As novas passam pela detecção de quase duplicadas antes de serem gravadas e devolvidas.
+    """
+    subject_id = question_bank_subject_key(subject)
+    with span("bank"):
+        questions = question_bank.take(subject_id, quantity, user_id)
+    from_bank = len(questions)
+    bank_stats = {"FromBank": from_bank, "Generated": 0, "DuplicatesDropped": 0, "InvalidDropped": 0}
+
+    shortfall = quantity - from_bank
+    if shortfall > 0:
+        # O prompt lista enunciados já guardados: muda a chave do cache e evita pedir as mesmas questões
+        avoid = question_bank.recent_texts(subject_id, config.QUESTION_BANK_AVOID_IN_PROMPT)
+        prompt, instruction = build_questions_prompt(subject, shortfall, avoid)
+        gpt_response = generate_completion(prompt, instruction, 'questions_schema')
+
+        if "error" in gpt_response:
+            if not questions:
+                return {"Questions": gpt_response, "QuestionBank": bank_stats}
+            bank_stats["error"] = gpt_response["error"]
+        else:
+            with span("bank"):
+                stored, duplicates, invalid = question_bank.add(subject_id, gpt_response.get("Questions", []))
+            questions += stored[:shortfall]
+            bank_stats.update(Generated=len(stored[:shortfall]), DuplicatesDropped=duplicates, InvalidDropped=invalid)
+
+    if user_id and len(questions) < quantity:
+        # Só como último recurso (o modelo não trouxe nada novo) o usuário recebe questões já vistas
+        returned = {question["QuestionId"] for question in questions}
+        repeated = [
+            question for question in question_bank.take(subject_id, quantity + len(returned))
+            if question["QuestionId"] not in returned
+        ][:quantity - len(questions)]
+        questions += repeated
+        bank_stats["Repeated"] = len(repeated)
+
+    question_bank.mark_seen(user_id, [question["QuestionId"] for question in questions])
+
+    origin = subject.get("AssessmentType")
+    for order, question in enumerate(questions, start=1):
+        question["Order"] = order
+        if origin in ("Assessment", "Module", "Lesson"):
+            question["Origin"] = origin
+
+    return {"Questions": {"Questions": questions}, "QuestionBank": bank_stats}
+
+
+def roadmap_subjects(roadmap):
+    """
+    Lista de temas (um por lição) de um RoadmapDataView, no formato aceito por generate_questions.
     """
-    relevant_sections = []
+    roadmap = roadmap.get("RoadmapDataView", roadmap)
+    subjects = []
 
-    patterns = [
-        rf"(?<=\bCONTEÚDOS PROGRAMÁTICOS\b)(.*?)(?=\b(PROGRAMA DA PROVA|CONHECIMENTOS BÁSICOS|CONHECIMENTOS ESPECÍFICOS)\b)",
-        rf"(?<=\b{re.escape(selected_job_role)}\b)(.*?)(?=\n|$)",
-        r"\n\s*\n",
-        r"\t",
-    ]
+    for module in sorted(roadmap.get("Modules", []), key=lambda m: m.get("Order", 0)):
+        for lesson in sorted(module.get("Lessons", []), key=lambda l: l.get("Order", 0)):
+            subjects.append({
+                "Title": lesson.get("Title"),
+                "Description": lesson.get("Description"),
+                "AssessmentType": "Lesson",
+                "Module": module.get("Title")
+            })
+
+    return subjects
+
+
+# Campos da resposta de cada tema repassados para o seu item em "Results"
+BATCH_RESULT_FIELDS = (NEAR_HIT_FIELD, "QuestionBank", "Prefetched")
+
+
+def generate_questions_batch(subjects, quantity, generate=generate_questions):
+    """
+    Gera questões para vários temas em paralelo (limitado por QUESTIONS_BATCH_CONCURRENCY).
+    `generate(subject, quantity)` responde cada tema no formato de generate_questions (a rota usa o
+    mesmo caminho de /generate_questions, com banco e questões pré-geradas).
+    Falhas de um tema são reportadas em "Failures" sem derrubar o lote.
+    """
+    with ThreadPoolExecutor(max_workers=config.QUESTIONS_BATCH_CONCURRENCY) as executor:
+        # Cada tarefa roda com uma cópia do contexto da requisição (ex.: bypass do cache)
+        futures = [
+            executor.submit(contextvars.copy_context().run, generate, subject, quantity) for subject in subjects
+        ]
+
+        results = []
+        failures = []
+        merged_questions = []
+
+        for index, (subject, future) in enumerate(zip(subjects, futures)):
+            try:
+                response = future.result()
+                gpt_response = response["Questions"]
+                if "error" in gpt_response:
+                    raise RuntimeError(gpt_response["error"])
+                questions = gpt_response.get("Questions", [])
+            except Exception as e:
+                failures.append({"Index": index, "Title": subject.get("Title"), "error": str(e)})
+                continue
+
+            origin = subject.get("AssessmentType")
+            for order, question in enumerate(questions, start=1):
+                question["Order"] = order
+                if origin in ("Assessment", "Module", "Lesson"):
+                    question["Origin"] = origin
+
+            result = {"Index": index, "Title": subject.get("Title"), "Questions": questions}
+            for field in BATCH_RESULT_FIELDS:
+                if field in response:
+                    result[field] = response[field]
+            results.append(result)
+            merged_questions.extend(questions)
+
+    # Ordem global estável: segue a ordem dos temas enviados
+    merged_questions = [dict(question, Order=order) for order, question in enumerate(merged_questions, start=1)]
+
+    return {"Results": results, "Questions": merged_questions, "Failures": failures}
+
+
+def stream_questions(subject, quantity):
+    """
+    Gera cada questão assim que ela fica pronta e, ao final, a resposta no mesmo formato de generate_questions.
+    """
+    prompt, instruction = build_questions_prompt(subject, quantity)
 
-    for pattern in patterns:
-        matches = re.findall(pattern, notice_text, re.DOTALL)
-        relevant_sections.extend(matches)
+    for event, data in stream_completion(prompt, instruction, 'questions_schema', 'Questions'):
+        yield event, {"Questions": data} if event == "done" else data
 
-    cleaned_notice = ' '.join(relevant_sections).strip()
+
+def preprocess_notice(notice_text, selected_job_role):
+    """
+    Função para limpar e extrair o conteúdo relevante do edital com base na vaga.
+    """
+    index = get_notice_index(notice_text)
+
+    spans = index.syllabus_spans() + index.role_line_spans(selected_job_role)
+    cleaned_notice = ' '.join(index.section(span) for span in spans).strip()
 
     return cleaned_notice
 
 
 def clean_empty_keys(response_data):
-    if isinstance(response_data, dict):
-        return {key: clean_empty_keys(value) for key, value in response_data.items() if value not in [None, "", {}, []]}
-    elif isinstance(response_data, list):
-        return [clean_empty_keys(item) for item in response_data if item not in [None, "", {}, []]]
-    else:
-        return response_data
+    return prune_empty(response_data)
 
 
 def extract_job_related_content(notice_text, selected_job_role):
+    notice_excerpt, _ = select_relevant_text(notice_text, f"{selected_job_role} {SYLLABUS_QUERY}")
+
     prompt = f"""
     Leia o edital abaixo e extraia SOMENTE as partes relacionadas aos conteúdos técnicos necessários
     para a vaga de "{selected_job_role}". Se houver uma seção de "Conteúdos Programáticos", extraia essa parte.
     Caso contrário, gere um resumo com os tópicos técnicos mais comuns para essa vaga.
 
     Edital:
-    {notice_text}
+    {notice_excerpt}
     """
 
     instruction = """
@@ -299,41 +811,25 @@ def extract_job_related_content(notice_text, selected_job_role):
 
 
 def extract_programmatic_contents(text):
-    patterns = [
-        r"CONTEÚDOS PROGRAMÁTICOS(.*)",
-        r"PROGRAMA DA PROVA(.*)",
-        r"CONHECIMENTOS ESPECÍFICOS(.*)",
-        r"CONHECIMENTOS BÁSICOS(.*)"
-    ]
+    span = get_notice_index(text).programmatic_span()
 
-    for p in patterns:
-        m = re.search(p, text, re.IGNORECASE | re.DOTALL)
-        if m:
-            return m.group(1).strip()
+    if span:
+        return text[span[0]:span[1]].strip()
 
     return None
 
 
 def clean_pdf_text(text):
-    text = re.sub(r'\n\s*\n', '\n', text)
-    text = re.sub(r' {2,}', ' ', text)
-    text = re.sub(r'^\s+', '', text, flags=re.MULTILINE)
-    text = text.lstrip()
-    text = text.replace("\t", " ").replace("\r", " ")
-
-    return text.strip()
+    """
+    Texto do edital normalizado em uma passada (ver text_normalizer.py).
+    """
+    text, _ = normalize_text(text)
+    return text
 
 
 def extract_text_from_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = ""
-
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        text += page.get_text("text") + "\n"
-
-    doc.close()
-    return text
+    with open_pdf(pdf_path) as doc:
+        return "".join(doc.load_page(page_num).get_text("text") + "\n" for page_num in range(len(doc)))
 
 
 def generate_test_response(prompt):
@@ -347,9 +843,5 @@ def generate_test_response(prompt):
 
 # === Utilitário para ler PDFs (Somente para testes locais, é responsabilidade do backend)===
 def extract_data_from_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page_num in range(doc.page_count):
-        page = doc.load_page(page_num)
-        text += page.get_text("text")
-    return text
+    with open_pdf(pdf_path) as doc:
+        return "".join(doc.load_page(page_num).get_text("text") for page_num in range(doc.page_count))
@@ -0,0 +1,110 @@
+import copy
+import os
+import threading
+import time
+
+from filelock import FileLock, Timeout
+
+import config
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas idênticas em andamento: requisições com a mesma chave esperam a
+    chamada líder e recebem uma cópia do seu resultado.
+
+    Entre threads do mesmo worker a espera é feita em memória. Entre workers da mesma
+    máquina, o líder de cada processo disputa um file lock por chave e, ao obtê-lo,
+    verifica primeiro o cache compartilhado (`recheck`) antes de chamar o modelo.
+    """
+
+    PRUNE_EVERY = 200
+    PRUNE_AGE = 3600
+
+    def __init__(self, lock_dir, lock_timeout):
+        self.lock_dir = lock_dir
+        self.lock_timeout = lock_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {"leader_calls": 0, "coalesced_in_process": 0, "coalesced_cross_process": 0}
+        self._leader_count = 0
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def do(self, key, fn, recheck=None):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            call.done.wait()
+            self._count("coalesced_in_process")
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = self._lead(key, fn, recheck)
+            return copy.deepcopy(call.result)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _lead(self, key, fn, recheck):
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._maybe_prune()
+
+        try:
+            with FileLock(os.path.join(self.lock_dir, f"{key}.lock"), timeout=self.lock_timeout):
+                # Outro worker pode ter concluído a mesma chamada enquanto esperávamos o lock
+                if recheck is not None:
+                    result = recheck()
+                    if result is not None:
+                        self._count("coalesced_cross_process")
+                        return result
+
+                self._count("leader_calls")
+                return fn()
+        except Timeout:
+            self._count("leader_calls")
+            return fn()
+
+    def _maybe_prune(self):
+        with self._lock:
+            self._leader_count += 1
+            if self._leader_count % self.PRUNE_EVERY:
+                return
+
+        cutoff = time.time() - self.PRUNE_AGE
+        for name in os.listdir(self.lock_dir):
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+completion_flight = SingleFlight(config.SINGLEFLIGHT_LOCK_DIR, config.SINGLEFLIGHT_LOCK_TIMEOUT)
@@ -0,0 +1,23 @@
+"""
+Ambiente dos testes: as configurações são lidas no import de config, então DATA_DIR temporário,
+servidor falso da OpenAI e limites de teste são definidos antes de qualquer módulo do app ser importado.
+"""
+import os
+import tempfile
+
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="tests-")
+os.environ["OPENAI_API_KEY"] = "test"
+os.environ["OPENAI_BASE_URL"] = FakeOpenAIServer(latency=0.0).start()
+os.environ["RATE_LIMIT_RPM"] = "0"
+# Uploads de teste acima deste tamanho passam pelo caminho do mmap
+os.environ["PDF_MMAP_THRESHOLD"] = "1024"
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
@@ -0,0 +1,122 @@
+import contextvars
+import os
+import sqlite3
+import tempfile
+import uuid
+
+import zstandard
+
+import cache
+from cache import CompletionCache, DiskCache, LRUCache, completion_cache, is_bypassed, set_bypass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def frozen_clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return clock
+
+
+def temp_path(name):
+    return os.path.join(tempfile.mkdtemp(prefix="cache-"), name)
+
+
+def test_lru_entries_expire_after_ttl(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    memory = LRUCache(max_size=4, ttl=10)
+    memory.set("a", "1")
+
+    clock.now += 9
+    assert memory.get("a") == "1"
+    clock.now += 2
+    assert memory.get("a") is None
+    assert len(memory) == 0
+
+
+def test_lru_evicts_least_recently_used():
+    memory = LRUCache(max_size=2, ttl=60)
+    memory.set("a", "1")
+    memory.set("b", "2")
+    memory.get("a")
+    memory.set("c", "3")
+
+    assert memory.get("b") is None
+    assert (memory.get("a"), memory.get("c")) == ("1", "3")
+
+
+def test_disk_entries_expire_after_ttl(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    disk = DiskCache(temp_path("disk.sqlite3"), ttl=10)
+    disk.set("a", "1")
+    disk.set("b", "2")
+
+    clock.now += 11
+    assert not disk.contains("a")
+    assert disk.get("a") is None
+    disk.prune()
+    assert sqlite3.connect(disk.path).execute("SELECT COUNT(*) FROM entries").fetchone() == (0,)
+
+
+def test_disk_store_without_ttl_never_expires(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    disk = DiskCache(temp_path("store.sqlite3"), ttl=None)
+    disk.set("a", "1")
+
+    clock.now += 10 * 365 * 86400
+    assert disk.contains("a")
+    assert disk.get("a") == "1"
+
+
+def test_disk_values_round_trip_through_zstd():
+    disk = DiskCache(temp_path("zstd.sqlite3"), ttl=None)
+    value = "CONTEÚDOS PROGRAMÁTICOS – Língua Portuguesa ✓\n" * 200
+    disk.set("edital", value)
+
+    stored, = sqlite3.connect(disk.path).execute("SELECT value FROM entries WHERE key = 'edital'").fetchone()
+    assert len(stored) < len(value.encode("utf-8")) // 10
+    assert zstandard.ZstdDecompressor().decompress(stored).decode("utf-8") == value
+    assert disk.get("edital") == value
+
+
+def test_completion_cache_falls_back_to_disk_and_returns_copies():
+    completions = CompletionCache(temp_path("completions.sqlite3"), max_size=8, ttl=60)
+    completions.set("k", {"Questions": [{"Question": "Q1"}]})
+    completions.memory.clear()
+
+    first = completions.get("k")
+    first["Questions"].append({"Question": "alterada"})
+
+    assert completions.get("k") == {"Questions": [{"Question": "Q1"}]}
+    stats = completions.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_bypass_stays_in_its_context():
+    def bypassed_request():
+        set_bypass(True)
+        return is_bypassed()
+
+    assert contextvars.copy_context().run(bypassed_request) is True
+    assert is_bypassed() is False
+
+
+def test_bypass_header_skips_the_cache_for_one_request(client):
+    prompt = f"Concurso {uuid.uuid4()}"
+    client.post("/search_notice", json={"prompt": prompt})
+    before = completion_cache.stats()
+
+    bypassed = client.post("/search_notice", json={"prompt": prompt}, headers={"X-Cache-Bypass": "1"})
+    cached = client.post("/search_notice", json={"prompt": prompt})
+
+    after = completion_cache.stats()
+    assert bypassed.status_code == cached.status_code == 200
+    assert after["bypassed"] == before["bypassed"] + 1
+    assert after["memory_hits"] == before["memory_hits"] + 1
+    assert after["writes"] == before["writes"] + 1
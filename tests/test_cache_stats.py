@@ -0,0 +1,11 @@
+from benchmarks import corpus
+
+
+def test_cache_stats_reports_prompt_selection(client):
+    before = client.get("/cache_stats").get_json()["relevance"]
+
+    client.post("/extract_notice_data", json={"notice": corpus.notice_text("large"), "echo_notice": False})
+
+    after = client.get("/cache_stats").get_json()["relevance"]
+    assert after["selections"] == before["selections"] + 1
+    assert after["saved_tokens"] == after["original_tokens"] - after["selected_tokens"]
@@ -0,0 +1,26 @@
+import os
+import runpy
+import subprocess
+import sys
+
+import config
+
+
+def read_config(**env):
+    code = "import config; print(config.RATE_LIMIT_MAX_WAIT_INTERACTIVE, config.RATE_LIMIT_MAX_WAIT_BULK, config.JOB_EVENTS_TIMEOUT)"
+    output = subprocess.run([sys.executable, "-c", code], env=dict(os.environ, **env),
+                            capture_output=True, text=True, check=True).stdout
+    return [float(value) for value in output.split()]
+
+
+def test_waits_stay_below_the_worker_timeout():
+    assert max(config.RATE_LIMIT_MAX_WAIT_INTERACTIVE, config.RATE_LIMIT_MAX_WAIT_BULK,
+               config.JOB_EVENTS_TIMEOUT) < config.WORKER_TIMEOUT
+
+
+def test_waits_follow_a_shorter_worker_timeout():
+    assert read_config(WORKER_TIMEOUT="20", RATE_LIMIT_MAX_WAIT_BULK="60") == [10.0, 10.0, 15.0]
+
+
+def test_gunicorn_uses_the_configured_timeout():
+    assert runpy.run_path("gunicorn.conf.py")["timeout"] == config.WORKER_TIMEOUT
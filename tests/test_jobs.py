@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from jobs import JobQueue
+from rate_limiter import BULK, INTERACTIVE, current_priority, set_priority
+
+
+def make_queue(workers=1):
+    path = os.path.join(tempfile.mkdtemp(prefix="jobs-"), "jobs.sqlite3")
+    return JobQueue(path, workers, poll_interval=0.05, stale_after=60, ttl=3600)
+
+
+def wait_done(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (JobQueue.DONE, JobQueue.FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} não terminou")
+
+
+def test_priority_does_not_leak_between_jobs():
+    queue = make_queue()
+
+    def bulk(payload):
+        set_priority(BULK)
+        return {"priority": current_priority()}, 200
+
+    queue.register("bulk", bulk)
+    queue.register("interactive", lambda payload: ({"priority": current_priority()}, 200))
+
+    first = wait_done(queue, queue.submit("bulk", {}))
+    second = wait_done(queue, queue.submit("interactive", {}))
+
+    assert first["result"] == {"priority": BULK}
+    assert second["result"] == {"priority": INTERACTIVE}
+
+
+def test_worker_survives_busy_database_while_pruning(monkeypatch):
+    queue = make_queue()
+    queue.register("echo", lambda payload: (payload, 200))
+    prunes = []
+
+    def busy_prune():
+        prunes.append(time.time())
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(queue, "prune", busy_prune)
+    queue.ensure_workers()
+    time.sleep(0.2)
+
+    job = wait_done(queue, queue.submit("echo", {"ok": True}))
+    assert prunes
+    assert job["result"] == {"ok": True}
+
+
+def test_job_events_stream_is_bounded(client, monkeypatch):
+    from jobs import job_queue
+    import config
+
+    release = threading.Event()
+    def wait_release(payload):
+        release.wait(5)
+        return {}, 200
+
+    job_queue.register("test_wait", wait_release)
+    monkeypatch.setattr(config, "JOB_EVENTS_TIMEOUT", 0.3)
+    job_id = job_queue.submit("test_wait", {})
+
+    try:
+        started = time.monotonic()
+        body = client.get(f"/jobs/{job_id}/events").get_data(as_text=True)
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 3
+    assert "event: timeout" in body
+    assert "retry: " in body
+
+
+def test_worker_survives_busy_database_while_finishing(monkeypatch):
+    queue = make_queue()
+    queue.register("echo", lambda payload: (payload, 200))
+    finish = queue._finish
+    failures = []
+
+    def busy_twice(*args, **kwargs):
+        # O resultado e o registro da falha encontram o banco ocupado
+        if len(failures) < 2:
+            failures.append(args)
+            raise sqlite3.OperationalError("database is locked")
+        return finish(*args, **kwargs)
+
+    monkeypatch.setattr(queue, "_finish", busy_twice)
+    queue.ensure_workers()
+
+    first_id = queue.submit("echo", {"n": 1})
+    second = wait_done(queue, queue.submit("echo", {"n": 2}))
+
+    assert len(failures) == 2
+    assert queue.get(first_id)["status"] == JobQueue.RUNNING
+    assert second["result"] == {"n": 2}
@@ -0,0 +1,104 @@
+import copy
+
+import jsonschema
+import orjson
+import pytest
+
+from json_pipeline import SchemaValidationError, decode_response
+from models import schemas_dict
+
+QUESTION = {
+    "Question": "Qual camada do modelo OSI roteia pacotes?",
+    "OptionA": "Física", "OptionB": "Rede", "OptionC": "Sessão", "OptionD": "Aplicação",
+    "CorrectOption": "B", "Order": 1, "Origin": "Lesson"
+}
+
+
+def questions(**changes):
+    question = dict(QUESTION, **changes)
+    return {"Questions": [{key: value for key, value in question.items() if value is not ...}]}
+
+
+def without(payload, path, key):
+    payload = copy.deepcopy(payload)
+    target = payload
+    for step in path:
+        target = target[step]
+    del target[key]
+    return payload
+
+
+# (schema, resposta, válida segundo o JSON Schema)
+CASES = {
+    "valid": ("questions_schema", questions(), True),
+    "integral float as integer": ("questions_schema", questions(Order=2.0), True),
+    "empty array": ("questions_schema", {"Questions": []}, True),
+    "missing required": ("questions_schema", questions(CorrectOption=...), False),
+    "value outside enum": ("questions_schema", questions(CorrectOption="E"), False),
+    "string as integer": ("questions_schema", questions(Order="1"), False),
+    "boolean as integer": ("questions_schema", questions(Order=True), False),
+    "fractional integer": ("questions_schema", questions(Order=1.5), False),
+    "number as string": ("questions_schema", questions(OptionA=3), False),
+    "object instead of array": ("questions_schema", {"Questions": QUESTION}, False),
+    "array at the root": ("questions_schema", [QUESTION], False),
+    "missing root field": ("exam_data_schema", {"Notice": "EDITAL", "NoticeTitle": "x", "NoticeDescription": "y"}, False),
+    "missing nested field": ("exam_data_schema", without(
+        {"Notice": "EDITAL", "NoticeTitle": "x", "NoticeDescription": "y",
+         "JobRoles": [{"Name": "Enfermeiro", "Description": "Atende pacientes."}]},
+        ["JobRoles", 0], "Description"), False),
+}
+
+
+@pytest.mark.parametrize("schema_key, payload, valid", CASES.values(), ids=CASES.keys())
+def test_accepts_and_rejects_like_json_schema(schema_key, payload, valid):
+    raw = orjson.dumps(payload)
+
+    if valid:
+        decode_response(raw, schema_key)
+    else:
+        with pytest.raises(SchemaValidationError):
+            decode_response(raw, schema_key)
+
+
+@pytest.mark.parametrize("schema_key, payload, valid", CASES.values(), ids=CASES.keys())
+def test_cases_agree_with_jsonschema(schema_key, payload, valid):
+    assert jsonschema.Draft202012Validator(schemas_dict[schema_key]).is_valid(payload) is valid
+
+
+def test_integral_float_is_converted_and_empty_values_dropped():
+    decoded = decode_response(orjson.dumps(questions(Order=2.0, OptionD="")), "questions_schema")
+
+    assert decoded["Questions"][0]["Order"] == 2
+    assert type(decoded["Questions"][0]["Order"]) is int
+    assert "OptionD" not in decoded["Questions"][0]
+    assert decode_response(b'{"Questions": []}', "questions_schema") == {}
+
+
+def test_extra_fields_and_nulls_are_tolerated():
+    # Diferenças intencionais em relação ao JSON Schema: campos fora do schema (ex.: "Link" de search_notice)
+    # são mantidos e null conta como valor vazio, como no antigo clean_empty_keys
+    decoded = decode_response(orjson.dumps(questions(Link="https://exemplo", OptionD=None)), "questions_schema")
+
+    assert decoded["Questions"][0]["Link"] == "https://exemplo"
+    assert "OptionD" not in decoded["Questions"][0]
+
+
+def test_errors_list_every_problem_with_its_path():
+    payload = {"Questions": [questions(CorrectOption="E")["Questions"][0], questions(Order="1")["Questions"][0]]}
+
+    with pytest.raises(SchemaValidationError) as error:
+        decode_response(orjson.dumps(payload), "questions_schema")
+
+    assert error.value.errors == [
+        "Questions[0].CorrectOption: 'E' não está em ['A', 'B', 'C', 'D']",
+        "Questions[1].Order: esperado inteiro"
+    ]
+
+
+def test_invalid_json():
+    with pytest.raises(SchemaValidationError, match="JSON inválido"):
+        decode_response("{'Questions': []}", "questions_schema")
+
+
+def test_schema_without_validator_only_prunes():
+    assert decode_response(b'{"a": "", "b": [null, 1]}', "unknown_schema") == {"b": [1]}
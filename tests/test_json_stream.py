@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalItemParser
+
+ROADMAP = {
+    "Title": "Roadmap \"TI\" {nível superior}",
+    "Description": "Chaves } e colchetes ] dentro de strings, barra \\ e unicode ção",
+    "Modules": [
+        {"Title": "Redes", "Order": 1, "Lessons": [{"Title": "OSI [camadas]", "Order": 1}]},
+        {"Title": "Banco de dados", "Order": 2, "Lessons": []},
+        {"Title": "Segurança \"aplicada\"", "Order": 3, "Tags": ["a,b", "{c}"]}
+    ],
+    "Notes": {"Modules": ["não é o array alvo"]}
+}
+
+
+def parse(text, sizes):
+    """
+    Alimenta o parser com pedaços de tamanho alternado entre `sizes` e devolve (itens, esqueleto).
+    """
+    parser = IncrementalItemParser("Modules")
+    items = []
+    position = 0
+    index = 0
+    while position < len(text):
+        size = sizes[index % len(sizes)]
+        items += parser.feed(text[position:position + size])
+        position += size
+        index += 1
+    return items, parser.skeleton()
+
+
+@pytest.mark.parametrize("sizes", [[1], [2], [3], [7], [1, 5, 2], [len(json.dumps(ROADMAP))]])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_chunk_boundaries_do_not_change_the_result(sizes, indent):
+    text = json.dumps(ROADMAP, ensure_ascii=False, indent=indent)
+
+    items, skeleton = parse(text, sizes)
+
+    assert items == ROADMAP["Modules"]
+    assert skeleton == dict(ROADMAP, Modules=[])
+
+
+def test_every_split_point_of_an_escaped_key_and_value():
+    text = json.dumps({"Modu\\les": 1, "Modules": [{"T\"itle": "a\\\"}b"}]})
+
+    for split in range(1, len(text)):
+        parser = IncrementalItemParser("Modules")
+        items = parser.feed(text[:split]) + parser.feed(text[split:])
+        assert items == [{"T\"itle": "a\\\"}b"}], split
+        assert parser.skeleton() == {"Modu\\les": 1, "Modules": []}
+
+
+def test_items_are_emitted_as_soon_as_they_close():
+    parser = IncrementalItemParser("Modules")
+
+    assert parser.feed('{"Title": "x", "Modules": [{"Order": 1}') == [{"Order": 1}]
+    assert parser.feed(', {"Order": 2') == []
+    assert parser.feed('}]}') == [{"Order": 2}]
+    assert parser.items_count == 2
@@ -0,0 +1,85 @@
+import numpy as np
+
+import services
+from benchmarks import corpus
+from near_cache import NearDuplicateCache, is_near_duplicate, normalize_for_similarity
+
+SCHEMA = "questions_schema"
+SCOPE = "gpt:5:Lesson"
+
+
+def make_cache():
+    return NearDuplicateCache(threshold=0.99, max_size=8, dim=4096, ngram=3, min_jaccard=0.9)
+
+
+def index(cache, text, cache_key):
+    cache.add(SCHEMA, SCOPE, text, cache.vector(text), cache_key)
+
+
+def lookup(cache, text, scope=SCOPE):
+    return cache.lookup(SCHEMA, scope, text, cache.vector(text))[0]
+
+
+def test_reuses_formatting_variant():
+    cache = make_cache()
+    index(cache, "Redes de Computadores –\nModelo OSI e TCP/IP.", "redes")
+
+    assert lookup(cache, "redes de computadores\nmodelo osi, e TCP/IP") == "redes"
+
+
+def test_requires_same_scope():
+    cache = make_cache()
+    index(cache, "Redes de computadores\nModelo OSI", "redes")
+
+    assert lookup(cache, "Redes de computadores\nModelo OSI", scope="gpt:10:Lesson") is None
+
+
+def test_rejects_numbered_subjects():
+    cache = make_cache()
+    index(cache, "Direito Constitucional I\nPrincípios fundamentais", "dc1")
+
+    assert lookup(cache, "Direito Constitucional II\nPrincípios fundamentais") is None
+    assert cache.stats()["near_hits"] == 0
+
+
+def test_rejects_unrelated_halves_of_a_document():
+    with open("README.md", encoding="utf-8") as file:
+        text = file.read()
+    half = len(text) // 2
+
+    assert not is_near_duplicate(normalize_for_similarity(text[:half]), normalize_for_similarity(text[half:]), 0.9, 3)
+
+
+def test_rejects_notices_from_the_same_template():
+    first = "".join(corpus.notice_pages(20, seed=1))
+    second = first.replace("PREFEITURA MUNICIPAL DE EXEMPLO", "PREFEITURA MUNICIPAL DE OUTRA CIDADE")
+    second = second.replace("01/2025", "07/2024")
+    cache = make_cache()
+
+    # O cosseno sozinho não distingue os dois editais
+    assert float(cache.vector(first) @ cache.vector(second)) > 0.99
+    assert not is_near_duplicate(normalize_for_similarity(first), normalize_for_similarity(second), 0.9, 3)
+
+
+def test_notice_extraction_never_uses_the_index(monkeypatch):
+    monkeypatch.setattr(services.config, "NEAR_CACHE_ENABLED", True)
+    lookups = []
+    monkeypatch.setattr(services.near_cache, "lookup", lambda *args: lookups.append(args) or (None, 0.0))
+
+    services.generate_completion("prompt do edital", "instruções", "exam_data_schema", similar_text="edital")
+
+    assert lookups == []
+    assert not services.near_cache.supports("exam_data_schema")
+
+
+def test_discard_keeps_rows_contiguous():
+    cache = make_cache()
+    for number, text in enumerate(["alfa beta gama", "delta epsilon zeta", "eta teta iota"]):
+        index(cache, text, f"k{number}")
+    cache.discard(SCHEMA, "k0")
+
+    schema_index = cache._indexes[SCHEMA]
+    assert sorted(schema_index.rows.values()) == [0, 1]
+    assert all(schema_index.keys[row] == key for key, row in schema_index.rows.items())
+    assert np.allclose(schema_index.vectors[schema_index.rows["k2"]], cache.vector("eta teta iota"))
+    assert lookup(cache, "eta teta iota") == "k2"
@@ -0,0 +1,34 @@
+import pytest
+
+import services
+from benchmarks import corpus
+from benchmarks.micro import _legacy_programmatic_contents
+from notice_index import NoticeIndex
+
+EDGES = [
+    "",
+    "sem títulos",
+    "Anexo I - conteúdos programáticos\nLíngua Portuguesa",
+    "PROGRAMA DA PROVA\nA\nCONTEÚDOS PROGRAMÁTICOS\nB",
+    "QUADRO: CONHECIMENTOS BÁSICOS\nCONHECIMENTOS ESPECÍFICOS\nC",
+    "PRECONTEÚDOS PROGRAMÁTICOSX\nresto",
+]
+
+
+@pytest.mark.parametrize("text", EDGES + ["".join(corpus.notice_pages(pages)) for pages in (5, 40)])
+def test_programmatic_contents_matches_legacy_search(text):
+    assert services.extract_programmatic_contents(text) == _legacy_programmatic_contents(text)
+
+
+def test_programmatic_span_does_not_build_the_full_index():
+    index = NoticeIndex("".join(corpus.notice_pages(20)))
+
+    assert index.programmatic_span()
+    assert "headings" not in vars(index)
+    assert "cargos" not in vars(index)
+
+
+def test_headings_respect_word_boundaries():
+    index = NoticeIndex("PRECONTEÚDOS PROGRAMÁTICOS\nconteúdos programáticos\nPrograma da Prova")
+
+    assert [kind for _, _, kind in index.headings] == ["CONTEÚDOS PROGRAMÁTICOS", "PROGRAMA DA PROVA"]
@@ -0,0 +1,84 @@
+import services
+from benchmarks import corpus
+from notice_rules import extract_notice_metadata, resolved_fields
+
+NOTICE = """PREFEITURA MUNICIPAL DE EXEMPLO
+EDITAL Nº 3/2024
+O Prefeito Municipal torna público a abertura de inscrições para o concurso público de provimento de cargos efetivos.
+1. DAS VAGAS
+CARGO VAGAS ESCOLARIDADE
+Agente Comunitário 12 Ensino médio
+Reserva de 20 por cento das vagas para pessoas com deficiência.
+2. DAS INSCRIÇÕES
+CARGO: AGENTE COMUNITÁRIO
+ATRIBUIÇÕES: Realizar visitas domiciliares e acompanhar as famílias da área de abrangência.
+"""
+
+
+def test_rejects_prose_rows():
+    view, confidence = extract_notice_metadata(NOTICE)
+
+    assert [role["Name"] for role in view["JobRoles"]] == ["AGENTE COMUNITÁRIO"]
+    assert confidence["JobRoles"] == 1.0
+
+
+def test_descriptions_come_from_the_notice():
+    view, _ = extract_notice_metadata(NOTICE)
+
+    assert view["JobRoles"][0]["Description"].startswith("Realizar visitas domiciliares")
+
+
+def test_roles_without_duties_are_not_resolved():
+    view, confidence = extract_notice_metadata("".join(corpus.notice_pages(20)))
+
+    assert all("Description" not in role for role in view["JobRoles"])
+    assert confidence["JobRoles"] == 0.0
+    assert confidence["JobRoleNames"] == 1.0
+    assert resolved_fields(confidence, 0.9) == ["NoticeTitle", "NoticeDescription"]
+
+
+def test_title_without_organization_is_low_confidence():
+    _, confidence = extract_notice_metadata("EDITAL Nº 3/2024\nCARGO: ENFERMEIRO\n")
+
+    assert 0 < confidence["NoticeTitle"] < 0.9
+
+
+def test_rules_path_skips_the_model(monkeypatch):
+    monkeypatch.setattr(services, "generate_completion", fail_if_called)
+
+    result = services.extract_notice_data(NOTICE)
+
+    assert result["ExtractionPath"] == "rules"
+    assert result["ExamDataView"]["NoticeTitle"] == "PREFEITURA MUNICIPAL DE EXEMPLO - EDITAL Nº 3/2024"
+
+
+def test_model_is_asked_only_for_unresolved_fields(monkeypatch):
+    calls = []
+
+    def fake_completion(prompt, instructions, schema_key):
+        calls.append((prompt, schema_key))
+        return {"Notice": "EDITAL", "JobRoles": [{"Name": "Modelo", "Description": "Do modelo."}]}
+
+    monkeypatch.setattr(services, "generate_completion", fake_completion)
+    result = services.extract_notice_data("".join(corpus.notice_pages(20)))
+
+    (prompt, schema_key), = calls
+    assert schema_key == "exam_data_schema:JobRoles"
+    assert "Título do edital" not in prompt
+    assert "ANALISTA DE TECNOLOGIA DA INFORMAÇÃO" in prompt
+    assert result["ExtractionPath"] == "hybrid"
+    assert result["ExamDataView"]["NoticeTitle"].endswith("EDITAL DE CONCURSO PÚBLICO Nº 01/2025")
+    assert result["ExamDataView"]["JobRoles"][0]["Name"] == "Modelo"
+
+
+def fail_if_called(*args):
+    raise AssertionError("o modelo não deveria ser chamado")
+
+
+def test_partial_schema_round_trip(client):
+    response = client.post("/extract_notice_data", json={"notice": "".join(corpus.notice_pages(20)), "echo_notice": False})
+
+    view = response.get_json()["ExamDataView"]
+    assert response.status_code == 200
+    assert view["NoticeDescription"].startswith("O Prefeito Municipal de Exemplo torna público")
+    assert [role["Name"] for role in view["JobRoles"]][0] == "Analista de Tecnologia da Informação"
@@ -0,0 +1,66 @@
+import pytest
+
+import config
+from question_prefetch import prefetch_stats, run_prefetch
+
+SUBJECT = {"Title": "Redes de computadores", "Description": "Modelo OSI e TCP/IP", "AssessmentType": "Lesson"}
+
+
+@pytest.mark.parametrize("quantity", ["cinco", 0, -2, 2.5, True, None])
+def test_invalid_quantity_is_rejected(client, quantity):
+    response = client.post("/generate_questions", json={"subject": SUBJECT, "quantity": quantity})
+
+    assert response.status_code == 400
+    assert "quantity" in response.get_json()["error"]
+
+
+def test_quantity_as_text_is_accepted(client):
+    response = client.post("/generate_questions", json={"subject": SUBJECT, "quantity": "3"})
+
+    assert response.status_code == 200
+    assert len(response.get_json()["Questions"]["Questions"]) == 3
+
+
+def test_bank_serves_prefetched_questions(client):
+    assert config.QUESTION_BANK_ENABLED
+    subject = dict(SUBJECT, Title="Sistemas operacionais")
+    run_prefetch({"subjects": [subject], "quantity": 5})
+    hits = prefetch_stats()["hits"]
+
+    response = client.post("/generate_questions", json={"subject": subject, "quantity": 5, "userId": "u1"})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["Prefetched"] is True
+    assert body["QuestionBank"]["FromBank"] == 5
+    assert prefetch_stats()["hits"] == hits + 1
+
+
+def test_batch_is_served_from_the_bank(client, monkeypatch):
+    import services
+
+    subjects = [dict(SUBJECT, Title=title) for title in ("Segurança da informação", "Engenharia de software")]
+    run_prefetch({"subjects": subjects, "quantity": 5})
+    monkeypatch.setattr(services.gateway, "chat_completion", lambda **kwargs: pytest.fail("modelo chamado"))
+
+    response = client.post("/generate_questions_batch", json={"subjects": subjects, "quantity": 5, "userId": "u2"})
+
+    body = response.get_json()
+    assert response.status_code == 200 and body["Failures"] == []
+    assert [result["QuestionBank"]["FromBank"] for result in body["Results"]] == [5, 5]
+    assert all(result["Prefetched"] for result in body["Results"])
+    assert [question["Order"] for question in body["Questions"]] == list(range(1, 11))
+    assert all("QuestionId" in question for question in body["Questions"])
+
+
+def test_batch_bypass_skips_the_bank(client):
+    subjects = [dict(SUBJECT, Title="Governança de TI")]
+    run_prefetch({"subjects": subjects, "quantity": 3})
+
+    response = client.post(
+        "/generate_questions_batch", json={"subjects": subjects, "quantity": 3}, headers={"X-Cache-Bypass": "1"}
+    )
+
+    result, = response.get_json()["Results"]
+    assert "QuestionBank" not in result and "Prefetched" not in result
+    assert result["Questions"] and all("QuestionId" not in question for question in result["Questions"])
@@ -0,0 +1,108 @@
+import uuid
+
+import services
+from benchmarks import fake_openai
+from models import schemas_dict
+
+NOTICE = """EDITAL Nº 5/2025
+CARGO: ANALISTA DE SISTEMAS 2 vagas
+ANEXO I - CONTEÚDOS PROGRAMÁTICOS
+CARGO: ANALISTA DE SISTEMAS
+Redes de computadores. Banco de dados. Engenharia de software.
+"""
+
+
+def record_model_calls(monkeypatch, fail_when=None):
+    """
+    Registra o schema de cada chamada que chega ao servidor falso; `fail_when(prompt)` derruba a chamada.
+    """
+    calls = []
+    chat_completion = services.gateway.chat_completion
+
+    def recording_chat_completion(**kwargs):
+        schema = kwargs["response_format"]["json_schema"]["schema"]
+        calls.append(next(key for key, known in schemas_dict.items() if known == schema))
+        if fail_when and fail_when(kwargs["messages"][-1]["content"]):
+            raise RuntimeError("modelo indisponível")
+        return chat_completion(**kwargs)
+
+    monkeypatch.setattr(services.gateway, "chat_completion", recording_chat_completion)
+    return calls
+
+
+def use_skeleton(monkeypatch, orders):
+    # Títulos únicos por teste: as lições de cada módulo têm a sua própria entrada no cache
+    tag = uuid.uuid4().hex[:8]
+    monkeypatch.setitem(fake_openai.PAYLOADS, "roadmap_skeleton_schema", {
+        "Title": "Roadmap de Estudos para Analista de Sistemas",
+        "Description": "Roteiro de estudos baseado no conteúdo programático do edital.",
+        "Modules": [
+            {"Title": f"Módulo {order} {tag}", "Description": "Conteúdos do módulo.", "Order": order}
+            for order in orders
+        ]
+    })
+    return tag
+
+
+def roadmap(client, role, **fields):
+    body = dict(notice=NOTICE, selectedJobRole=role, mode="two_phase", prefetchQuestions=False, **fields)
+    return client.post("/extract_roadmap", json=body)
+
+
+def test_modules_and_lessons_are_renumbered(client, monkeypatch):
+    tag = use_skeleton(monkeypatch, [30, 10, 20])
+    monkeypatch.setitem(fake_openai.PAYLOADS, "roadmap_module_lessons_schema", {
+        "Lessons": [
+            {"Title": f"Lição {order}", "Description": "Tópicos da lição.", "Order": order} for order in (9, 2, 5)
+        ]
+    })
+
+    response = roadmap(client, f"Analista {tag}")
+
+    modules = response.get_json()["RoadmapDataView"]["Modules"]
+    assert response.status_code == 200
+    assert [(module["Order"], module["Title"]) for module in modules] == [
+        (1, f"Módulo 10 {tag}"), (2, f"Módulo 20 {tag}"), (3, f"Módulo 30 {tag}")
+    ]
+    assert [(lesson["Order"], lesson["Title"]) for lesson in modules[0]["Lessons"]] == [
+        (1, "Lição 2"), (2, "Lição 5"), (3, "Lição 9")
+    ]
+
+
+def test_each_module_has_its_own_cache_entry(client, monkeypatch):
+    tag = use_skeleton(monkeypatch, [1, 2, 3])
+    calls = record_model_calls(monkeypatch)
+
+    first = roadmap(client, f"Analista {tag}")
+    first_calls = list(calls)
+    second = roadmap(client, f"Analista {tag}")
+
+    assert first.status_code == second.status_code == 200
+    assert first_calls == ["roadmap_skeleton_schema"] + ["roadmap_module_lessons_schema"] * 3
+    assert calls == first_calls
+    assert second.get_json()["RoadmapDataView"] == first.get_json()["RoadmapDataView"]
+
+
+def test_regenerate_modules_calls_the_model_only_for_those_modules(client, monkeypatch):
+    tag = use_skeleton(monkeypatch, [1, 2, 3])
+    calls = record_model_calls(monkeypatch)
+    roadmap(client, f"Analista {tag}")
+    calls.clear()
+
+    response = roadmap(client, f"Analista {tag}", regenerateModules=[2])
+
+    assert response.status_code == 200
+    assert calls == ["roadmap_module_lessons_schema"]
+    assert len(response.get_json()["RoadmapDataView"]["Modules"]) == 3
+
+
+def test_failed_module_does_not_drop_the_others(client, monkeypatch):
+    tag = use_skeleton(monkeypatch, [1, 2, 3])
+    record_model_calls(monkeypatch, fail_when=lambda prompt: f"Módulo 2 {tag}" in prompt)
+
+    response = roadmap(client, f"Analista {tag}")
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [module["Title"] for module in body["RoadmapDataView"]["Modules"]] == [f"Módulo 1 {tag}", f"Módulo 3 {tag}"]
+    assert body["Failures"] == [{"Order": 2, "Title": f"Módulo 2 {tag}", "error": "modelo indisponível"}]
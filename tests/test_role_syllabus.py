@@ -0,0 +1,149 @@
+import os
+from concurrent.futures import Future
+
+import fitz
+
+from notice_index import scan_role_syllabus
+from pdf_extraction import extract_role_syllabus
+
+NOTICE = [
+    "EDITAL Nº 1/2025\nQUADRO DE VAGAS\nTÉCNICO EM INFORMÁTICA 3 vagas\nAUDITOR FISCAL 1 vaga",
+    "Texto sobre as inscrições.",
+    "ANEXO I - CONTEÚDOS PROGRAMÁTICOS\nLíngua Portuguesa para todos os cargos\nCARGO: AUDITOR FISCAL\nContabilidade",
+    "CARGO: TÉCNICO EM INFORMÁTICA\nRedes de computadores\nSistemas operacionais",
+    "Hardware e periféricos",
+    "CARGO: ENFERMEIRO\nSaúde pública",
+    "ANEXO II - CRONOGRAMA"
+]
+
+
+class Pages:
+    """
+    Páginas numeradas que registram até onde foram lidas.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.read = 0
+
+    def __iter__(self):
+        for number, text in enumerate(self.pages):
+            self.read = number + 1
+            yield number, text
+
+
+def test_extracts_only_the_selected_role():
+    text, stats = scan_role_syllabus(Pages(NOTICE), "TÉCNICO EM INFORMÁTICA")
+
+    assert stats["Found"] is True
+    assert (stats["FirstPage"], stats["LastPage"]) == (4, 6)
+    assert "Redes de computadores" in text and "Hardware e periféricos" in text
+    assert "Contabilidade" not in text and "Saúde pública" not in text
+    assert "Língua Portuguesa" not in text
+
+
+def test_role_lines_before_the_section_come_first():
+    text, _ = scan_role_syllabus(Pages(NOTICE), "TÉCNICO EM INFORMÁTICA")
+
+    assert text.startswith("TÉCNICO EM INFORMÁTICA 3 vagas")
+
+
+def test_cargo_matching_ignores_case_and_accents():
+    text, stats = scan_role_syllabus(Pages(NOTICE), "Técnico em Informatica")
+
+    assert stats["Found"] is True
+    assert "Redes de computadores" in text
+
+
+def test_stops_reading_when_the_role_section_ends():
+    pages = Pages(NOTICE)
+
+    _, stats = scan_role_syllabus(pages, "AUDITOR FISCAL")
+
+    assert stats["EarlyExit"] is True
+    assert pages.read == stats["PagesScanned"] == 4
+
+
+def test_new_syllabus_section_ends_the_role():
+    pages = NOTICE[:5] + ["ANEXO III - CONTEÚDOS PROGRAMÁTICOS (NÍVEL SUPERIOR)\nCARGO: ENFERMEIRO"]
+
+    text, stats = scan_role_syllabus(Pages(pages), "TÉCNICO EM INFORMÁTICA")
+
+    assert stats["EarlyExit"] is True
+    assert "NÍVEL SUPERIOR" not in text
+
+
+def test_unknown_role_is_not_found():
+    text, stats = scan_role_syllabus(Pages(NOTICE), "PROFESSOR DE MATEMÁTICA")
+
+    assert text == ""
+    assert stats["Found"] is False
+    assert stats["PagesScanned"] == len(NOTICE)
+
+
+def test_section_without_cargo_lines_falls_back_to_the_whole_section():
+    pages = ["EDITAL Nº 2/2025\nCargo único de TÉCNICO EM INFORMÁTICA",
+             "CONTEÚDOS PROGRAMÁTICOS\nLíngua Portuguesa",
+             "Redes de computadores"]
+
+    text, stats = scan_role_syllabus(Pages(pages), "TÉCNICO EM INFORMÁTICA")
+
+    assert stats["Found"] is True
+    assert (stats["FirstPage"], stats["LastPage"], stats["EarlyExit"]) == (2, 3, False)
+    assert text.splitlines() == ["Cargo único de TÉCNICO EM INFORMÁTICA", "Língua Portuguesa", "Redes de computadores"]
+
+
+def test_extract_role_syllabus_from_pdf():
+    with fitz.open() as doc:
+        for page_text in NOTICE:
+            doc.new_page().insert_text((40, 60), page_text, fontsize=9)
+        data = doc.tobytes()
+
+    text, stats = extract_role_syllabus(data, "TÉCNICO EM INFORMÁTICA")
+
+    assert stats["Found"] is True
+    assert stats["PageCount"] == len(NOTICE)
+    assert "Hardware e periféricos" in text and "Saúde pública" not in text
+
+
+def test_pool_tasks_receive_a_file_path(monkeypatch):
+    import pdf_extraction
+
+    submitted = []
+
+    class InlinePool:
+        def submit(self, function, source, start, stop):
+            submitted.append(source)
+            future = Future()
+            future.set_result(function(source, start, stop))
+            return future
+
+    monkeypatch.setattr(pdf_extraction, "_get_pool", InlinePool)
+    monkeypatch.setattr(pdf_extraction.config, "PDF_PARALLEL_THRESHOLD", 1)
+    monkeypatch.setattr(pdf_extraction.config, "PDF_WORKERS", 2)
+    monkeypatch.setattr(pdf_extraction.config, "PDF_SCAN_CHUNK_PAGES", 2)
+    with fitz.open() as doc:
+        for page_text in NOTICE:
+            doc.new_page().insert_text((40, 60), page_text, fontsize=9)
+        data = doc.tobytes()
+
+    text, stats = extract_role_syllabus(data, "TÉCNICO EM INFORMÁTICA")
+
+    assert stats["Found"] is True and "Hardware e periféricos" in text
+    assert submitted and all(isinstance(source, str) for source in submitted)
+    assert len(set(submitted)) == 1
+    assert not os.path.exists(submitted[0])
+
+
+def test_pool_does_not_fork_the_worker():
+    import pdf_extraction
+
+    with fitz.open() as doc:
+        for page_text in NOTICE:
+            doc.new_page().insert_text((40, 60), page_text, fontsize=9)
+        data = doc.tobytes()
+
+    pages = list(pdf_extraction.iter_pdf_pages_parallel(data))
+
+    assert pdf_extraction._get_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+    assert len(pages) == len(NOTICE) and "Hardware e periféricos" in pages[4]
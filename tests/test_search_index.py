@@ -0,0 +1,68 @@
+import os
+import tempfile
+import uuid
+
+from notice_store import save_notice
+from search_index import NoticeSearchIndex, notice_search_index
+
+VIEW = {
+    "NoticeTitle": "PREFEITURA MUNICIPAL DE SÃO JOSÉ DO RIO PRETO - EDITAL Nº 2/2024",
+    "NoticeDescription": "Concurso público para provimento de cargos efetivos.",
+    "JobRoles": [{"Name": "Técnico em Informática", "Description": "Suporte técnico aos usuários."}]
+}
+
+
+def make_index():
+    index = NoticeSearchIndex(os.path.join(tempfile.mkdtemp(prefix="search-"), "search.sqlite3"))
+    index.index_notice("n1", VIEW)
+    index.index_notice("n2", dict(VIEW, NoticeTitle="CÂMARA MUNICIPAL DE CAMPINAS - EDITAL Nº 5/2023", JobRoles=[]))
+    return index
+
+
+def found(index, text):
+    return [notice["NoticeId"] for notice in index.search(text, 5)]
+
+
+def test_accents_are_folded_on_both_sides():
+    index = make_index()
+
+    assert found(index, "sao jose tecnico informatica") == ["n1"]
+    assert found(index, "SÃO JOSÉ") == ["n1"]
+    assert found(index, "câmara campinas") == ["n2"]
+
+
+def test_terms_match_by_prefix_and_all_are_required():
+    index = make_index()
+
+    assert found(index, "infor tecn") == ["n1"]
+    assert sorted(found(index, "munic")) == ["n1", "n2"]
+    assert found(index, "municipal 2023") == ["n2"]
+    assert found(index, "informática campinas") == []
+
+
+def test_stopword_only_query_searches_nothing():
+    assert NoticeSearchIndex.build_query("concurso de São José") == '"concurso"* AND "sao"* AND "jose"*'
+    assert found(make_index(), "de da do") == []
+
+
+def test_upload_header_does_not_replace_extracted_metadata():
+    index = make_index()
+
+    index.index_notice_text("n1", "EDITAL SEM TÍTULO\nTexto qualquer")
+
+    assert index.search("rio preto", 1)[0]["NoticeTitle"] == VIEW["NoticeTitle"]
+
+
+def test_search_notice_answers_from_the_index_before_the_model(client):
+    town = f"Xique{uuid.uuid4().hex[:8]}"
+    notice_id = save_notice(f"EDITAL DE {town}")
+    notice_search_index.index_notice(notice_id, dict(VIEW, NoticeTitle=f"PREFEITURA DE {town.upper()} - EDITAL Nº 1/2025"))
+
+    indexed = client.post("/search_notice", json={"prompt": f"edital {town[:7].lower()}"}).get_json()
+    fallback = client.post("/search_notice", json={"prompt": f"concurso {uuid.uuid4().hex}"}).get_json()
+
+    assert indexed["Source"] == "index"
+    notice, = indexed["ExamDataView"]["Notices"]
+    assert (notice["NoticeId"], notice["Year"], notice["Notice"]) == (notice_id, "2025", f"EDITAL DE {town}")
+    assert fallback["Source"] == "llm"
+    assert fallback["ExamDataView"]["Notices"][0]["Link"] == "https://example.com/edital.pdf"
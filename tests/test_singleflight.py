@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import services
+from cache import completion_cache
+from singleflight import completion_flight
+
+SCHEMA = "questions_schema"
+INSTRUCTIONS = "Gere questões."
+
+# Segundo processo do "mesmo host": segura o lock da chave, grava a resposta no cache compartilhado e o libera
+HOLDER = """
+import os, sys
+from filelock import FileLock
+import config
+from cache import completion_cache
+
+with FileLock(os.path.join(config.SINGLEFLIGHT_LOCK_DIR, sys.argv[1] + ".lock")):
+    print("locked", flush=True)
+    sys.stdin.readline()
+    completion_cache.set(sys.argv[1], {"Questions": [{"Question": "Do outro processo"}]})
+"""
+
+
+def count_model_calls(monkeypatch, delay):
+    calls = []
+    chat_completion = services.gateway.chat_completion
+
+    def slow_chat_completion(**kwargs):
+        calls.append(kwargs)
+        time.sleep(delay)
+        return chat_completion(**kwargs)
+
+    monkeypatch.setattr(services.gateway, "chat_completion", slow_chat_completion)
+    return calls
+
+
+def test_concurrent_identical_calls_reach_the_model_once(monkeypatch):
+    calls = count_model_calls(monkeypatch, delay=0.3)
+    prompt = f"Redes de computadores {uuid.uuid4()}"
+    before = completion_flight.stats()
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(services.generate_completion(prompt, INSTRUCTIONS, SCHEMA)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    after = completion_flight.stats()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+    assert "error" not in results[0]
+    # Cada chamador recebe a sua cópia
+    assert len({id(result) for result in results}) == 8
+    assert after["leader_calls"] == before["leader_calls"] + 1
+    assert after["coalesced_in_process"] == before["coalesced_in_process"] + 7
+
+
+def test_lock_holder_result_is_read_from_the_cache(monkeypatch):
+    calls = count_model_calls(monkeypatch, delay=0.0)
+    prompt = f"Direito administrativo {uuid.uuid4()}"
+    key = completion_cache.make_key(services.config.OPENAI_MODEL, INSTRUCTIONS, prompt, SCHEMA)
+    before = completion_flight.stats()
+    holder = subprocess.Popen(
+        [sys.executable, "-c", HOLDER, key], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    results = []
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        thread = threading.Thread(target=lambda: results.append(services.generate_completion(prompt, INSTRUCTIONS, SCHEMA)))
+        thread.start()
+        time.sleep(0.2)
+        assert not results
+
+        holder.stdin.write("\n")
+        holder.stdin.flush()
+        thread.join(5)
+    finally:
+        holder.wait(5)
+
+    assert calls == []
+    assert results == [{"Questions": [{"Question": "Do outro processo"}]}]
+    assert completion_flight.stats()["coalesced_cross_process"] == before["coalesced_cross_process"] + 1
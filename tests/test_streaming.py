@@ -0,0 +1,44 @@
+import orjson
+
+import services
+from cache import completion_cache
+from llm_gateway import gateway
+
+QUESTION = {
+    "Question": "Qual camada do modelo OSI roteia pacotes?",
+    "OptionA": "Física", "OptionB": "Rede", "OptionC": "Sessão", "OptionD": "Aplicação",
+    "CorrectOption": "B", "Order": 1, "Origin": "Lesson"
+}
+
+
+def stream_of(payload, monkeypatch, size=7):
+    text = orjson.dumps(payload).decode()
+    monkeypatch.setattr(gateway, "stream_chat_completion",
+                        lambda on_usage=None, **kwargs: (text[i:i + size] for i in range(0, len(text), size)))
+
+
+def run(prompt):
+    return list(services.stream_completion(prompt, "instruções", "questions_schema", "Questions"))
+
+
+def cache_key(prompt):
+    return completion_cache.make_key(services.config.OPENAI_MODEL, "instruções", prompt, "questions_schema")
+
+
+def test_valid_stream_is_cached(monkeypatch):
+    stream_of({"Questions": [QUESTION, QUESTION]}, monkeypatch)
+
+    events = run("stream válido")
+
+    assert [event for event, _ in events] == ["item", "item", "done"]
+    assert completion_cache.get(cache_key("stream válido"), record=False) == {"Questions": [QUESTION, QUESTION]}
+
+
+def test_invalid_stream_is_not_cached(monkeypatch):
+    stream_of({"Questions": [dict(QUESTION, CorrectOption="E")]}, monkeypatch)
+
+    events = run("stream inválido")
+
+    assert events[-1][0] == "error"
+    assert "CorrectOption" in events[-1][1]["error"]
+    assert completion_cache.get(cache_key("stream inválido"), record=False) is None
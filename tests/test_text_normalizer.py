@@ -0,0 +1,70 @@
+from benchmarks import corpus
+from text_normalizer import TextNormalizer, normalize_pages
+
+HEADER = "PREFEITURA MUNICIPAL DE EXEMPLO"
+SUBJECTS = ["Redes", "Banco de dados", "Segurança", "Engenharia de software", "Estatística", "Direito administrativo"]
+
+
+def page(number, total, body):
+    return f"{HEADER}\nSecretaria de Administração\n{body}\nPágina {number} de {total}\n"
+
+
+def pages(total):
+    # Linhas do corpo distintas entre as páginas (dígitos não bastam: "Item 1" e "Item 2" contam como iguais)
+    return [page(number, total, f"Conteúdo de {SUBJECTS[number - 1]}\nQuestões de {SUBJECTS[number - 1]}")
+            for number in range(1, total + 1)]
+
+
+def test_removes_repeated_header_and_page_numbers():
+    text, stats = normalize_pages(corpus.notice_pages(20))
+
+    assert text.count(HEADER) == 1
+    assert text.count("Página ") == 1
+    assert "EDITAL DE CONCURSO PÚBLICO Nº 01/2025" in text
+    # Órgão acima do "EDITAL Nº" continua disponível para as regras de notice_rules
+    assert text.index(HEADER) < text.index("EDITAL DE CONCURSO")
+    assert stats["RepeatedLinesRemoved"] >= 3 * 19
+
+
+def test_document_shorter_than_warmup_window():
+    normalizer = TextNormalizer(warmup_pages=8)
+
+    text = "\n".join(normalizer.pages(pages(4)))
+
+    assert text.count(HEADER) == 1
+    assert text.count("Página ") == 1
+    assert all(f"Conteúdo de {subject}" in text for subject in SUBJECTS[:4])
+    assert normalizer.repeated_lines_removed == 9
+
+
+def test_too_few_pages_keep_every_line():
+    text, stats = normalize_pages(pages(2))
+
+    assert text.count(HEADER) == 2
+    assert stats["RepeatedLinesRemoved"] == 0
+
+
+def test_repeated_lines_in_the_body_are_kept():
+    raw = [page(number, 5, f"Conteúdo de {subject}\nLinha comum a todas\nmais texto\nFim de {subject}")
+           for number, subject in enumerate(SUBJECTS[:5], start=1)]
+
+    text, _ = normalize_pages(raw)
+
+    assert text.count("Linha comum a todas") == 5
+
+
+def test_numbered_pages_keeps_empty_pages_and_order():
+    raw = pages(4)
+    raw.insert(2, "   \n")
+
+    numbered = list(TextNormalizer(warmup_pages=2).numbered_pages(raw))
+
+    assert [number for number, _ in numbered] == [0, 1, 2, 3, 4]
+    assert numbered[2][1] == ""
+
+
+def test_joins_hyphenated_words_and_collapses_spaces():
+    text, stats = normalize_pages(["O  candidato  deverá  apresentar  o  contra-\nto  assinado."])
+
+    assert text == "O candidato deverá apresentar o contrato assinado."
+    assert stats["HyphenationsJoined"] == 1
@@ -0,0 +1,83 @@
+import io
+import os
+
+import fitz
+
+import config
+
+ROLE = "ANALISTA DE TECNOLOGIA DA INFORMAÇÃO"
+
+
+def make_pdf(pages, padding=0):
+    """
+    PDF com o texto de cada página; `padding` bytes aleatórios anexados aumentam o arquivo.
+    """
+    with fitz.open() as doc:
+        for text in pages:
+            doc.new_page().insert_text((40, 60), text, fontsize=9)
+        if padding:
+            doc.embfile_add("padding.bin", os.urandom(padding))
+        return doc.tobytes()
+
+
+def upload(client, data, **form):
+    form["file"] = (io.BytesIO(data), "edital.pdf")
+    return client.post("/upload_notice_pdf", data=form, content_type="multipart/form-data")
+
+
+def large_pdf():
+    # Acima de 500 KB o Werkzeug grava o upload em arquivo temporário, que é mapeado com mmap
+    data = make_pdf(
+        ["EDITAL Nº 1/2025\nCARGO: ANALISTA DE TECNOLOGIA DA INFORMAÇÃO 3 vagas",
+         "ANEXO I - CONTEÚDOS PROGRAMÁTICOS\nCARGO: ANALISTA DE TECNOLOGIA DA INFORMAÇÃO\nRedes de computadores",
+         "CARGO: AUDITOR FISCAL\nContabilidade"],
+        padding=700 * 1024
+    )
+    assert len(data) > max(config.PDF_MMAP_THRESHOLD, 500 * 1024)
+    return data
+
+
+def test_upload_above_mmap_threshold(client):
+    response = upload(client, large_pdf())
+
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body["cached"] is False
+    assert "Redes de computadores" in body["text"]
+
+
+def test_upload_syllabus_above_mmap_threshold(client):
+    response = upload(client, large_pdf(), selectedJobRole=ROLE, echo_notice="false")
+
+    assert response.status_code == 200, response.get_json()
+    syllabus = response.get_json()["syllabus"]
+    assert syllabus["Found"] is True
+    assert (syllabus["FirstPage"], syllabus["LastPage"]) == (2, 3)
+
+
+def test_upload_same_file_is_cached(client):
+    data = make_pdf(["EDITAL Nº 2/2025\nCARGO: ENFERMEIRO"], padding=2048)
+
+    first = upload(client, data)
+    second = upload(client, data)
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json()["cached"] is True
+    assert second.get_json()["notice_id"] == first.get_json()["notice_id"]
+
+
+def test_syllabus_upload_is_stored_as_partial(client):
+    data = make_pdf(
+        ["EDITAL Nº 4/2025\nCARGO: ANALISTA DE TECNOLOGIA DA INFORMAÇÃO 2 vagas",
+         "ANEXO I - CONTEÚDOS PROGRAMÁTICOS\nCARGO: ANALISTA DE TECNOLOGIA DA INFORMAÇÃO\nBanco de dados",
+         "CARGO: AUDITOR FISCAL\nAuditoria"]
+    )
+
+    body = upload(client, data, selectedJobRole=ROLE, echo_notice="false").get_json()
+    notice_id = body["notice_id"]
+    response = client.post("/extract_notice_data", json={"notice_id": notice_id})
+
+    assert body["partial"] is True
+    assert notice_id.startswith("syllabus:")
+    assert response.status_code == 400
+    assert upload(client, data, selectedJobRole=ROLE).get_json()["notice_id"] == notice_id
@@ -0,0 +1,157 @@
+import re
+import threading
+from collections import Counter, deque
+
+import config
+
+# Incrementar quando a saída mudar, para invalidar textos de PDF já normalizados no store
+NORMALIZER_VERSION = 1
+
+DIGITS_PATTERN = re.compile(r"\d+")
+# Hífen no fim da linha entre uma letra e uma minúscula no início da linha seguinte
+# (começa pelo literal "-" para o regex só parar nos hífens)
+HYPHEN_BREAK_PATTERN = re.compile(r"-(?<=[^\W\d_]-)\n(?=[a-zà-ÿ])")
+
+# Só as primeiras e últimas linhas de cada página são candidatas a cabeçalho/rodapé
+EDGE_LINES = 3
+# Abaixo disso não há páginas suficientes para afirmar que uma linha se repete
+MIN_PAGES = 3
+
+_totals = {"texts": 0, "original_chars": 0, "normalized_chars": 0, "repeated_lines_removed": 0}
+_totals_lock = threading.Lock()
+
+
+class TextNormalizer:
+    """
+    Normaliza o texto do edital página a página, em uma única passada por linha:
+    colapsa espaços, descarta linhas vazias, junta palavras hifenizadas na quebra de linha
+    e remove cabeçalhos, rodapés e números de página que se repetem na maioria das páginas.
+
+    As linhas repetidas são detectadas com uma janela de `warmup_pages` páginas à frente,
+    então o texto sai como gerador sem manter o edital inteiro em memória.
+    """
+
+    def __init__(self, repeat_ratio=None, warmup_pages=None):
+        self.repeat_ratio = repeat_ratio or config.NORMALIZER_REPEAT_RATIO
+        self.warmup_pages = warmup_pages or config.NORMALIZER_WARMUP_PAGES
+        self.original_chars = 0
+        self.normalized_chars = 0
+        self.repeated_lines_removed = 0
+        self.hyphenations_joined = 0
+        self._pages_seen = 0
+        self._edge_counts = Counter()
+        self._emitted_repeated = set()
+
+    @staticmethod
+    def _line_key(line):
+        # "Página 3 de 60" e "Página 4 de 60" contam como a mesma linha
+        return DIGITS_PATTERN.sub("#", line)
+
+    @staticmethod
+    def _split_edges(lines):
+        middle_end = max(EDGE_LINES, len(lines) - EDGE_LINES)
+        return lines[:EDGE_LINES], lines[EDGE_LINES:middle_end], lines[middle_end:]
+
+    def _keep(self, line, key):
+        if self._pages_seen < MIN_PAGES or self._edge_counts[key] < self.repeat_ratio * self._pages_seen:
+            return True
+
+        # A primeira ocorrência fica (ex.: nome do órgão acima do "EDITAL Nº ..." usado pelas regras)
+        if key not in self._emitted_repeated:
+            self._emitted_repeated.add(key)
+            return True
+
+        self.repeated_lines_removed += 1
+        return False
+
+    def _emit(self, lines, edge_keys):
+        head, middle, tail = self._split_edges(lines)
+        kept = [line for line in head if self._keep(line, edge_keys[line])] + middle
+        kept += [line for line in tail if self._keep(line, edge_keys[line])]
+
+        page_text = "\n".join(kept)
+        if "-\n" in page_text:
+            # "contra-\nto" -> "contrato"
+            page_text, joined = HYPHEN_BREAK_PATTERN.subn("", page_text)
+            self.hyphenations_joined += joined
+        if page_text:
+            self.normalized_chars += len(page_text) + 1
+        return page_text
+
+    def pages(self, raw_pages):
+        """
+        Gera o texto normalizado de cada página (páginas que ficam vazias são omitidas).
+        """
+        for _, page_text in self.numbered_pages(raw_pages):
+            if page_text:
+                yield page_text
+
+    def numbered_pages(self, raw_pages):
+        """
+        Gera (índice da página, texto normalizado) para todas as páginas, inclusive as que ficam vazias.
+        Cada página sai depois de `warmup_pages` páginas à frente terem sido lidas.
+        """
+        window = deque()
+
+        for page_num, raw_page in enumerate(raw_pages):
+            self.original_chars += len(raw_page)
+
+            lines = [line for line in (" ".join(raw.split()) for raw in raw_page.splitlines()) if line]
+            head, _, tail = self._split_edges(lines)
+            edge_keys = {line: self._line_key(line) for line in head + tail}
+            self._edge_counts.update(set(edge_keys.values()))
+            self._pages_seen += 1
+            window.append((page_num, lines, edge_keys))
+
+            if len(window) > self.warmup_pages:
+                page_num, lines, edge_keys = window.popleft()
+                yield page_num, self._emit(lines, edge_keys)
+
+        while window:
+            page_num, lines, edge_keys = window.popleft()
+            yield page_num, self._emit(lines, edge_keys)
+
+        self._record_totals()
+
+    def _record_totals(self):
+        with _totals_lock:
+            _totals["texts"] += 1
+            _totals["original_chars"] += self.original_chars
+            _totals["normalized_chars"] += self.normalized_chars
+            _totals["repeated_lines_removed"] += self.repeated_lines_removed
+
+    def stats(self):
+        removed_chars = max(0, self.original_chars - self.normalized_chars)
+        return {
+            "OriginalChars": self.original_chars,
+            "NormalizedChars": self.normalized_chars,
+            "RemovedChars": removed_chars,
+            # Mesma aproximação de relevance.estimate_tokens (~4 caracteres por token)
+            "RemovedTokens": (removed_chars + 3) // 4,
+            "RepeatedLinesRemoved": self.repeated_lines_removed,
+            "HyphenationsJoined": self.hyphenations_joined
+        }
+
+
+def normalize_pages(raw_pages):
+    """
+    Normaliza um iterável de páginas. Devolve (texto, estatísticas).
+    """
+    normalizer = TextNormalizer()
+    text = "\n".join(normalizer.pages(raw_pages))
+    return text, normalizer.stats()
+
+
+def normalize_text(text):
+    """
+    Normaliza um texto já extraído. Páginas separadas por form feed ("\\f") passam pela
+    remoção de cabeçalhos e rodapés; sem separador o texto é tratado como uma única página.
+    """
+    return normalize_pages(text.split("\f"))
+
+
+def normalization_totals():
+    with _totals_lock:
+        totals = dict(_totals)
+    totals["removed_chars"] = max(0, totals["original_chars"] - totals["normalized_chars"])
+    return totals